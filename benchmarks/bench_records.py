@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк компактных записей (records.py)
+Сравнивает память, которую занимают N постов в виде словарей из REST JSON и в
+виде записей Post, а также скорость преобразования JSON -> запись -> JSON.
+Посты разбираются по одному, как при потоковом чтении списка, поэтому у
+каждого словаря свои копии ключей. Для терминов и узлов дерева страниц
+сравнивается то же самое.
+
+Пример:
+    python benchmarks/bench_records.py --count 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from records import PageNode, Post, Term, to_json  # noqa: E402
+
+
+def make_post(i: int) -> dict:
+    """Пост в формате ответа /wp/v2/posts (context=view)"""
+    date = f"2024-05-{i % 28 + 1:02d}T10:{i % 60:02d}:00"
+    return {
+        "id": i,
+        "date": date,
+        "date_gmt": date,
+        "guid": {"rendered": f"https://example.com/?p={i}"},
+        "modified": date,
+        "modified_gmt": date,
+        "slug": f"post-{i}",
+        "status": "publish",
+        "type": "post",
+        "link": f"https://example.com/post-{i}/",
+        "title": {"rendered": f"Заголовок поста {i}"},
+        "content": {"rendered": f"<p>Текст поста {i}. " + "Lorem ipsum dolor sit amet. " * 8 + "</p>", "protected": False},
+        "excerpt": {"rendered": f"<p>Анонс поста {i}</p>", "protected": False},
+        "author": i % 5 + 1,
+        "featured_media": 0,
+        "comment_status": "open",
+        "ping_status": "open",
+        "sticky": False,
+        "template": "",
+        "format": "standard",
+        "meta": {"footnotes": ""},
+        "categories": [i % 7 + 1],
+        "tags": [i % 11 + 1, i % 13 + 20],
+        "class_list": [f"post-{i}", "post", "type-post", "status-publish", "format-standard", "hentry"],
+    }
+
+
+def measure(build) -> tuple:
+    """Возвращает (байт в куче после build(), результат)"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, result
+
+
+def compare(title: str, texts: list, convert) -> None:
+    dict_size, dicts = measure(lambda: [json.loads(text) for text in texts])
+    record_size, records = measure(lambda: [convert(json.loads(text)) for text in texts])
+    del dicts, records
+    count = len(texts)
+    print(
+        f"{title:<12} словари: {dict_size / count:7.0f} Б/шт   записи: {record_size / count:7.0f} Б/шт   "
+        f"на 1 ГБ: {2**30 // max(1, dict_size // count):>9,} -> {2**30 // max(1, record_size // count):>9,} "
+        f"(x{dict_size / max(1, record_size):.2f})"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=10000, help="Число объектов")
+    args = parser.parse_args()
+
+    posts = [json.dumps(make_post(i), ensure_ascii=False) for i in range(args.count)]
+    terms = [json.dumps({"id": i, "name": f"Рубрика {i}", "slug": f"rubrika-{i}", "link": f"https://example.com/category/rubrika-{i}/"}) for i in range(args.count)]
+    pages = [json.dumps({"id": i, "parent": 0, "title": {"rendered": f"Страница {i}"}, "slug": f"page-{i}", "status": "publish", "menu_order": 0, "link": f"https://example.com/page-{i}/"}) for i in range(args.count)]
+
+    print(f"Память на объект ({args.count} объектов):")
+    compare("посты", posts, Post.from_rest)
+    compare("термины", terms, Term.from_rest)
+    compare("страницы", pages, PageNode.from_rest)
+
+    items = [json.loads(text) for text in posts]
+    started = time.perf_counter()
+    records = [Post.from_rest(item) for item in items]
+    from_rest = time.perf_counter() - started
+    started = time.perf_counter()
+    json.dumps(records, ensure_ascii=False, default=to_json)
+    dump_records = time.perf_counter() - started
+    started = time.perf_counter()
+    json.dumps(items, ensure_ascii=False)
+    dump_dicts = time.perf_counter() - started
+    print(f"Post.from_rest: {from_rest / args.count * 1e6:.1f} мкс/пост")
+    print(f"json.dumps: словари {dump_dicts / args.count * 1e6:.1f} мкс/пост, записи {dump_records / args.count * 1e6:.1f} мкс/пост")
+
+    if [record.to_dict() for record in records] != items:
+        print("ОШИБКА: to_dict() не совпадает с исходным JSON")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
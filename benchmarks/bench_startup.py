@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк холодного запуска stdio сервера
+Запускает server.py как отдельный процесс и измеряет время от старта до ответа
+на первый tools/list. Завершается с кодом 1, если медиана превышает бюджет.
+
+Пример:
+    python benchmarks/bench_startup.py --runs 5 --budget-ms 1500
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MESSAGES = [
+    {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {"name": "bench-startup", "version": "1.0.0"}
+        }
+    },
+    {"jsonrpc": "2.0", "method": "notifications/initialized"},
+    {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+]
+
+
+def measure_once(timeout: float) -> tuple:
+    """Возвращает (секунды до ответа на tools/list, число инструментов)"""
+    env = dict(os.environ)
+    # Сервер не должен обращаться к настоящему сайту во время замера
+    env.setdefault("WORDPRESS_URL", "http://127.0.0.1:9")
+    env.setdefault("WORDPRESS_USERNAME", "bench")
+    env.setdefault("WORDPRESS_APP_PASSWORD", "bench")
+    env["WORDPRESS_MEDIA_INDEX"] = ""
+    env["WORDPRESS_JOB_QUEUE"] = ""
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py")],
+        cwd=ROOT,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True
+    )
+    try:
+        for message in MESSAGES:
+            process.stdin.write(json.dumps(message) + "\n")
+        process.stdin.flush()
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            line = process.stdout.readline()
+            if not line:
+                break
+            try:
+                response = json.loads(line)
+            except ValueError:
+                continue
+            if response.get("id") == 2:
+                return time.perf_counter() - started, len(response["result"]["tools"])
+        raise RuntimeError("Сервер не ответил на tools/list")
+    finally:
+        process.kill()
+        process.wait()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Количество запусков")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_BUDGET_MS", "2000")),
+        help="Допустимая медиана времени до первого tools/list (мс)"
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Таймаут одного запуска (с)")
+    args = parser.parse_args()
+
+    timings = []
+    tools = 0
+    for _ in range(args.runs):
+        elapsed, tools = measure_once(args.timeout)
+        timings.append(elapsed * 1000)
+
+    median = statistics.median(timings)
+    print(f"Инструментов: {tools}")
+    print(f"До первого tools/list: min {min(timings):.0f} мс, медиана {median:.0f} мс, max {max(timings):.0f} мс")
+    if median > args.budget_ms:
+        print(f"ПРЕВЫШЕН бюджет запуска: {median:.0f} мс > {args.budget_ms:.0f} мс")
+        return 1
+    print(f"Бюджет запуска соблюден ({args.budget_ms:.0f} мс)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест серверов на локальной заглушке WordPress
+Поднимает benchmarks/wp_mock.py, затем нагружает stdio сервер (server.py)
+и/или JSON-RPC endpoint /mcp SSE сервера (mcp_sse_server.py) смесью вызовов
+инструментов и выводит пропускную способность и p50/p95/p99 по инструментам.
+
+Пример:
+    python benchmarks/load_test.py --target both --requests 400 --concurrency 16 --latency-ms 30
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from wp_mock import MockConfig, create_app  # noqa: E402
+
+# (инструмент, аргументы, вес) - смесь вызовов, типичная для сессии модели
+STDIO_MIX = [
+    ("wp_list_posts", {"per_page": 10}, 30),
+    ("wp_get_post", {"post_id": "<post>"}, 25),
+    ("wp_list_comments", {"per_page": 20, "status": "hold"}, 10),
+    ("wp_list_categories", {}, 10),
+    ("wp_search", {"search": "Post 1"}, 10),
+    ("wp_get_site_info", {}, 5),
+    ("wp_create_post", {"title": "Load test", "content": "<p>Body</p>", "status": "draft"}, 10),
+]
+
+SSE_MIX = [
+    ("get_posts", {"per_page": 10}, 45),
+    ("get_posts", {"per_page": 100}, 5),
+    ("create_post", {"title": "Load test", "content": "<p>Body</p>", "status": "draft"}, 25),
+    ("update_post", {"post_id": "<post>", "title": "Updated by load test"}, 25),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(app: Any, port: int) -> uvicorn.Server:
+    """Запускает ASGI приложение в фоновом потоке и ждет готовности"""
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.time() + 15
+    while not server.started:
+        if time.time() > deadline:
+            raise RuntimeError(f"Сервер на порту {port} не запустился")
+        time.sleep(0.02)
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Перцентиль методом ближайшего ранга"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def build_calls(mix: List[Tuple[str, Dict[str, Any], int]], count: int, post_ids: List[int], seed: int) -> List[Tuple[str, Dict]]:
+    """Генерирует последовательность вызовов по весам смеси"""
+    rnd = random.Random(seed)
+    calls = []
+    for _ in range(count):
+        name, args, _ = rnd.choices(mix, weights=[w for _, _, w in mix])[0]
+        args = {k: (rnd.choice(post_ids) if v == "<post>" else v) for k, v in args.items()}
+        calls.append((name, args))
+    return calls
+
+
+class Recorder:
+    """Собирает задержки и ошибки по инструментам"""
+
+    def __init__(self) -> None:
+        self.latencies: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, tool: str, seconds: float, ok: bool) -> None:
+        self.latencies.setdefault(tool, []).append(seconds * 1000)
+        if not ok:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+
+    def report(self, title: str, elapsed: float) -> Dict[str, Any]:
+        total = sum(len(v) for v in self.latencies.values())
+        rows = {}
+        print(f"\n== {title}: {total} вызовов за {elapsed:.2f} с, {total / elapsed:.1f} вызовов/с ==")
+        print(f"{'инструмент':<22}{'вызовов':>8}{'ошибок':>8}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}")
+        for tool, values in sorted(self.latencies.items()):
+            row = {
+                "count": len(values),
+                "errors": self.errors.get(tool, 0),
+                "p50_ms": round(percentile(values, 50), 1),
+                "p95_ms": round(percentile(values, 95), 1),
+                "p99_ms": round(percentile(values, 99), 1),
+            }
+            rows[tool] = row
+            print(f"{tool:<22}{row['count']:>8}{row['errors']:>8}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}")
+        return {"calls": total, "elapsed_s": round(elapsed, 3), "throughput": round(total / elapsed, 1), "tools": rows}
+
+
+async def run_stdio(mock_url: str, calls: List[Tuple[str, Dict]], concurrency: int) -> Dict[str, Any]:
+    """Нагружает server.py через stdio, удерживая до concurrency запросов в полете"""
+    env = dict(os.environ)
+    env.update(
+        WORDPRESS_URL=mock_url,
+        WORDPRESS_USERNAME="bench",
+        WORDPRESS_APP_PASSWORD="bench",
+        WORDPRESS_MEDIA_INDEX="",
+        WORDPRESS_JOB_QUEUE="",
+        # Без прогрева: он добавил бы свои запросы к заглушке и писал бы .warmup.json в корень проекта
+        WORDPRESS_WARMUP="",
+        WORDPRESS_WARMUP_STATE="",
+    )
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.join(ROOT, "server.py"),
+        cwd=ROOT, env=env,
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        limit=64 * 1024 * 1024,
+    )
+    pending: Dict[int, asyncio.Future] = {}
+
+    async def reader() -> None:
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            future = pending.pop(message.get("id"), None)
+            if future and not future.done():
+                future.set_result(message)
+
+    async def send(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        future = None
+        if "id" in message:
+            future = asyncio.get_running_loop().create_future()
+            pending[message["id"]] = future
+        process.stdin.write((json.dumps(message) + "\n").encode())
+        await process.stdin.drain()
+        return await future if future else None
+
+    reader_task = asyncio.create_task(reader())
+    await send({"jsonrpc": "2.0", "id": 0, "method": "initialize", "params": {
+        "protocolVersion": "2024-11-05", "capabilities": {}, "clientInfo": {"name": "load-test", "version": "1.0.0"}}})
+    await send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(index: int, name: str, args: Dict[str, Any]) -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            response = await send({"jsonrpc": "2.0", "id": index + 1, "method": "tools/call",
+                                   "params": {"name": name, "arguments": args}})
+            ok = "error" not in response and not response.get("result", {}).get("isError")
+            recorder.add(name, time.perf_counter() - started, ok)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(i, name, args) for i, (name, args) in enumerate(calls)))
+    elapsed = time.perf_counter() - started
+
+    process.kill()
+    await process.wait()
+    reader_task.cancel()
+    return recorder.report("stdio server.py", elapsed)
+
+
+async def run_sse(mock_url: str, calls: List[Tuple[str, Dict]], concurrency: int, sessions: int = 1) -> Dict[str, Any]:
+    """Нагружает POST /mcp SSE сервера, запущенного в этом процессе, от имени sessions сессий"""
+    import mcp_sse_server
+
+    mcp_sse_server.WORDPRESS_URL = mock_url
+    mcp_sse_server.WORDPRESS_USERNAME = "bench"
+    mcp_sse_server.WORDPRESS_PASSWORD = "bench"
+    port = free_port()
+    server = start_uvicorn(mcp_sse_server.app, port)
+
+    recorder = Recorder()
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+        async def call(index: int, name: str, args: Dict[str, Any]) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                ok = False
+                try:
+                    headers = {"Mcp-Session-Id": f"load-{index % sessions}"}
+                    response = await client.post("/mcp", headers=headers, json={
+                        "jsonrpc": "2.0", "id": index, "method": "tools/call",
+                        "params": {"name": name, "arguments": args}})
+                    body = response.json()
+                    if "result" in body:
+                        ok = json.loads(body["result"]["content"][0]["text"]).get("success", False)
+                except Exception:
+                    ok = False
+                recorder.add(name, time.perf_counter() - started, ok)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(i, name, args) for i, (name, args) in enumerate(calls)))
+        elapsed = time.perf_counter() - started
+
+    server.should_exit = True
+    return recorder.report("SSE server /mcp", elapsed)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["stdio", "sse", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=300, help="Количество вызовов инструментов на цель")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных вызовов")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Задержка заглушки WordPress")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Разброс задержки заглушки")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ошибок заглушки (0..1)")
+    parser.add_argument("--sessions", type=int, default=1, help="Количество сессий MCP для SSE сервера")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", help="Сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    mock_port = free_port()
+    mock_url = f"http://127.0.0.1:{mock_port}"
+    mock_app = create_app(
+        MockConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed),
+        base_url=mock_url,
+    )
+    start_uvicorn(mock_app, mock_port)
+    post_ids = list(mock_app.state.wordpress.items["posts"])
+
+    results: Dict[str, Any] = {}
+    if args.target in ("stdio", "both"):
+        calls = build_calls(STDIO_MIX, args.requests, post_ids, args.seed)
+        results["stdio"] = asyncio.run(run_stdio(mock_url, calls, args.concurrency))
+    if args.target in ("sse", "both"):
+        calls = build_calls(SSE_MIX, args.requests, post_ids, args.seed)
+        results["sse"] = asyncio.run(run_sse(mock_url, calls, args.concurrency, args.sessions))
+    print(f"\nЗапросов к заглушке WordPress: {mock_app.state.wordpress.requests}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
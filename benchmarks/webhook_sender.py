@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Локальный отправитель уведомлений об изменениях вместо плагина WordPress
+Подписывает события так же, как хук на стороне WordPress (HMAC-SHA256 от
+"<timestamp>.<тело>"), и отправляет их на /webhooks/wordpress SSE сервера.
+С --count отправляет серию событий и выводит задержку доставки p50/p95/p99,
+с --check дополнительно проверяет, что сервер отклоняет неверную подпись,
+устаревшую метку времени и повтор доставки.
+
+Пример:
+    python benchmarks/webhook_sender.py --url http://127.0.0.1:8000/webhooks/wordpress \\
+        --secret s3cret --event post.saved --id 12 --count 100 --check
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+
+def signed_headers(secret: str, body: bytes, timestamp: Optional[int] = None, delivery_id: Optional[str] = None) -> Dict[str, str]:
+    """Заголовки запроса: метка времени, подпись и ID доставки"""
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("ascii") + body, hashlib.sha256).hexdigest()
+    return {
+        "Content-Type": "application/json",
+        "X-Webhook-Timestamp": str(timestamp),
+        "X-Webhook-Signature": f"sha256={digest}",
+        "X-Webhook-Id": delivery_id or uuid.uuid4().hex,
+    }
+
+
+def send_event(
+    client: httpx.Client,
+    url: str,
+    secret: str,
+    event: Dict[str, Any],
+    timestamp: Optional[int] = None,
+    delivery_id: Optional[str] = None
+) -> Tuple[int, Dict[str, Any], float]:
+    """Отправляет событие; возвращает (HTTP статус, ответ, миллисекунды до ответа)"""
+    body = json.dumps(event).encode("utf-8")
+    started = time.perf_counter()
+    response = client.post(url, content=body, headers=signed_headers(secret, body, timestamp, delivery_id))
+    elapsed = (time.perf_counter() - started) * 1000
+    return response.status_code, response.json(), elapsed
+
+
+def check_rejections(client: httpx.Client, url: str, secret: str, event: Dict[str, Any]) -> bool:
+    """Проверяет, что сервер отклоняет поддельные и повторные доставки"""
+    checks = []
+    status, _, _ = send_event(client, url, secret + "-wrong", event)
+    checks.append(("неверная подпись -> 401", status == 401))
+    status, _, _ = send_event(client, url, secret, event, timestamp=int(time.time()) - 3600)
+    checks.append(("метка времени час назад -> 401", status == 401))
+    delivery_id = uuid.uuid4().hex
+    send_event(client, url, secret, event, delivery_id=delivery_id)
+    status, payload, _ = send_event(client, url, secret, event, delivery_id=delivery_id)
+    checks.append(("повтор доставки -> duplicate", status == 200 and payload.get("duplicate") is True))
+    status, _, _ = send_event(client, url, secret, {**event, "event": "post.exploded"})
+    checks.append(("неизвестное событие -> 400", status == 400))
+    for title, ok in checks:
+        print(f"  {'OK  ' if ok else 'FAIL'} {title}")
+    return all(ok for _, ok in checks)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000/webhooks/wordpress")
+    parser.add_argument("--secret", required=True, help="Общий секрет (WEBHOOK_SECRET сервера)")
+    parser.add_argument("--event", default="post.saved", help="post.saved, post.deleted, term.changed, comment.status")
+    parser.add_argument("--id", type=int, default=1, help="ID поста, термина или комментария")
+    parser.add_argument("--type", default="post", help="Тип записи или таксономия")
+    parser.add_argument("--site", default=None, help="Сайт из реестра сервера (по умолчанию основной)")
+    parser.add_argument("--count", type=int, default=1, help="Сколько событий отправить")
+    parser.add_argument("--check", action="store_true", help="Проверить отклонение поддельных и повторных доставок")
+    args = parser.parse_args()
+
+    event: Dict[str, Any] = {"event": args.event, "id": args.id, "type": args.type}
+    if args.site:
+        event["site"] = args.site
+    latencies = []
+    with httpx.Client(timeout=10) as client:
+        for _ in range(args.count):
+            status, payload, elapsed = send_event(client, args.url, args.secret, event)
+            if status != 200:
+                print(f"Ошибка {status}: {payload}")
+                return 1
+            latencies.append(elapsed)
+        print(f"Последний ответ: {payload}")
+        if len(latencies) > 1:
+            latencies.sort()
+            quantile = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+            print(
+                f"{len(latencies)} событий: p50 {statistics.median(latencies):.1f} мс, "
+                f"p95 {quantile(0.95):.1f} мс, p99 {quantile(0.99):.1f} мс"
+            )
+        if args.check:
+            print("Проверки:")
+            if not check_rejections(client, args.url, args.secret, event):
+                return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+Локальная замена WordPress REST API для бенчмарков и отладки без настоящего сайта
+Реализует endpoints wp/v2, которые используют серверы (posts, pages, media, users,
+comments, categories, tags, search, types) и batch/v1, с настраиваемой задержкой,
+разбросом задержки и долей ошибок.
+
+Пример:
+    python benchmarks/wp_mock.py --port 8081 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import compression  # noqa: E402
+
+# Маршруты, для которых разрешен /batch/v1 (как в ядре WordPress)
+BATCH_ROUTES = {"posts", "pages", "categories", "tags"}
+
+COLLECTIONS = ("posts", "pages", "media", "users", "comments", "categories", "tags")
+# Ответ /wp/v2/types: встроенные типы записей, включая служебный тип меню
+POST_TYPES = {
+    slug: {"name": name, "slug": slug, "rest_base": rest_base, "rest_namespace": "wp/v2", "viewable": viewable}
+    for slug, name, rest_base, viewable in (
+        ("post", "Posts", "posts", True),
+        ("page", "Pages", "pages", True),
+        ("attachment", "Media", "media", True),
+        ("nav_menu_item", "Navigation Menu Items", "menu-items", False),
+    )
+}
+
+
+@dataclass
+class MockConfig:
+    """Параметры поведения заглушки"""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    posts: int = 200
+    pages: int = 60
+    comments: int = 500
+    media: int = 50
+    seed: int = 42
+    compress: bool = True  # сжимать ответы REST API по Accept-Encoding
+
+
+class MockWordPress:
+    """Хранилище данных и обработка запросов REST API в памяти"""
+
+    def __init__(self, config: MockConfig, base_url: str = "http://127.0.0.1:8081"):
+        self.config = config
+        self.base_url = base_url.rstrip("/")
+        self.random = random.Random(config.seed)
+        self.items: Dict[str, Dict[int, Dict[str, Any]]] = {name: {} for name in COLLECTIONS}
+        self.files: Dict[str, bytes] = {}
+        self.next_id = 1
+        self.requests = 0
+        self.bytes_sent = 0  # тело ответов REST API в байтах (после сжатия)
+        self._seed()
+
+    # ---------------------------------------------------------------- данные
+
+    def _new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def _date(self, days_ago: float) -> str:
+        return (datetime(2024, 1, 1) - timedelta(days=days_ago)).strftime("%Y-%m-%dT%H:%M:%S")
+
+    def _seed(self) -> None:
+        users = [self._create("users", {"name": f"Author {i}", "username": f"author{i}", "email": f"author{i}@example.com"})
+                 for i in range(1, 6)]
+        categories = [self._create("categories", {"name": f"Category {i}"}) for i in range(1, 11)]
+        tags = [self._create("tags", {"name": f"Tag {i}"}) for i in range(1, 31)]
+        statuses = ["publish"] * 8 + ["draft", "pending"]
+        for i in range(self.config.posts):
+            body = "".join(f"<!-- wp:paragraph --><p>Paragraph {j} of post {i}. Lorem ipsum dolor sit amet.</p><!-- /wp:paragraph -->"
+                           for j in range(20))
+            self._create("posts", {
+                "title": f"Post {i}",
+                "content": body,
+                "excerpt": f"Excerpt of post {i}",
+                "status": self.random.choice(statuses),
+                "author": self.random.choice(users)["id"],
+                "categories": [self.random.choice(categories)["id"]],
+                "tags": [t["id"] for t in self.random.sample(tags, 3)],
+                "date": self._date(i)
+            })
+        pages: List[Dict[str, Any]] = []
+        for i in range(self.config.pages):
+            parent = self.random.choice(pages)["id"] if pages and i % 3 else 0
+            pages.append(self._create("pages", {
+                "title": f"Page {i}",
+                "content": f"<p>Page {i}</p>",
+                "parent": parent,
+                "menu_order": i,
+                "date": self._date(i)
+            }))
+        posts = list(self.items["posts"].values())
+        for i in range(self.config.comments):
+            spam = i % 5 == 0
+            self._create("comments", {
+                "post": self.random.choice(posts)["id"],
+                "author_name": f"Visitor {i}",
+                "author_email": f"bot{i}@spam.example" if spam else f"visitor{i}@example.org",
+                "author_ip": f"203.0.113.{i % 250}" if spam else f"198.51.100.{i % 250}",
+                "content": "Buy cheap pills now" if spam else f"Nice post, thanks #{i}",
+                "status": "hold" if spam else "approved",
+                "date": self._date(i / 10)
+            })
+        for i in range(self.config.media):
+            self._create_media(f"image-{i}.jpg", self.random.randbytes(2048), {"title": f"Image {i}"})
+
+    def _render(self, collection: str, item_id: int, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Строит объект в формате ответа WordPress"""
+        slug = str(data.get("slug") or f"{collection}-{item_id}")
+        if collection in ("posts", "pages"):
+            date = data.get("date") or self._date(0)
+            item = {
+                "id": item_id,
+                "date": date,
+                "modified": data.get("modified") or date,
+                "slug": slug,
+                "status": data.get("status", "publish"),
+                "type": "post" if collection == "posts" else "page",
+                "link": f"{self.base_url}/{slug}/",
+                "title": {"rendered": data.get("title", ""), "raw": data.get("title", "")},
+                "content": {"rendered": data.get("content", ""), "raw": data.get("content", "")},
+                "excerpt": {"rendered": data.get("excerpt", ""), "raw": data.get("excerpt", "")},
+                "author": data.get("author", 1),
+                "featured_media": data.get("featured_media", 0),
+                "guid": {"rendered": f"{self.base_url}/?p={item_id}"}
+            }
+            if collection == "posts":
+                item["categories"] = data.get("categories", [])
+                item["tags"] = data.get("tags", [])
+            else:
+                item["parent"] = data.get("parent", 0)
+                item["menu_order"] = data.get("menu_order", 0)
+            return item
+        if collection == "comments":
+            return {
+                "id": item_id,
+                "post": data.get("post", 0),
+                "parent": data.get("parent", 0),
+                "author_name": data.get("author_name", ""),
+                "author_email": data.get("author_email", ""),
+                "author_ip": data.get("author_ip", "127.0.0.1"),
+                "date": data.get("date") or self._date(0),
+                "content": {"rendered": f"<p>{data.get('content', '')}</p>", "raw": data.get("content", "")},
+                "status": data.get("status", "approved"),
+                "link": f"{self.base_url}/?p={data.get('post', 0)}#comment-{item_id}"
+            }
+        if collection in ("categories", "tags"):
+            return {
+                "id": item_id,
+                "name": data.get("name", ""),
+                "slug": slug,
+                "description": data.get("description", ""),
+                "count": data.get("count", 0),
+                "parent": data.get("parent", 0),
+                "link": f"{self.base_url}/{collection[:-1]}/{slug}/",
+                "taxonomy": "category" if collection == "categories" else "post_tag"
+            }
+        if collection == "users":
+            return {
+                "id": item_id,
+                "name": data.get("name", ""),
+                "username": data.get("username", slug),
+                "slug": data.get("username", slug),
+                "email": data.get("email", ""),
+                "url": data.get("url", ""),
+                "description": data.get("description", ""),
+                "link": f"{self.base_url}/author/{data.get('username', slug)}/",
+                "roles": data.get("roles", ["author"])
+            }
+        return {
+            "id": item_id,
+            "date": data.get("date") or self._date(0),
+            "slug": slug,
+            "status": "inherit",
+            "type": "attachment",
+            "link": f"{self.base_url}/?attachment_id={item_id}",
+            "title": {"rendered": data.get("title", ""), "raw": data.get("title", "")},
+            "alt_text": data.get("alt_text", ""),
+            "media_type": data.get("media_type", "image"),
+            "mime_type": data.get("mime_type", "image/jpeg"),
+            "source_url": data.get("source_url", "")
+        }
+
+    def _create(self, collection: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        item_id = self._new_id()
+        item = self._render(collection, item_id, data)
+        self.items[collection][item_id] = item
+        return item
+
+    def _create_media(self, file_name: str, content: bytes, data: Dict[str, Any]) -> Dict[str, Any]:
+        item_id = self._new_id()
+        key = f"{item_id}-{file_name}"
+        self.files[key] = content
+        data = {"title": file_name, **data, "source_url": f"{self.base_url}/files/{key}"}
+        item = self._render("media", item_id, data)
+        self.items["media"][item_id] = item
+        return item
+
+    def _update(self, collection: str, item: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+        for key, value in body.items():
+            if isinstance(item.get(key), dict) and "rendered" in item[key]:
+                rendered = f"<p>{value}</p>" if collection == "comments" and key == "content" else value
+                item[key] = {"rendered": rendered, "raw": value}
+            elif key == "status" and collection == "comments":
+                item[key] = "approved" if value in ("approve", "approved", "1") else value
+            elif key != "id":
+                item[key] = value
+        if "modified" in item:
+            item["modified"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S")
+        return item
+
+    # --------------------------------------------------------------- запросы
+
+    def _filter(self, collection: str, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        items = list(self.items[collection].values())
+        status = params.get("status")
+        if collection in ("posts", "pages"):
+            wanted = set(status.split(",")) if status else {"publish"}
+            if "any" not in wanted:
+                items = [i for i in items if i["status"] in wanted]
+        elif collection == "comments":
+            wanted = {"approved" if s in ("approve", "approved") else s for s in (status or "approve").split(",")}
+            if "all" not in wanted:
+                items = [i for i in items if i["status"] in wanted]
+        if params.get("include"):
+            include = {int(x) for x in params["include"].split(",") if x}
+            items = [i for i in items if i["id"] in include]
+        if params.get("search"):
+            needle = params["search"].lower()
+            items = [i for i in items if needle in json.dumps(i.get("title") or i.get("name") or i.get("content")).lower()]
+        for key in ("parent", "post", "author", "media_type", "author_email"):
+            if params.get(key) not in (None, ""):
+                values = set(params[key].split(","))
+                items = [i for i in items if str(i.get(key)) in values]
+        if params.get("categories"):
+            wanted_terms = {int(x) for x in params["categories"].split(",")}
+            items = [i for i in items if wanted_terms & set(i.get("categories", []))]
+        if params.get("after"):
+            items = [i for i in items if i.get("date", "") > params["after"]]
+        if params.get("before"):
+            items = [i for i in items if i.get("date", "") < params["before"]]
+        items.sort(key=lambda i: i.get("date", ""), reverse=True)
+        return items
+
+    @staticmethod
+    def _project(item: Dict[str, Any], fields: Optional[str]) -> Dict[str, Any]:
+        if not fields:
+            return item
+        wanted = {f.split(".")[0] for f in fields.split(",")}
+        return {k: v for k, v in item.items() if k in wanted}
+
+    def _search(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
+        kind = params.get("type", "post")
+        subtypes = params.get("subtype", "any").split(",")
+        needle = params.get("search", "").lower()
+        results = []
+        sources = {"post": ["posts", "pages"], "term": ["categories", "tags"]}.get(kind, [])
+        for collection in sources:
+            subtype = {"posts": "post", "pages": "page", "categories": "category", "tags": "post_tag"}[collection]
+            if "any" not in subtypes and subtype not in subtypes:
+                continue
+            for item in self._filter(collection, {}):
+                title = item["title"]["rendered"] if "title" in item else item["name"]
+                if needle in title.lower():
+                    results.append({"id": item["id"], "title": title, "url": item["link"], "type": kind, "subtype": subtype})
+        return results
+
+    def dispatch(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, str],
+        body: Dict[str, Any],
+        files: Optional[Dict[str, Tuple[str, bytes]]] = None
+    ) -> Tuple[int, Any, Dict[str, str]]:
+        """Обрабатывает запрос к /wp-json/<path>; возвращает (статус, тело, заголовки)"""
+        parts = [p for p in path.strip("/").split("/") if p]
+        if parts[:2] == ["batch", "v1"] and method == "POST":
+            return 207, {"responses": [self._batch_item(r) for r in body.get("requests", [])]}, {}
+        if not parts:
+            return 200, {"name": "Mock WordPress", "description": "Local REST stand-in", "url": self.base_url,
+                         "home": self.base_url, "namespaces": ["wp/v2", "batch/v1"]}, {}
+        if parts[:2] != ["wp", "v2"]:
+            return 404, {"code": "rest_no_route", "message": "No route was found"}, {}
+        parts = parts[2:]
+        if not parts:
+            return 200, {"namespace": "wp/v2", "routes": {f"/wp/v2/{c}": {} for c in (*COLLECTIONS, "types")}}, {}
+
+        collection = parts[0]
+        if collection == "types" and method == "GET":
+            return 200, POST_TYPES, {}
+        if collection == "search":
+            return self._list(self._search(params), params)
+        if collection not in COLLECTIONS:
+            return 404, {"code": "rest_no_route", "message": "No route was found"}, {}
+
+        if len(parts) == 1:
+            if method == "GET":
+                return self._list(self._filter(collection, params), params)
+            if method == "POST":
+                if collection == "media":
+                    if not files:
+                        return 400, {"code": "rest_upload_no_data", "message": "No data supplied"}, {}
+                    file_name, content = next(iter(files.values()))
+                    return 201, self._create_media(file_name, content, body), {}
+                return 201, self._create(collection, body), {}
+            return 405, {"code": "rest_no_route", "message": "Method not allowed"}, {}
+
+        if collection == "users" and parts[1] == "me":
+            item = next(iter(self.items["users"].values()))
+        else:
+            try:
+                item = self.items[collection].get(int(parts[1]))
+            except ValueError:
+                item = None
+        if item is None:
+            return 404, {"code": "rest_post_invalid_id", "message": "Invalid ID."}, {}
+
+        if method == "GET":
+            return 200, self._project(item, params.get("_fields")), {}
+        if method in ("POST", "PUT", "PATCH"):
+            return 200, self._update(collection, item, body), {}
+        if method == "DELETE":
+            force = str(params.get("force", body.get("force", ""))).lower() in ("1", "true")
+            if force or collection in ("categories", "tags", "users", "media"):
+                del self.items[collection][item["id"]]
+                return 200, {"deleted": True, "previous": item}, {}
+            item["status"] = "trash"
+            return 200, item, {}
+        return 405, {"code": "rest_no_route", "message": "Method not allowed"}, {}
+
+    def _list(self, items: List[Dict[str, Any]], params: Dict[str, str]) -> Tuple[int, Any, Dict[str, str]]:
+        per_page = max(1, min(100, int(params.get("per_page", 10))))
+        page = max(1, int(params.get("page", 1)))
+        total_pages = max(1, math.ceil(len(items) / per_page))
+        if page > total_pages and items:
+            return 400, {"code": "rest_post_invalid_page_number", "message": "Invalid page number"}, {}
+        chunk = items[(page - 1) * per_page:page * per_page]
+        headers = {"X-WP-Total": str(len(items)), "X-WP-TotalPages": str(total_pages)}
+        return 200, [self._project(i, params.get("_fields")) for i in chunk], headers
+
+    def _batch_item(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        path = request.get("path", "")
+        route = path.strip("/").split("/")[2] if path.count("/") >= 3 else ""
+        if route not in BATCH_ROUTES:
+            return {"status": 400, "body": {"code": "rest_batch_not_allowed",
+                                            "message": "The requested route does not support batch requests."}}
+        body = request.get("body") or {}
+        params = {k: str(v) for k, v in body.items()} if request.get("method") == "DELETE" else {}
+        status, payload, headers = self.dispatch(request.get("method", "POST"), path, params, body)
+        return {"status": status, "body": payload, "headers": headers}
+
+
+def create_app(config: Optional[MockConfig] = None, base_url: str = "http://127.0.0.1:8081") -> FastAPI:
+    """Создает FastAPI приложение заглушки"""
+    config = config or MockConfig()
+    wordpress = MockWordPress(config, base_url=base_url)
+    app = FastAPI(title="Mock WordPress REST API")
+    app.state.wordpress = wordpress
+
+    async def simulate_latency() -> float:
+        delay = max(0.0, config.latency_ms + wordpress.random.uniform(-config.jitter_ms, config.jitter_ms))
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        return delay
+
+    @app.get("/files/{key}")
+    async def serve_file(key: str, request: Request) -> Response:
+        content = wordpress.files.get(key)
+        if content is None:
+            return JSONResponse({"code": "not_found"}, status_code=404)
+        etag = '"' + hashlib.md5(content).hexdigest() + '"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content, media_type="image/jpeg", headers={"ETag": etag})
+
+    @app.api_route("/wp-json/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
+    @app.api_route("/wp-json", methods=["GET"])
+    async def rest(request: Request, path: str = "") -> Response:
+        started = time.perf_counter()
+        wordpress.requests += 1
+        delay = await simulate_latency()
+        if config.error_rate and wordpress.random.random() < config.error_rate:
+            return JSONResponse({"code": "mock_error", "message": "Injected error"}, status_code=500)
+
+        params = dict(request.query_params)
+        body: Dict[str, Any] = {}
+        files: Dict[str, Tuple[str, bytes]] = {}
+        content_type = request.headers.get("content-type", "")
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            for key, value in form.multi_items():
+                if hasattr(value, "read"):
+                    files[key] = (value.filename, await value.read())
+                else:
+                    body[key] = value
+        elif request.method in ("POST", "PUT", "PATCH"):
+            raw = await request.body()
+            if raw:
+                try:
+                    body = json.loads(raw)
+                except ValueError:
+                    return JSONResponse({"code": "rest_invalid_json", "message": "Invalid JSON body"}, status_code=400)
+        if request.method == "DELETE" and not params and isinstance(body, dict):
+            params = {k: str(v) for k, v in body.items()}
+
+        status, payload, headers = wordpress.dispatch(request.method, path, params, body, files)
+        headers = dict(headers)
+        headers["Server-Timing"] = f"wp;dur={(time.perf_counter() - started) * 1000 - delay:.1f}, net;dur={delay:.1f}"
+        content = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        encoding = compression.negotiate(request.headers.get("accept-encoding")) if config.compress else None
+        if encoding and len(content) >= 1024:
+            content = compression.compress(content, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Vary"] = "Accept-Encoding"
+        wordpress.bytes_sent += len(content)
+        return Response(content, status_code=status, media_type="application/json", headers=headers)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Средняя задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Разброс задержки (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Доля ответов с ошибкой 500 (0..1)")
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-compress", action="store_true", help="Не сжимать ответы REST API")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        posts=args.posts,
+        seed=args.seed,
+        compress=not args.no_compress
+    )
+    app = create_app(config, base_url=f"http://{args.host}:{args.port}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Content-Encoding negotiation for the SSE server's /mcp endpoint.
+
+Responses are compressed with the best encoding the client accepts among
+zstd, br and gzip (zstd and br need the optional zstandard / brotli
+packages). Compressed request bodies are decoded with a cap on the
+decompressed size so a small body cannot expand without bound.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+import zlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:  # Optional: pip install brotli
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # Optional: pip install zstandard
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+
+class DecompressionError(Exception):
+    """
+    Raised for an unsupported, corrupt or oversized compressed body.
+    """
+
+
+def _gzip(data: bytes) -> bytes:
+    # Level 5 keeps most of the ratio of level 9 at a fraction of the CPU
+    return gzip.compress(data, compresslevel=5, mtime=0)
+
+
+_local = threading.local()
+
+
+def _zstd(data: bytes) -> bytes:
+    # A ZstdCompressor must not be used by two threads at once, and large
+    # responses are compressed on worker threads: keep one per thread
+    compressor = getattr(_local, "zstd", None)
+    if compressor is None:
+        compressor = _local.zstd = zstandard.ZstdCompressor(level=3)
+    return compressor.compress(data)
+
+
+_COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {}
+if zstandard is not None:
+    _COMPRESSORS["zstd"] = _zstd
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda data: brotli.compress(data, quality=5)
+_COMPRESSORS["gzip"] = _gzip
+
+# Server preference order when the client accepts several encodings equally
+PREFERRED_ENCODINGS: Tuple[str, ...] = tuple(_COMPRESSORS)
+
+# Value for Accept-Encoding on upstream requests
+ACCEPT_ENCODING: str = ", ".join(PREFERRED_ENCODINGS)
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+    return weights
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header, or None.
+    """
+    if not accept_encoding:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best: Optional[str] = None
+    best_quality = 0.0
+    for encoding in PREFERRED_ENCODINGS:
+        quality = weights.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """
+    Compress data with a negotiated encoding (blocking; CPU bound).
+    """
+    return _COMPRESSORS[encoding](data)
+
+
+def _decompress_zlib(data: bytes, wbits: int, limit: int) -> bytes:
+    decoder = zlib.decompressobj(wbits)
+    try:
+        output = decoder.decompress(data, limit + 1)
+    except zlib.error as e:
+        raise DecompressionError(f"Corrupt compressed body: {e}") from e
+    if len(output) > limit or decoder.unconsumed_tail:
+        raise DecompressionError("Decompressed body is too large")
+    if not decoder.eof:
+        raise DecompressionError("Truncated compressed body")
+    return output
+
+
+def _decompress_zstd(data: bytes, limit: int) -> bytes:
+    chunks: List[bytes] = []
+    size = 0
+    try:
+        reader = zstandard.ZstdDecompressor().stream_reader(data)
+        while True:
+            chunk = reader.read(65536)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > limit:
+                raise DecompressionError("Decompressed body is too large")
+            chunks.append(chunk)
+    except zstandard.ZstdError as e:
+        raise DecompressionError(f"Corrupt compressed body: {e}") from e
+    return b"".join(chunks)
+
+
+def _decompress_brotli(data: bytes, limit: int) -> bytes:
+    decoder = brotli.Decompressor()
+    try:
+        if not hasattr(decoder, "can_accept_more_data"):
+            # brotli < 1.2 cannot bound the output of a call
+            output = decoder.process(data)
+            if len(output) > limit:
+                raise DecompressionError("Decompressed body is too large")
+            return output
+        chunks: List[bytes] = []
+        size = 0
+        pending = data
+        while not decoder.is_finished():
+            chunk = decoder.process(pending, output_buffer_limit=65536)
+            pending = b""
+            if not chunk:
+                raise DecompressionError("Truncated compressed body")
+            size += len(chunk)
+            if size > limit:
+                raise DecompressionError("Decompressed body is too large")
+            chunks.append(chunk)
+    except brotli.error as e:
+        raise DecompressionError(f"Corrupt compressed body: {e}") from e
+    return b"".join(chunks)
+
+
+def decompress(data: bytes, encoding: Optional[str], limit: int) -> bytes:
+    """
+    Decode a request body per its Content-Encoding (blocking; CPU bound).
+    """
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        return data
+    if encoding in ("gzip", "x-gzip"):
+        return _decompress_zlib(data, 16 + zlib.MAX_WBITS, limit)
+    if encoding == "deflate":
+        return _decompress_zlib(data, zlib.MAX_WBITS, limit)
+    if encoding == "br" and brotli is not None:
+        return _decompress_brotli(data, limit)
+    if encoding == "zstd" and zstandard is not None:
+        return _decompress_zstd(data, limit)
+    raise DecompressionError(f"Unsupported Content-Encoding: {encoding}")
+
+
+__all__ = [
+    "ACCEPT_ENCODING",
+    "DecompressionError",
+    "PREFERRED_ENCODINGS",
+    "compress",
+    "decompress",
+    "negotiate",
+]
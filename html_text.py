@@ -0,0 +1,297 @@
+"""
+HTML to plain text / Markdown conversion for post and page content.
+
+WordPress returns content.rendered as full HTML with block comments, inline
+styles and scripts. The converter below streams the markup through the
+standard library HTMLParser, drops everything that is not prose and emits
+either plain text or light Markdown. Results can be truncated to a
+character or approximate token budget at a sentence boundary, and are
+cached by a caller-supplied key (post ID plus modified date), so an
+unchanged post is converted once.
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Dict, Hashable, List, Optional, Tuple
+
+CONTENT_FORMATS = ("html", "text", "markdown")
+
+# Rough size of a model token in characters, used for token budgets
+CHARS_PER_TOKEN = 4
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "iframe", "svg", "object", "canvas", "head"}
+_BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "dd", "details", "div", "dl", "dt", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main",
+    "nav", "ol", "p", "pre", "section", "summary", "table", "tbody", "thead", "tfoot", "tr", "ul",
+}
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+_INLINE_MARKS = {"strong": "**", "b": "**", "em": "_", "i": "_", "code": "`", "del": "~~", "s": "~~"}
+_WHITESPACE = re.compile(r"[ \t\r\n\f\v ]+")
+_ELLIPSIS = " …"
+_SENTENCE_END = re.compile(r"[.!?…](?:[\"'»”)\]]*)(?=\s)|\n\n")
+# Block comments, scripts and styles are removed before parsing; they are
+# often most of the markup and the parser is the slow part
+_NOISE = re.compile(r"<!--.*?-->|<(script|style|noscript|template)\b.*?</\1\s*>", re.S | re.I)
+
+# Block kinds whose consecutive blocks are separated by a single newline
+_TIGHT_KINDS = {"li", "row", "pre"}
+
+
+class _Converter(HTMLParser):
+    def __init__(self, markdown: bool) -> None:
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.blocks: List[Tuple[str, str, bool]] = []  # (text, kind, soft break before)
+        self.line: List[str] = []
+        self.skip_depth = 0
+        self.pre_depth = 0
+        self.list_stack: List[List[int]] = []  # [is_ordered, counter]
+        self.marker: Optional[str] = None
+        self.quote_depth = 0
+        self.links: List[Optional[str]] = []
+        self.heading = 0
+        self.in_row = False
+        self.cell_count = 0
+        self.soft_break = False
+
+    # -------------------------------------------------------------- output
+
+    def _emit(self, text: str, kind: str) -> None:
+        self.blocks.append((text, kind, self.soft_break))
+        self.soft_break = False
+
+    def _flush(self) -> None:
+        text = "".join(self.line)
+        self.line = []
+        if self.pre_depth:
+            text = text.strip("\n")
+            kind = "pre"
+        else:
+            text = _WHITESPACE.sub(" ", text).strip()
+            kind = "row" if self.in_row else "para"
+        if not text:
+            return
+        if self.marker is not None:
+            text = self.marker + text
+            self.marker = None
+            kind = "li"
+        if self.heading and self.markdown:
+            text = "#" * self.heading + " " + text
+        if self.quote_depth and self.markdown:
+            text = "\n".join("> " * self.quote_depth + line for line in text.split("\n"))
+        self._emit(text, kind)
+
+    def _write(self, text: str) -> None:
+        self.line.append(text)
+
+    # ------------------------------------------------------------- parsing
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]) -> None:
+        if tag in _SKIP_TAGS:
+            if tag not in _VOID_TAGS:
+                self.skip_depth += 1
+            return
+        if self.skip_depth:
+            return
+        attributes = dict(attrs)
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.heading = int(tag[1])
+        elif tag in ("ul", "ol"):
+            self.list_stack.append([tag == "ol", 0])
+        elif tag == "li":
+            indent = "  " * max(0, len(self.list_stack) - 1)
+            if self.list_stack and self.list_stack[-1][0]:
+                self.list_stack[-1][1] += 1
+                self.marker = f"{indent}{self.list_stack[-1][1]}. "
+            else:
+                self.marker = f"{indent}- "
+        elif tag == "blockquote":
+            self.quote_depth += 1
+        elif tag == "pre":
+            self.pre_depth += 1
+            if self.markdown:
+                self._emit("```", "pre")
+        elif tag == "br":
+            if self.pre_depth:
+                self._write("\n")
+            else:
+                self._flush()
+                self.soft_break = True
+        elif tag == "tr":
+            self.in_row = True
+            self.cell_count = 0
+        elif tag in ("td", "th"):
+            if self.cell_count:
+                self._write(" | ")
+            self.cell_count += 1
+        elif self.markdown:
+            if tag == "a":
+                href = attributes.get("href")
+                self.links.append(href if href and not href.startswith("#") else None)
+                if self.links[-1]:
+                    self._write("[")
+            elif tag == "img":
+                alt = (attributes.get("alt") or "").strip()
+                src = attributes.get("src")
+                if src:
+                    self._write(f"![{alt}]({src})")
+            elif tag in _INLINE_MARKS and not self.pre_depth:
+                self._write(_INLINE_MARKS[tag])
+        elif tag == "img":
+            alt = (attributes.get("alt") or "").strip()
+            if alt:
+                self._write(f"[{alt}]")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            if self.skip_depth:
+                self.skip_depth -= 1
+            return
+        if self.skip_depth:
+            return
+        if self.markdown:
+            if tag == "a" and self.links:
+                href = self.links.pop()
+                if href:
+                    self._write(f"]({href})")
+            elif tag in _INLINE_MARKS and not self.pre_depth:
+                self._write(_INLINE_MARKS[tag])
+        if tag in _BLOCK_TAGS:
+            self._flush()
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.heading = 0
+        elif tag in ("ul", "ol") and self.list_stack:
+            self.list_stack.pop()
+        elif tag == "blockquote" and self.quote_depth:
+            self.quote_depth -= 1
+        elif tag == "pre" and self.pre_depth:
+            self.pre_depth -= 1
+            if self.markdown:
+                self._emit("```", "pre")
+        elif tag == "tr":
+            self.in_row = False
+
+    def handle_data(self, data: str) -> None:
+        if not self.skip_depth:
+            self._write(data)
+
+    def result(self) -> str:
+        self.close()
+        self._flush()
+        parts: List[str] = []
+        previous_kind = None
+        for text, kind, soft in self.blocks:
+            if parts:
+                tight = soft or (kind == previous_kind and kind in _TIGHT_KINDS)
+                parts.append("\n" if tight else "\n\n")
+            parts.append(text)
+            previous_kind = kind
+        return "".join(parts)
+
+
+def html_to_text(html: str, content_format: str = "text") -> str:
+    """
+    Convert rendered HTML to "text" or "markdown"; "html" returns it unchanged.
+    """
+    if content_format == "html" or not html:
+        return html or ""
+    if content_format not in CONTENT_FORMATS:
+        raise ValueError(f"Unknown content_format: {content_format}; expected one of {', '.join(CONTENT_FORMATS)}")
+    converter = _Converter(markdown=content_format == "markdown")
+    converter.feed(_NOISE.sub("", html))
+    return converter.result()
+
+
+def truncate(text: str, max_chars: int) -> Tuple[str, bool]:
+    """
+    Cut text to at most max_chars, preferring the last sentence or paragraph
+    end, then the last word boundary. Returns (text, truncated).
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text, False
+    # Leave room for the marker so the result stays within max_chars
+    limit = max_chars - len(_ELLIPSIS)
+    if limit <= 0:
+        return text[:max_chars], True
+    window = text[:limit]
+    cut = 0
+    for match in _SENTENCE_END.finditer(window):
+        cut = match.end()
+    # A sentence boundary too early in the window would waste most of the budget
+    if cut < limit // 2:
+        space = window.rfind(" ")
+        cut = space if space > limit // 2 else limit
+    return window[:cut].rstrip() + _ELLIPSIS, True
+
+
+class _LRU:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self.lock:
+            value = self.data.get(key)
+            if value is not None:
+                self.data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: str) -> None:
+        with self.lock:
+            self.data[key] = value
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+
+_cache = _LRU(maxsize=2048)
+
+
+def render_content(
+    html: str,
+    content_format: str = "html",
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    cache_key: Optional[Hashable] = None,
+) -> Dict[str, object]:
+    """
+    Convert content for a tool response and apply the size budget.
+
+    cache_key should identify the content version, e.g. (site, "post", id,
+    modified). Budgets apply to text and markdown only, since cutting HTML
+    would leave unbalanced markup.
+    """
+    converted = None
+    key = (cache_key, content_format) if cache_key is not None else None
+    if key is not None and content_format != "html":
+        converted = _cache.get(key)
+    if converted is None:
+        converted = html_to_text(html, content_format)
+        if key is not None and content_format != "html":
+            _cache.set(key, converted)
+
+    budget = max_chars or 0
+    if max_tokens:
+        token_chars = max_tokens * CHARS_PER_TOKEN
+        budget = min(budget, token_chars) if budget else token_chars
+    truncated = False
+    content = converted
+    if budget and content_format != "html":
+        content, truncated = truncate(converted, budget)
+    return {
+        "format": content_format,
+        "rendered": content,
+        "length": len(converted),
+        "truncated": truncated,
+    }
+
+
+__all__ = ["CONTENT_FORMATS", "html_to_text", "render_content", "truncate"]
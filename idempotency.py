@@ -0,0 +1,162 @@
+"""
+Idempotency-key replay stores for create tools.
+
+A create call carrying an idempotency key runs at most once per key while
+its result is retained: a retry returns the stored result, and a retry that
+arrives while the original call is still running waits for it instead of
+issuing a second request to WordPress. IdempotencyStore serves blocking
+calls (stdio server), AsyncIdempotencyStore coroutines (SSE server).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+Result = Dict[str, Any]
+
+
+def fingerprint(arguments: Dict[str, Any]) -> str:
+    """
+    Stable hash of tool arguments, used to reject key reuse with other arguments.
+    """
+    encoded = json.dumps(arguments, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class IdempotencyConflict(ValueError):
+    """
+    Raised when a key is reused with different arguments.
+    """
+
+
+class _Results:
+    """
+    TTL and LRU bounded map of key -> (expires at, fingerprint, result);
+    callers serialize access.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.data: "OrderedDict[Hashable, Tuple[float, str, Result]]" = OrderedDict()
+
+    def lookup(self, key: Hashable, digest: str) -> Optional[Result]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.data[key]
+            return None
+        if entry[1] != digest:
+            raise IdempotencyConflict("Idempotency key was already used with different arguments")
+        return entry[2]
+
+    def store(self, key: Hashable, digest: str, result: Result) -> None:
+        # Only successful results are kept, so a failed create can be retried with the same key
+        if result.get("success", True) is False:
+            return
+        self.data[key] = (time.monotonic() + self.ttl, digest, result)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+class IdempotencyStore:
+    """
+    TTL store of successful create results plus in-flight call tracking (thread-safe).
+    """
+
+    def __init__(self, ttl: float = 86400.0, maxsize: int = 4096) -> None:
+        self._results = _Results(ttl, maxsize)
+        self._inflight: Dict[Hashable, Tuple[str, threading.Event]] = {}
+        self._lock = threading.Lock()
+        self.replays = 0
+
+    def run(self, key: Hashable, arguments: Dict[str, Any], call: Callable[[], Result]) -> Tuple[Result, bool]:
+        """
+        Run call once for key; returns (result, replayed).
+        """
+        digest = fingerprint(arguments)
+        while True:
+            with self._lock:
+                stored = self._results.lookup(key, digest)
+                if stored is not None:
+                    self.replays += 1
+                    return stored, True
+                pending = self._inflight.get(key)
+                if pending is None:
+                    event = threading.Event()
+                    self._inflight[key] = (digest, event)
+                    break
+                if pending[0] != digest:
+                    raise IdempotencyConflict("Idempotency key is in use by a call with different arguments")
+            pending[1].wait()
+        try:
+            result = call()
+            with self._lock:
+                self._results.store(key, digest, result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._results.data)
+
+
+class AsyncIdempotencyStore:
+    """
+    Coroutine counterpart of IdempotencyStore (one event loop).
+    """
+
+    def __init__(self, ttl: float = 86400.0, maxsize: int = 4096) -> None:
+        self._results = _Results(ttl, maxsize)
+        self._inflight: Dict[Hashable, Tuple[str, asyncio.Future]] = {}
+        self.replays = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        arguments: Dict[str, Any],
+        call: Callable[[], Awaitable[Result]],
+    ) -> Tuple[Result, bool]:
+        """
+        Run call once for key; returns (result, replayed).
+        """
+        digest = fingerprint(arguments)
+        while True:
+            stored = self._results.lookup(key, digest)
+            if stored is not None:
+                self.replays += 1
+                return stored, True
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            if pending[0] != digest:
+                raise IdempotencyConflict("Idempotency key is in use by a call with different arguments")
+            # Shield so a cancelled retry does not cancel the shared future
+            await asyncio.shield(pending[1])
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = (digest, future)
+        try:
+            result = await call()
+            self._results.store(key, digest, result)
+            return result, False
+        finally:
+            del self._inflight[key]
+            future.set_result(None)
+
+    def __len__(self) -> int:
+        return len(self._results.data)
+
+
+__all__ = ["AsyncIdempotencyStore", "IdempotencyConflict", "IdempotencyStore", "fingerprint"]
@@ -0,0 +1,91 @@
+"""
+Оптимизация изображений перед загрузкой в WordPress
+Ограничивает размеры, удаляет метаданные и перекодирует в WebP/AVIF/JPEG.
+Функции выполняются в отдельных процессах, поэтому должны быть сериализуемыми.
+Требует Pillow (необязательная зависимость).
+"""
+
+import io
+import os
+from typing import Optional, Tuple, Union
+
+# Форматы Pillow и расширения файлов для поддерживаемых целевых форматов
+OUTPUT_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "avif": ("AVIF", ".avif"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+
+# Векторные форматы: растеризация потеряла бы масштабируемость
+VECTOR_EXTENSIONS = {".svg", ".svgz", ".eps", ".ai", ".pdf", ".wmf", ".emf"}
+VECTOR_FORMATS = {"EPS", "PDF", "WMF"}
+
+
+def is_available() -> bool:
+    """Проверяет, установлен ли Pillow"""
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _is_vector(content: bytes, file_name: str) -> bool:
+    if os.path.splitext(file_name)[1].lower() in VECTOR_EXTENSIONS:
+        return True
+    head = content[:256].lstrip().lower()
+    return head.startswith(b"<svg") or (head.startswith(b"<?xml") and b"<svg" in content[:1024].lower())
+
+
+def optimize_image(
+    content: bytes,
+    file_name: str,
+    max_dimension: int = 2560,
+    output_format: str = "webp",
+    quality: int = 82
+) -> Union[Tuple[bytes, str], str]:
+    """
+    Перекодирует изображение; возвращает (байты, имя файла) или строку с причиной,
+    по которой файл оставлен как есть
+    """
+    from PIL import Image, ImageOps
+
+    pil_format, extension = OUTPUT_FORMATS[output_format]
+    # Анимацию и векторные форматы оставляем как есть
+    if _is_vector(content, file_name):
+        return "векторный формат"
+    try:
+        image = Image.open(io.BytesIO(content))
+        if image.format in VECTOR_FORMATS:
+            return "векторный формат"
+        image.load()
+    except Exception:
+        return "файл не является изображением"
+
+    if getattr(image, "is_animated", False):
+        return "анимированное изображение"
+
+    # Применяем поворот из EXIF до удаления метаданных
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) > max_dimension:
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+    if pil_format == "JPEG":
+        if has_alpha:
+            return "JPEG не поддерживает прозрачность"
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    output = io.BytesIO()
+    try:
+        # Метаданные (EXIF, ICC, XMP) не передаются, поэтому не попадают в результат
+        image.save(output, format=pil_format, quality=quality, optimize=True)
+    except (KeyError, OSError, ValueError) as e:
+        return f"не удалось перекодировать: {e}"
+
+    optimized = output.getvalue()
+    if len(optimized) >= len(content):
+        return "оптимизация не уменьшила размер"
+    return optimized, os.path.splitext(file_name)[0] + extension
@@ -0,0 +1,296 @@
+"""
+Долговременная очередь фоновых заданий записи в WordPress
+Задания хранятся в SQLite и выполняются пулом рабочих потоков. Журнал может
+быть общим для нескольких процессов (по серверу на сессию клиента): задание
+захватывается атомарно, и процесс продлевает аренду выполняемых заданий.
+Задания, аренда которых истекла (процесс остановился), продолжаются:
+они возвращаются в очередь, а пакетные задания продолжают с последней
+сохраненной контрольной точки. Задания, повтор которых может создать
+дубликат (создание поста, загрузка файла), не повторяются и не продолжаются:
+если они прервались или упали, результат неизвестен и задание завершается
+с ошибкой.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Состояния задания
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Пауза перед повтором упавшего задания: RETRY_DELAY * 2 ** (попытка - 1) секунд
+RETRY_DELAY = 5.0
+
+# Срок аренды выполняемого задания; продлевается каждую треть срока
+LEASE_SECONDS = 60.0
+
+INTERRUPTED_ERROR = (
+    "Результат неизвестен: процесс остановился во время выполнения. Задание не повторяется, "
+    "чтобы не создать дубликат; проверьте, была ли запись выполнена"
+)
+
+
+class JobContext:
+    """Контекст выполнения задания: контрольная точка и прогресс"""
+
+    def __init__(self, queue: "JobQueue", job_id: str, checkpoint: Dict[str, Any]):
+        self._queue = queue
+        self.job_id = job_id
+        self.checkpoint = checkpoint
+
+    def save(self, checkpoint: Dict[str, Any], done: int, total: int) -> None:
+        """Сохраняет контрольную точку и прогресс (done из total)"""
+        self.checkpoint = checkpoint
+        self._queue._save_progress(self.job_id, checkpoint, done, total)
+
+
+Handler = Callable[[Dict[str, Any], JobContext], Any]
+
+
+class JobQueue:
+    """
+    Очередь заданий в SQLite с пулом рабочих потоков (потокобезопасная)
+    once - типы заданий, которые выполняются не более одного раза
+    """
+
+    def __init__(
+        self,
+        path: str,
+        handlers: Dict[str, Handler],
+        workers: int = 2,
+        max_attempts: int = 3,
+        once: Iterable[str] = ()
+    ):
+        self.path = path
+        self.handlers = handlers
+        self.once = set(once)
+        self.workers = max(1, workers)
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._stopped = threading.Event()
+        # Владелец аренды: этот экземпляр очереди
+        self.owner = uuid.uuid4().hex
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, kind TEXT NOT NULL, payload TEXT NOT NULL,"
+                " status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " done INTEGER NOT NULL DEFAULT 0, total INTEGER NOT NULL DEFAULT 0,"
+                " checkpoint TEXT, result TEXT, error TEXT,"
+                " created REAL NOT NULL, updated REAL NOT NULL, available_at REAL NOT NULL,"
+                " owner TEXT, lease_until REAL)"
+            )
+            # Журналы, созданные до появления аренды
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("lease_until", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+            self._recover()
+
+    def _recover(self) -> None:
+        """
+        Возвращает задания с истекшей арендой: их процесс остановился.
+        Задания, которые нельзя повторять, завершаются с ошибкой, остальные
+        выполняются заново с контрольной точки. Вызывается под self._lock
+        в транзакции
+        """
+        now = time.time()
+        expired = "status = ? AND (lease_until IS NULL OR lease_until < ?)"
+        if self.once:
+            self._conn.execute(
+                f"UPDATE jobs SET status = ?, error = ?, owner = NULL, updated = ?"
+                f" WHERE {expired} AND kind IN ({', '.join('?' * len(self.once))})",
+                (FAILED, INTERRUPTED_ERROR, now, RUNNING, now, *sorted(self.once))
+            )
+        self._conn.execute(
+            f"UPDATE jobs SET status = ?, owner = NULL, updated = ?, available_at = ? WHERE {expired}",
+            (QUEUED, now, now, RUNNING, now)
+        )
+
+    def start(self) -> None:
+        """Запускает рабочие потоки (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self._threads:
+                return
+            for number in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"wp-job-{number}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            thread = threading.Thread(target=self._renew_leases, name="wp-job-lease", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, kind: str, payload: Dict[str, Any], total: int = 1) -> str:
+        """Ставит задание в очередь и возвращает его ID"""
+        if kind not in self.handlers:
+            raise ValueError(f"Неизвестный тип задания: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO jobs (id, kind, payload, status, total, created, updated, available_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, kind, json.dumps(payload, ensure_ascii=False), QUEUED, total, now, now, now)
+                )
+            self._wakeup.notify()
+        self.start()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Возвращает состояние задания"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, attempts, done, total, result, error, created, updated"
+                " FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list(self, status: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Последние задания, при необходимости с фильтром по состоянию"""
+        query = "SELECT id, kind, status, attempts, done, total, result, error, created, updated FROM jobs"
+        params: tuple = ()
+        if status:
+            query += " WHERE status = ?"
+            params = (status,)
+        query += " ORDER BY created DESC LIMIT ?"
+        with self._lock:
+            rows = self._conn.execute(query, params + (limit,)).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def pending(self) -> int:
+        """Количество незавершенных заданий"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING)
+            ).fetchone()
+        return row[0]
+
+    def close(self) -> None:
+        """Останавливает рабочие потоки и закрывает базу"""
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify_all()
+        self._stopped.set()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _row_to_dict(row: tuple) -> Dict[str, Any]:
+        job_id, kind, status, attempts, done, total, result, error, created, updated = row
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "attempts": attempts,
+            "progress": {"done": done, "total": total},
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created": created,
+            "updated": updated
+        }
+
+    def _claim(self) -> Optional[tuple]:
+        """Берет следующее готовое задание; вызывается под self._lock"""
+        with self._conn:
+            self._recover()
+        while True:
+            now = time.time()
+            row = self._conn.execute(
+                "SELECT id, kind, payload, attempts, checkpoint FROM jobs"
+                " WHERE status = ? AND available_at <= ? ORDER BY created LIMIT 1",
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                return None
+            # Другой процесс мог захватить задание между SELECT и UPDATE
+            with self._conn:
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = attempts + 1, updated = ?"
+                    " WHERE id = ? AND status = ?",
+                    (RUNNING, self.owner, now + LEASE_SECONDS, now, row[0], QUEUED)
+                ).rowcount
+            if claimed:
+                return row
+
+    def _renew_leases(self) -> None:
+        """Продлевает аренду заданий, которые выполняет этот процесс"""
+        while not self._stopped.wait(LEASE_SECONDS / 3):
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                    (time.time() + LEASE_SECONDS, self.owner, RUNNING)
+                )
+
+    def _next_wait(self) -> float:
+        """Сколько ждать до следующего отложенного задания; вызывается под self._lock"""
+        row = self._conn.execute(
+            "SELECT MIN(available_at) FROM jobs WHERE status = ?", (QUEUED,)
+        ).fetchone()
+        if row[0] is None:
+            return 60.0
+        return min(60.0, max(0.05, row[0] - time.time()))
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                while not self._stopping:
+                    claimed = self._claim()
+                    if claimed:
+                        break
+                    self._wakeup.wait(self._next_wait())
+                if self._stopping:
+                    return
+            self._run(*claimed)
+
+    def _run(self, job_id: str, kind: str, payload: str, attempts: int, checkpoint: Optional[str]) -> None:
+        context = JobContext(self, job_id, json.loads(checkpoint) if checkpoint else {})
+        try:
+            result = self.handlers[kind](json.loads(payload), context)
+        except Exception as e:
+            attempt = attempts + 1
+            now = time.time()
+            error = str(e)
+            if kind in self.once:
+                # Запрос мог дойти до WordPress (например, при таймауте)
+                error = f"Результат неизвестен, задание не повторяется: {error}"
+            with self._lock, self._conn:
+                if attempt < self.max_attempts and kind not in self.once:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, owner = NULL, updated = ?, available_at = ?"
+                        " WHERE id = ? AND owner = ?",
+                        (QUEUED, error, now, now + RETRY_DELAY * 2 ** (attempt - 1), job_id, self.owner)
+                    )
+                else:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, owner = NULL, updated = ? WHERE id = ? AND owner = ?",
+                        (FAILED, error, now, job_id, self.owner)
+                    )
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, done = total, result = ?, error = NULL, owner = NULL, updated = ?"
+                " WHERE id = ? AND owner = ?",
+                (DONE, json.dumps(result, ensure_ascii=False, default=str), time.time(), job_id, self.owner)
+            )
+
+    def _save_progress(self, job_id: str, checkpoint: Dict[str, Any], done: int, total: int) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET checkpoint = ?, done = ?, total = ?, updated = ? WHERE id = ? AND owner = ?",
+                (json.dumps(checkpoint, ensure_ascii=False, default=str), done, total, time.time(), job_id, self.owner)
+            )
@@ -0,0 +1,138 @@
+"""
+Incremental parsing of JSON array responses.
+
+List endpoints return a JSON array; parsing it with response.json() needs
+the whole body in memory next to the parsed tree. The parser below is fed
+body chunks as they arrive and yields each array element as soon as it is
+complete, so callers can project the fields they need and drop the rest
+while the download continues. Elements are decoded by the standard library
+C scanner (JSONDecoder.raw_decode); a failed attempt on an element that is
+still arriving is retried only after the buffer has doubled, which keeps
+the work linear in the body size.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_DELIMITERS = ",] \t\n\r"
+_decoder = json.JSONDecoder()
+
+_START, _VALUE, _SEPARATOR, _DONE = range(4)
+
+# Largest piece of a chunk decoded and parsed at once
+PIECE_SIZE = 64 * 1024
+
+
+class ArrayParser:
+    """
+    Push parser for one top-level JSON array.
+
+    feed() returns the elements completed by a chunk; close() returns the
+    rest and raises ValueError if the body was not a complete array.
+    """
+
+    def __init__(self) -> None:
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _START
+        # Buffered characters needed before the next decode attempt
+        self._wait_for = 0
+        self.count = 0
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        # A decompressed chunk can hold the whole body; taking it in slices
+        # keeps the text buffer small
+        items: List[Any] = []
+        view = memoryview(chunk)
+        for start in range(0, len(view), PIECE_SIZE):
+            self._buffer += self._text.decode(view[start:start + PIECE_SIZE])
+            items.extend(self._parse(final=False))
+        return items
+
+    def close(self) -> List[Any]:
+        self._buffer += self._text.decode(b"", final=True)
+        items = self._parse(final=True)
+        if self._state != _DONE:
+            raise ValueError("Truncated JSON array")
+        return items
+
+    def _parse(self, final: bool) -> List[Any]:
+        items: List[Any] = []
+        buffer = self._buffer
+        position = 0
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            char = buffer[position]
+            if self._state == _DONE:
+                raise ValueError("Unexpected data after the JSON array")
+            if self._state == _START:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._state = _VALUE
+                position += 1
+                continue
+            if self._state == _SEPARATOR:
+                if char == "]":
+                    self._state = _DONE
+                elif char == ",":
+                    self._state = _VALUE
+                else:
+                    raise ValueError(f"Expected ',' or ']' at offset {position}")
+                position += 1
+                continue
+            # _VALUE
+            if char == "]" and not self.count:
+                self._state = _DONE
+                position += 1
+                continue
+            if not final and len(buffer) - position < self._wait_for:
+                break
+            try:
+                item, end = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if final:
+                    raise
+                self._wait_for = 2 * (len(buffer) - position)
+                break
+            if not final and not isinstance(item, (dict, list, str)) and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                # A number cut by the chunk boundary ("12" of "12.5") parses as a shorter one
+                break
+            self._wait_for = 0
+            items.append(item)
+            self.count += 1
+            self._state = _SEPARATOR
+            position = end
+        self._buffer = buffer[position:]
+        return items
+
+
+def iter_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array body given as byte chunks.
+    """
+    parser = ArrayParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
+
+
+async def aiter_array(chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+    """
+    Async counterpart of iter_array.
+    """
+    parser = ArrayParser()
+    async for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
+
+
+__all__ = ["ArrayParser", "aiter_array", "iter_array"]
@@ -13,17 +13,33 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import os
+import time
 from contextlib import asynccontextmanager
-from typing import Any, AsyncGenerator, Dict, List, Optional
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Tuple, Union
 
 import httpx
 import uvicorn
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from mcp.server import Server
 from mcp.types import TextContent, Tool
 from sse_starlette.sse import EventSourceResponse
 
+import compression
+import html_text
+import read_routing
+import tracing
+from idempotency import AsyncIdempotencyStore, IdempotencyConflict
+from json_stream import aiter_array
+from records import Post, to_json
+from scheduler import BULK, INTERACTIVE, RequestScheduler, SchedulerBusy, busy_error, session_key
+from sites import AsyncBudgetTransport, SiteConfig, SiteRegistry, UnknownSite, load_site_configs
+from stale_cache import AsyncStaleCache
+from warmup import AccessTracker, AsyncWarmer, load_warmup_plan
+from webhooks import DuplicateDelivery, WebhookError, WebhookVerifier, event_site
+
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -33,6 +49,103 @@ WORDPRESS_URL: str = "https://your-wordpress-site.com/"
 WORDPRESS_USERNAME: str = "your-username"
 WORDPRESS_PASSWORD: str = "your-password"
 
+# Upstream connection pool and keep-warm probing
+WORDPRESS_POOL_SIZE: int = 20
+WORDPRESS_PREWARM_CONNECTIONS: int = 4
+WORDPRESS_PROBE_INTERVAL: float = 30.0
+
+# Additional sites selected with the "site" tool argument: a mapping of
+# name -> {url, username, app_password or app_password_env, concurrency},
+# inline JSON or a JSON file path. The site above is registered as
+# DEFAULT_SITE. Other sites connect on first use and are closed after
+# SITE_IDLE_TTL idle seconds or when more than MAX_ACTIVE_SITES are live;
+# UPSTREAM_MAX_CONNECTIONS caps concurrent upstream requests across sites.
+WORDPRESS_SITES: Union[str, Dict[str, Dict[str, Any]], None] = None
+DEFAULT_SITE: str = "default"
+MAX_ACTIVE_SITES: int = 16
+SITE_IDLE_TTL: float = 900.0
+UPSTREAM_MAX_CONNECTIONS: int = 64
+
+# Extra origins or read replicas of the primary site (per-site "read_urls"
+# in WORDPRESS_SITES). Reads are balanced by latency and health; writes go
+# to the primary, and a session that wrote reads from the primary for
+# READ_STICKY_SECONDS afterwards.
+WORDPRESS_READ_URLS: List[str] = []
+READ_STICKY_SECONDS: float = 10.0
+
+# Stale serving for STALE_TOOLS, keyed by tool and arguments per site (off
+# by default): a result younger than STALE_WHILE_REVALIDATE seconds is
+# answered at once and refreshed in the background; when the upstream fails
+# or does not answer within STALE_DEADLINE seconds (0: the request timeout),
+# a result up to STALE_IF_ERROR seconds old is served instead. Such answers
+# carry "stale": true.
+STALE_TOOLS = {"get_posts"}
+STALE_WHILE_REVALIDATE: float = 0.0
+STALE_IF_ERROR: float = 0.0
+STALE_DEADLINE: float = 0.0
+STALE_CACHE_SIZE: int = 256
+
+# Warming of STALE_TOOLS results at startup and every WARMUP_INTERVAL seconds
+# (0: startup only): the WARMUP_PLAN calls ({"tool", "args", "site"}) plus the
+# WARMUP_HOT_KEYS most used calls, whose access counts are kept in
+# WARMUP_STATE_PATH across restarts. Warmed results are answered at once (and
+# refreshed in the background) until the next warming, whatever
+# STALE_WHILE_REVALIDATE is.
+WARMUP_PLAN: List[Dict[str, Any]] = [{"tool": "get_posts", "args": {}}]
+WARMUP_INTERVAL: float = 300.0
+WARMUP_HOT_KEYS: int = 20
+WARMUP_CONCURRENCY: int = 4
+WARMUP_STATE_PATH: Optional[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".warmup_sse.json")
+
+# Change notifications from WordPress at /webhooks/wordpress (see webhooks.py):
+# disabled unless WEBHOOK_SECRET is set. Requests signed more than
+# WEBHOOK_TOLERANCE seconds ago are rejected. Cached results of the tools an
+# event affects are dropped and, with WEBHOOK_REFRESH, loaded again at once.
+WEBHOOK_SECRET: Optional[str] = None
+WEBHOOK_TOLERANCE: float = 300.0
+WEBHOOK_REFRESH: bool = True
+WEBHOOK_TOOLS: Dict[str, Set[str]] = {
+    "post.saved": {"get_posts"},
+    "post.deleted": {"get_posts"},
+    # Assigned terms are part of post results
+    "term.changed": {"get_posts"},
+    # No cached tool includes comments yet
+    "comment.status": set(),
+}
+
+# Request tracing: number of recent traces kept for /debug/traces and an
+# optional file receiving OTLP/JSON lines (e.g. for a local OTel collector)
+TRACE_BUFFER_SIZE: int = 256
+TRACE_EXPORT_PATH: Optional[str] = None
+
+# Admission control for tools/call: total concurrent calls, queue bounds
+# (overall and per session) and per-tool concurrency caps. Reads with a
+# page size above SCHEDULER_BULK_PER_PAGE are scheduled as bulk work.
+SCHEDULER_MAX_CONCURRENCY: int = 16
+SCHEDULER_MAX_QUEUE: int = 256
+SCHEDULER_MAX_SESSION_QUEUE: int = 32
+SCHEDULER_TOOL_CONCURRENCY: Dict[str, int] = {
+    "get_posts": 12,
+    "create_post": 4,
+    "update_post": 4,
+    "delete_post": 2,
+}
+SCHEDULER_INTERACTIVE_TOOLS = {"get_posts"}
+SCHEDULER_BULK_PER_PAGE: int = 50
+
+# Create tools accepting an idempotency key (argument "idempotency_key" or
+# the Idempotency-Key header) and how long their results are replayed
+IDEMPOTENT_TOOLS = {"create_post"}
+IDEMPOTENCY_TTL: float = 86400.0
+
+# /mcp compression: responses at least RESPONSE_COMPRESSION_MIN_SIZE bytes are
+# compressed when the client accepts it, on a worker thread from
+# RESPONSE_COMPRESSION_OFFLOAD_SIZE bytes; compressed request bodies may
+# expand to at most REQUEST_MAX_BODY_SIZE bytes
+RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+RESPONSE_COMPRESSION_OFFLOAD_SIZE: int = 64 * 1024
+REQUEST_MAX_BODY_SIZE: int = 16 * 1024 * 1024
+
 
 # ---------------------------------------------------------------------------
 # Logging configuration
@@ -55,17 +168,126 @@ class WordPressMCP:
     Async client wrapper around the WordPress REST API.
     """
 
-    def __init__(self, base_url: str, username: str, password: str) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        username: str,
+        password: str,
+        name: str = DEFAULT_SITE,
+        concurrency: int = WORDPRESS_POOL_SIZE,
+        shared_budget: Optional[asyncio.Semaphore] = None,
+        read_urls: Optional[List[str]] = None,
+    ) -> None:
+        self.name = name
         self.base_url = base_url.rstrip("/") + "/"
         self.username = username
         self.password = password
+        self.concurrency = concurrency
+        # Requests hold a slot of this site and of the budget shared by all sites
+        self.transport = AsyncBudgetTransport(
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=concurrency,
+                    max_keepalive_connections=concurrency,
+                    keepalive_expiry=WORDPRESS_PROBE_INTERVAL * 3,
+                ),
+            ),
+            concurrency,
+            shared_budget,
+        )
+        self.router: Optional[read_routing.ReadRouter] = None
+        transport: httpx.AsyncBaseTransport = self.transport
+        if read_urls:
+            self.router = read_routing.ReadRouter(base_url, read_urls, sticky_seconds=READ_STICKY_SECONDS)
+            transport = read_routing.AsyncRoutingTransport(self.transport, self.router)
         self.client = httpx.AsyncClient(
             base_url=self.base_url,
             auth=(self.username, self.password),
+            headers={"Accept-Encoding": compression.ACCEPT_ENCODING},
             timeout=httpx.Timeout(30.0),
+            transport=transport,
+        )
+        tracing.instrument_client(self.client)
+        self.stale = AsyncStaleCache(
+            revalidate=STALE_WHILE_REVALIDATE,
+            stale_if_error=STALE_IF_ERROR,
+            deadline=STALE_DEADLINE or None,
+            maxsize=STALE_CACHE_SIZE,
         )
+        self.client.event_hooks["request"].append(self._on_request)
+        # Result of the most recent upstream probe, served by /health/deep
+        self.probe_state: Dict[str, Any] = {
+            "last_ok_at": None,
+            "last_latency_ms": None,
+            "last_error": None,
+            "last_error_at": None,
+            "probes": 0,
+        }
         logger.info("Initialized WordPressMCP with base_url=%s", self.base_url)
 
+    async def _on_request(self, request: httpx.Request) -> None:
+        # A write makes earlier results unfit for stale-while-revalidate
+        if request.method not in ("GET", "HEAD"):
+            self.stale.bump()
+
+    async def probe(self) -> bool:
+        """
+        Issue a lightweight authenticated request and record its latency.
+        """
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(
+                "wp-json/wp/v2/posts",
+                params={"per_page": 1, "_fields": "id"},
+            )
+            response.raise_for_status()
+        except Exception as e:
+            self.probe_state["last_error"] = str(e) or type(e).__name__
+            self.probe_state["last_error_at"] = time.time()
+            logger.warning("Upstream probe failed: %s", self.probe_state["last_error"])
+            return False
+        finally:
+            self.probe_state["probes"] += 1
+        self.probe_state["last_latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self.probe_state["last_ok_at"] = time.time()
+        return True
+
+    async def prewarm(self, connections: int = WORDPRESS_PREWARM_CONNECTIONS) -> None:
+        """
+        Open several pooled connections up front (DNS, TCP and TLS) with
+        concurrent probes, so the first tool calls reuse warm connections.
+        """
+        logger.info("Pre-warming %s upstream connections", connections)
+        await asyncio.gather(*(self.probe() for _ in range(max(1, connections))))
+
+    async def keep_warm(self, interval: float = WORDPRESS_PROBE_INTERVAL) -> None:
+        """
+        Pre-warm the pool, then periodically probe the upstream to keep
+        pooled connections alive and the cached health information fresh.
+        """
+        await self.prewarm()
+        while True:
+            await asyncio.sleep(interval)
+            await self.probe()
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Report connection pool occupancy (best effort; relies on httpcore).
+        """
+        pool = getattr(self.transport.transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        requests = list(getattr(pool, "_requests", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+        return {
+            "max_connections": self.concurrency,
+            "in_flight": self.transport.in_flight,
+            "open": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "queued": sum(1 for r in requests if getattr(r, "connection", None) is None),
+        }
+
+    @tracing.traced("wordpress.create_post")
     async def create_post(
         self,
         title: str,
@@ -130,6 +352,7 @@ class WordPressMCP:
                 "error": str(e),
             }
 
+    @tracing.traced("wordpress.update_post")
     async def update_post(
         self,
         post_id: int,
@@ -204,21 +427,32 @@ class WordPressMCP:
                 "error": str(e),
             }
 
+    @tracing.traced("wordpress.get_posts")
     async def get_posts(
         self,
         per_page: int = 10,
         page: int = 1,
+        content_format: str = "html",
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
     ) -> Dict[str, Any]:
         """
         Get a list of WordPress posts.
+
+        With content_format "text" or "markdown" each post's content.rendered
+        is converted (and optionally truncated) on a worker thread.
         """
         url = "wp-json/wp/v2/posts"
         params: Dict[str, Any] = {"per_page": per_page, "page": page}
         logger.info("Fetching WordPress posts per_page=%s page=%s", per_page, page)
         try:
-            response = await self.client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            # Parse the array while it arrives instead of buffering the whole body
+            async with self.client.stream("GET", url, params=params) as response:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                # Posts are held as compact records (they stay in the stale cache)
+                data = [Post.from_rest(post) async for post in aiter_array(response.aiter_bytes())]
             total_header = response.headers.get("X-WP-Total")
             try:
                 total_count: Optional[int] = int(total_header) if total_header is not None else None
@@ -229,6 +463,9 @@ class WordPressMCP:
                 len(data) if isinstance(data, list) else "unknown",
                 total_count,
             )
+            if isinstance(data, list) and (content_format != "html" or max_chars or max_tokens):
+                with tracing.span("convert_content", format=content_format):
+                    await asyncio.to_thread(self._render_contents, data, content_format, max_chars, max_tokens)
             return {
                 "success": True,
                 "posts": data,
@@ -248,6 +485,7 @@ class WordPressMCP:
                 "count": 0,
                 "total": None,
                 "message": f"HTTP error fetching posts: {e.response.status_code}",
+                "status_code": e.response.status_code,
                 "error": e.response.text,
             }
         except httpx.RequestError as e:
@@ -271,6 +509,30 @@ class WordPressMCP:
                 "error": str(e),
             }
 
+    def _render_contents(
+        self,
+        posts: List[Post],
+        content_format: str,
+        max_chars: Optional[int],
+        max_tokens: Optional[int],
+    ) -> None:
+        """
+        Replace content in place with the converted form (blocking; CPU bound).
+        """
+        for post in posts:
+            content = post.get("content")
+            if not isinstance(content, dict):
+                continue
+            cache_key = (self.base_url, "post", post.id, post.modified)
+            post.content = html_text.render_content(
+                content.get("rendered") or "",
+                content_format,
+                max_chars=max_chars,
+                max_tokens=max_tokens,
+                cache_key=cache_key,
+            )
+
+    @tracing.traced("wordpress.delete_post")
     async def delete_post(self, post_id: int) -> Dict[str, Any]:
         """
         Delete a WordPress post.
@@ -318,11 +580,19 @@ class WordPressMCP:
                 "error": str(e),
             }
 
+    def retire(self) -> None:
+        """
+        Close pooled connections of a site evicted from the registry once
+        its in-flight requests finish.
+        """
+        logger.info("Retiring idle site %s", self.name)
+        self.transport.retire()
+
     async def close(self) -> None:
         """
         Close the underlying HTTP client.
         """
-        logger.info("Closing WordPressMCP HTTP client")
+        logger.info("Closing WordPressMCP HTTP client for site %s", self.name)
         await self.client.aclose()
 
 
@@ -363,6 +633,10 @@ async def list_tools_handler() -> List[Tool]:
                         "enum": ["publish", "draft", "private"],
                         "default": "publish",
                     },
+                    "idempotency_key": {
+                        "type": "string",
+                        "description": "Client-chosen key; a retry with the same key returns the original result instead of creating a duplicate",
+                    },
                 },
                 "required": ["title", "content"],
             },
@@ -412,6 +686,22 @@ async def list_tools_handler() -> List[Tool]:
                         "default": 1,
                         "description": "Page number to fetch",
                     },
+                    "content_format": {
+                        "type": "string",
+                        "enum": list(html_text.CONTENT_FORMATS),
+                        "default": "html",
+                        "description": "Return content as raw HTML, plain text or Markdown",
+                    },
+                    "max_chars": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Truncate text/markdown content to this many characters at a sentence boundary",
+                    },
+                    "max_tokens": {
+                        "type": "integer",
+                        "minimum": 1,
+                        "description": "Truncate text/markdown content to roughly this many tokens",
+                    },
                 },
                 "required": [],
             },
@@ -431,6 +721,12 @@ async def list_tools_handler() -> List[Tool]:
             },
         ),
     ]
+    # Every tool can target a configured site other than the default one
+    for tool in tools:
+        tool.inputSchema["properties"]["site"] = {
+            "type": "string",
+            "description": "Name of a configured site (defaults to the primary site)",
+        }
     return tools
 
 
@@ -450,10 +746,62 @@ async def call_tool_handler(
     if request is None:
         raise RuntimeError("Request object is required to access app state.")
 
-    wp: WordPressMCP = request.app.state.wp_client  # type: ignore[attr-defined]
-
     logger.info("MCP tool call: %s with args=%s", name, arguments)
 
+    arguments = dict(arguments)
+    sites: SiteRegistry = request.app.state.sites  # type: ignore[attr-defined]
+    wp: WordPressMCP = sites.get(arguments.pop("site", None) or None)
+    idempotency_key = arguments.pop("idempotency_key", None) or request.headers.get("idempotency-key")
+
+    with tracing.span(f"tool.{name}") as tool_span:
+        if idempotency_key and name in IDEMPOTENT_TOOLS:
+            store: AsyncIdempotencyStore = request.app.state.idempotency  # type: ignore[attr-defined]
+            result, replayed = await store.run(
+                (wp.name, name, str(idempotency_key)),
+                arguments,
+                lambda: dispatch_tool(wp, name, arguments),
+            )
+            if replayed:
+                result = {**result, "replayed": True}
+                if tool_span is not None:
+                    tool_span.attributes["replayed"] = True
+        elif name in STALE_TOOLS:
+            request.app.state.warmer.tracker.record(  # type: ignore[attr-defined]
+                {"tool": name, "args": arguments, "site": wp.name}
+            )
+            result = await wp.stale.serve(stale_key(name, arguments), lambda: dispatch_tool(wp, name, arguments))
+            if tool_span is not None and result.get("stale"):
+                tool_span.attributes["stale"] = result["stale_reason"]
+        else:
+            result = await dispatch_tool(wp, name, arguments)
+
+    with tracing.span("serialize"):
+        content_text = json.dumps(result, ensure_ascii=False, default=to_json)
+    return [TextContent(type="text", text=content_text)]
+
+
+def stale_key(name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+    return name, json.dumps(arguments, sort_keys=True, default=str)
+
+
+def tool_priority(name: str, arguments: Dict[str, Any]) -> str:
+    """
+    Scheduling class of a tool call: small reads are interactive, writes
+    and large page reads are bulk.
+    """
+    if name not in SCHEDULER_INTERACTIVE_TOOLS:
+        return BULK
+    try:
+        per_page = int(arguments.get("per_page", 10))
+    except (TypeError, ValueError):
+        per_page = 10
+    return BULK if per_page > SCHEDULER_BULK_PER_PAGE else INTERACTIVE
+
+
+async def dispatch_tool(wp: WordPressMCP, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate tool arguments and call the matching WordPressMCP method.
+    """
     if name == "create_post":
         result = await wp.create_post(
             title=str(arguments.get("title", "")),
@@ -482,22 +830,37 @@ async def call_tool_handler(
     elif name == "get_posts":
         per_page = arguments.get("per_page", 10)
         page = arguments.get("page", 1)
+        content_format = str(arguments.get("content_format") or "html")
         try:
             per_page_int = int(per_page)
             page_int = int(page)
+            max_chars = int(arguments["max_chars"]) if arguments.get("max_chars") else None
+            max_tokens = int(arguments["max_tokens"]) if arguments.get("max_tokens") else None
         except (TypeError, ValueError):
             result = {
                 "success": False,
                 "posts": [],
                 "count": 0,
                 "total": None,
-                "message": "per_page and page must be integers.",
+                "message": "per_page, page, max_chars and max_tokens must be integers.",
             }
         else:
-            result = await wp.get_posts(
-                per_page=per_page_int,
-                page=page_int,
-            )
+            if content_format not in html_text.CONTENT_FORMATS:
+                result = {
+                    "success": False,
+                    "posts": [],
+                    "count": 0,
+                    "total": None,
+                    "message": f"content_format must be one of: {', '.join(html_text.CONTENT_FORMATS)}.",
+                }
+            else:
+                result = await wp.get_posts(
+                    per_page=per_page_int,
+                    page=page_int,
+                    content_format=content_format,
+                    max_chars=max_chars,
+                    max_tokens=max_tokens,
+                )
     elif name == "delete_post":
         post_id_val = arguments.get("post_id")
         try:
@@ -516,9 +879,7 @@ async def call_tool_handler(
             "success": False,
             "message": f"Unknown tool: {name}",
         }
-
-    content_text = json.dumps(result, ensure_ascii=False)
-    return [TextContent(type="text", text=content_text)]
+    return result
 
 
 # ---------------------------------------------------------------------------
@@ -532,17 +893,86 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     Lifespan context for FastAPI to manage startup and shutdown.
     """
     logger.info("Starting FastAPI app with WordPressMCP client")
-    wp_client = WordPressMCP(
-        base_url=WORDPRESS_URL,
-        username=WORDPRESS_USERNAME,
-        password=WORDPRESS_PASSWORD,
+    shared_budget = asyncio.Semaphore(UPSTREAM_MAX_CONNECTIONS)
+    site_configs = {
+        DEFAULT_SITE: SiteConfig(
+            name=DEFAULT_SITE,
+            url=WORDPRESS_URL,
+            username=WORDPRESS_USERNAME,
+            password=WORDPRESS_PASSWORD,
+            concurrency=WORDPRESS_POOL_SIZE,
+            read_urls=list(WORDPRESS_READ_URLS),
+        ),
+    }
+    for site_name, config in load_site_configs(WORDPRESS_SITES, WORDPRESS_POOL_SIZE).items():
+        site_configs.setdefault(site_name, config)
+    sites: SiteRegistry[WordPressMCP] = SiteRegistry(
+        site_configs,
+        factory=lambda config: WordPressMCP(
+            base_url=config.url,
+            username=config.username,
+            password=config.password,
+            name=config.name,
+            concurrency=config.concurrency,
+            shared_budget=shared_budget,
+            read_urls=config.read_urls,
+        ),
+        retire=WordPressMCP.retire,
+        default_site=DEFAULT_SITE,
+        max_active=MAX_ACTIVE_SITES,
+        idle_ttl=SITE_IDLE_TTL,
     )
+    wp_client = sites.get()
+    app.state.sites = sites
     app.state.wp_client = wp_client
+    app.state.traces = tracing.TraceStore(
+        size=TRACE_BUFFER_SIZE,
+        export_path=TRACE_EXPORT_PATH,
+        service_name="wordpress-mcp-sse-server",
+    )
+    app.state.idempotency = AsyncIdempotencyStore(ttl=IDEMPOTENCY_TTL)
+    app.state.scheduler = RequestScheduler(
+        max_concurrency=SCHEDULER_MAX_CONCURRENCY,
+        max_queue=SCHEDULER_MAX_QUEUE,
+        max_session_queue=SCHEDULER_MAX_SESSION_QUEUE,
+        tool_concurrency=SCHEDULER_TOOL_CONCURRENCY,
+    )
+
+    async def warm_call(call: Dict[str, Any]) -> Dict[str, Any]:
+        wp = sites.get(call.get("site"))
+        return await wp.stale.prefetch(
+            stale_key(call["tool"], call["args"]),
+            lambda: dispatch_tool(wp, call["tool"], call["args"]),
+            fresh=WARMUP_INTERVAL,
+        )
+
+    tracker = AccessTracker()
+    tracker.load(WARMUP_STATE_PATH)
+    warmer = AsyncWarmer(
+        warm_call,
+        load_warmup_plan(WARMUP_PLAN),
+        tracker=tracker,
+        hot_keys=WARMUP_HOT_KEYS,
+        interval=WARMUP_INTERVAL,
+        concurrency=WARMUP_CONCURRENCY,
+        state_path=WARMUP_STATE_PATH,
+    )
+    app.state.warmer = warmer
+    app.state.webhooks = WebhookVerifier(WEBHOOK_SECRET, tolerance=WEBHOOK_TOLERANCE) if WEBHOOK_SECRET else None
+    app.state.webhook_stats = {"invalidated": 0, "last_event_at": None}
+    app.state.webhook_refreshes = set()
+    # Runs in the background so a slow origin does not delay startup
+    keep_warm_task = asyncio.create_task(wp_client.keep_warm())
+    warmup_task = asyncio.create_task(warmer.run())
     try:
         yield
     finally:
         logger.info("Shutting down FastAPI app and closing WordPressMCP client")
-        await wp_client.close()
+        keep_warm_task.cancel()
+        warmup_task.cancel()
+        tracker.save(WARMUP_STATE_PATH)
+        for site_client in sites.close():
+            await site_client.close()
 
 
 app = FastAPI(lifespan=lifespan, title="WordPress MCP SSE Server")
@@ -600,8 +1030,11 @@ async def root() -> Dict[str, Any]:
         "protocol": "MCP over SSE",
         "endpoints": {
             "health": "/health",
+            "health_deep": "/health/deep",
+            "traces": "/debug/traces",
             "sse": "/sse",
             "mcp": "/mcp",
+            "webhook": "/webhooks/wordpress",
         },
         "tools": tools,
     }
@@ -619,6 +1052,130 @@ async def health() -> Dict[str, Any]:
     }
 
 
+@app.get("/health/deep")
+async def health_deep(request: Request) -> Dict[str, Any]:
+    """
+    Deep health check using the cached upstream probe.
+
+    Reports the last probe latency, pool occupancy and last error without
+    issuing an extra origin request per health check.
+    """
+    wp: WordPressMCP = request.app.state.wp_client  # type: ignore[attr-defined]
+    probe = dict(wp.probe_state)
+    last_ok = probe["last_ok_at"]
+    last_error = probe["last_error_at"]
+    if last_ok is None and last_error is None:
+        status = "unknown"
+    elif last_ok is None or (last_error is not None and last_error > last_ok):
+        status = "unhealthy"
+    elif time.time() - last_ok > WORDPRESS_PROBE_INTERVAL * 3:
+        status = "degraded"
+    else:
+        status = "healthy"
+    probe["age_s"] = round(time.time() - last_ok, 1) if last_ok else None
+    return {
+        "status": status,
+        "service": "wordpress-mcp-sse-server",
+        "upstream": probe,
+        "pool": wp.pool_stats(),
+        "read_routing": wp.router.stats() if wp.router else None,
+        "stale_cache": wp.stale.stats(),
+        "warmup": request.app.state.warmer.stats(),  # type: ignore[attr-defined]
+        "webhooks": webhook_stats(request.app),
+        "scheduler": request.app.state.scheduler.stats(),  # type: ignore[attr-defined]
+        "sites": request.app.state.sites.stats(),  # type: ignore[attr-defined]
+    }
+
+
+def webhook_stats(app: FastAPI) -> Dict[str, Any]:
+    verifier: Optional[WebhookVerifier] = app.state.webhooks  # type: ignore[attr-defined]
+    if verifier is None:
+        return {"enabled": False}
+    return {"enabled": True, **verifier.stats(), **app.state.webhook_stats}  # type: ignore[attr-defined]
+
+
+def webhook_tools(event: Dict[str, Any]) -> Set[str]:
+    """
+    Cached tools whose results a change notification affects.
+    """
+    # get_posts lists the "post" type only; pages and custom types leave it as is
+    if event["event"].startswith("post.") and event.get("type", "post") != "post":
+        return set()
+    return WEBHOOK_TOOLS.get(event["event"], set())
+
+
+@app.post("/webhooks/wordpress")
+async def wordpress_webhook(request: Request) -> Response:
+    """
+    Receive a signed change notification from WordPress.
+
+    Drops the cached results the change affects on the site it names and,
+    with WEBHOOK_REFRESH, loads them again in the background; the response
+    is sent as soon as the entries are dropped.
+    """
+    verifier: Optional[WebhookVerifier] = request.app.state.webhooks  # type: ignore[attr-defined]
+    if verifier is None:
+        return JSONResponse({"success": False, "error": "Webhooks are disabled"}, status_code=404)
+    started = time.perf_counter()
+    body = await request.body()
+    sites: SiteRegistry[WordPressMCP] = request.app.state.sites  # type: ignore[attr-defined]
+    try:
+        event = verifier.verify(body, request.headers)
+        site = event_site(event, {name: config.url for name, config in sites.configs.items()}) or sites.default_site
+        if site not in sites.configs:
+            raise WebhookError(404, f"Unknown site '{site}'")
+    except DuplicateDelivery as e:
+        return JSONResponse({"success": True, "duplicate": True, "message": str(e)})
+    except WebhookError as e:
+        logger.warning("Rejected webhook: %s", e)
+        return JSONResponse({"success": False, "error": str(e)}, status_code=e.status)
+
+    tools = webhook_tools(event)
+    # Only live site clients hold cached results
+    wp = sites.peek(site)
+    dropped = wp.stale.invalidate(lambda key: key[0] in tools) if wp is not None and tools else []
+    stats = request.app.state.webhook_stats  # type: ignore[attr-defined]
+    stats["invalidated"] += len(dropped)
+    stats["last_event_at"] = time.time()
+    if dropped and WEBHOOK_REFRESH:
+        warmer: AsyncWarmer = request.app.state.warmer  # type: ignore[attr-defined]
+        calls = [{"tool": name, "args": json.loads(arguments), "site": site} for name, arguments in dropped]
+        refresh = asyncio.gather(*(warmer.run_call(call) for call in calls), return_exceptions=True)
+        # Keep a reference until the refresh finishes
+        refreshes: Set[asyncio.Future] = request.app.state.webhook_refreshes  # type: ignore[attr-defined]
+        refreshes.add(refresh)
+        refresh.add_done_callback(refreshes.discard)
+    logger.info(
+        "Webhook %s id=%s site=%s: dropped %s cached results",
+        event["event"],
+        event.get("id"),
+        site,
+        len(dropped),
+    )
+    return JSONResponse(
+        {
+            "success": True,
+            "event": event["event"],
+            "site": site,
+            "invalidated": len(dropped),
+            "refreshing": len(dropped) if WEBHOOK_REFRESH else 0,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+    )
+
+
+@app.get("/debug/traces")
+async def debug_traces(request: Request, limit: int = 20, min_ms: float = 0.0) -> Dict[str, Any]:
+    """
+    Slowest recent /mcp requests with their phase breakdown.
+    """
+    store: tracing.TraceStore = request.app.state.traces  # type: ignore[attr-defined]
+    return {
+        "buffered": len(store.traces),
+        "traces": store.slowest(limit=limit, min_ms=min_ms),
+    }
+
+
 @app.get("/sse")
 async def sse_endpoint(request: Request) -> EventSourceResponse:
     """
@@ -665,7 +1222,7 @@ async def sse_endpoint(request: Request) -> EventSourceResponse:
 
 
 @app.post("/mcp")
-async def mcp_endpoint(request: Request) -> Dict[str, Any]:
+async def mcp_endpoint(request: Request) -> Response:
     """
     MCP JSON-RPC endpoint.
 
@@ -673,9 +1230,75 @@ async def mcp_endpoint(request: Request) -> Dict[str, Any]:
       - "initialize"
       - "tools/list"
       - "tools/call"
+
+    Each request is traced; see /debug/traces. Request bodies may be sent
+    compressed (Content-Encoding) and large responses are compressed per
+    Accept-Encoding.
+    """
+    with tracing.start_trace("POST /mcp") as trace:
+        response = await handle_mcp_request(request, trace)
+        with tracing.span("encode") as encode_span:
+            encoded = await encode_response(response, request.headers.get("accept-encoding"), encode_span)
+    store: tracing.TraceStore = request.app.state.traces  # type: ignore[attr-defined]
+    store.add(trace)
+    if store.export_path:
+        asyncio.get_running_loop().run_in_executor(None, store.export, trace)
+    return encoded
+
+
+async def encode_response(payload: Dict[str, Any], accept_encoding: Optional[str], span: Optional[tracing.Span]) -> Response:
+    """
+    Serialize a JSON-RPC response and compress it if negotiated and large enough.
+    """
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+    encoding = compression.negotiate(accept_encoding) if len(body) >= RESPONSE_COMPRESSION_MIN_SIZE else None
+    if encoding:
+        if len(body) >= RESPONSE_COMPRESSION_OFFLOAD_SIZE:
+            compressed = await asyncio.get_running_loop().run_in_executor(None, compression.compress, body, encoding)
+        else:
+            compressed = compression.compress(body, encoding)
+        if span is not None:
+            span.attributes.update(encoding=encoding, bytes_in=len(body), bytes_out=len(compressed))
+        if len(compressed) < len(body):
+            body = compressed
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def read_json_body(request: Request) -> Any:
+    """
+    Read the request body, decoding Content-Encoding, and parse it as JSON.
+    """
+    raw = await request.body()
+    encoding = request.headers.get("content-encoding")
+    if encoding and encoding.lower() != "identity":
+        if len(raw) >= RESPONSE_COMPRESSION_OFFLOAD_SIZE:
+            raw = await asyncio.get_running_loop().run_in_executor(
+                None, compression.decompress, raw, encoding, REQUEST_MAX_BODY_SIZE
+            )
+        else:
+            raw = compression.decompress(raw, encoding, REQUEST_MAX_BODY_SIZE)
+    return json.loads(raw)
+
+
+async def handle_mcp_request(request: Request, trace: tracing.Trace) -> Dict[str, Any]:
+    """
+    Parse and dispatch a single MCP JSON-RPC request.
     """
     try:
-        body = await request.json()
+        with tracing.span("parse"):
+            body = await read_json_body(request)
+    except compression.DecompressionError as e:
+        logger.error("Failed to decode compressed body for /mcp: %s", e)
+        return {
+            "jsonrpc": "2.0",
+            "id": None,
+            "error": {
+                "code": -32600,
+                "message": f"Invalid request body: {e}",
+            },
+        }
     except Exception as e:
         logger.error("Failed to parse JSON body for /mcp: %s", e)
         return {
@@ -693,6 +1316,7 @@ async def mcp_endpoint(request: Request) -> Dict[str, Any]:
     method = body.get("method")
     params = body.get("params", {}) or {}
     req_id = body.get("id")
+    trace.root.attributes["rpc.method"] = method
 
     if method == "initialize":
         result = {
@@ -727,6 +1351,7 @@ async def mcp_endpoint(request: Request) -> Dict[str, Any]:
         tool_name = params.get("name")
         arguments = params.get("arguments", {}) or {}
         logger.info("MCP tools/call for tool=%s args=%s", tool_name, arguments)
+        trace.root.attributes["tool"] = tool_name
 
         if not tool_name:
             return {
@@ -738,12 +1363,37 @@ async def mcp_endpoint(request: Request) -> Dict[str, Any]:
                 },
             }
 
+        scheduler: RequestScheduler = request.app.state.scheduler  # type: ignore[attr-defined]
+        session = session_key(request.headers, request.client.host if request.client else None)
+        priority = tool_priority(str(tool_name), arguments)
+        # Read-after-write stickiness is tracked per session
+        read_routing.current_session.set(session)
+        trace.root.attributes["priority"] = priority
         try:
-            contents = await call_tool_handler(
-                name=str(tool_name),
-                arguments=arguments,
-                request=request,
-            )
+            async with scheduler.slot(session, str(tool_name), priority) as waited:
+                now = time.perf_counter()
+                tracing.record_span("schedule.wait", now - waited, now, priority=priority)
+                contents = await call_tool_handler(
+                    name=str(tool_name),
+                    arguments=arguments,
+                    request=request,
+                )
+        except SchedulerBusy as busy:
+            logger.warning("Rejecting %s for session %s: %s", tool_name, session, busy.reason)
+            return {
+                "jsonrpc": jsonrpc,
+                "id": req_id,
+                "error": busy_error(busy),
+            }
+        except (IdempotencyConflict, UnknownSite) as e:
+            return {
+                "jsonrpc": jsonrpc,
+                "id": req_id,
+                "error": {
+                    "code": -32602,
+                    "message": str(e),
+                },
+            }
         except Exception as e:
             logger.exception("Error during MCP tool call for %s", tool_name)
             return {
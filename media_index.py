@@ -0,0 +1,84 @@
+"""
+Локальный индекс медиафайлов WordPress
+Сопоставляет хэш содержимого и пару (URL источника, ETag) с ID медиафайла,
+чтобы повторная загрузка того же файла не гоняла байты в WordPress
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional, Dict, Any
+
+
+class MediaIndex:
+    """Индекс медиафайлов в SQLite (потокобезопасный)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                " site TEXT NOT NULL, sha256 TEXT NOT NULL, media_id INTEGER NOT NULL,"
+                " updated REAL NOT NULL, PRIMARY KEY (site, sha256))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                " site TEXT NOT NULL, source_url TEXT NOT NULL, etag TEXT, media_id INTEGER NOT NULL,"
+                " updated REAL NOT NULL, PRIMARY KEY (site, source_url))"
+            )
+
+    def find_by_hash(self, site: str, sha256: str) -> Optional[int]:
+        """Ищет ID медиафайла по хэшу содержимого"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id FROM hashes WHERE site = ? AND sha256 = ?",
+                (site, sha256)
+            ).fetchone()
+        return row[0] if row else None
+
+    def find_by_url(self, site: str, source_url: str) -> Optional[Dict[str, Any]]:
+        """Ищет запись по URL источника; возвращает media_id и сохраненный ETag"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id, etag FROM sources WHERE site = ? AND source_url = ?",
+                (site, source_url)
+            ).fetchone()
+        if not row:
+            return None
+        return {"media_id": row[0], "etag": row[1]}
+
+    def record(
+        self,
+        site: str,
+        media_id: int,
+        sha256: Optional[str] = None,
+        source_url: Optional[str] = None,
+        etag: Optional[str] = None
+    ) -> None:
+        """Запоминает хэш и/или URL источника для медиафайла"""
+        now = time.time()
+        with self._lock, self._conn:
+            if sha256:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO hashes (site, sha256, media_id, updated) VALUES (?, ?, ?, ?)",
+                    (site, sha256, media_id, now)
+                )
+            if source_url:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sources (site, source_url, etag, media_id, updated)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (site, source_url, etag, media_id, now)
+                )
+
+    def forget(self, site: str, media_id: int) -> None:
+        """Удаляет все записи медиафайла (например, если он удален в WordPress)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM hashes WHERE site = ? AND media_id = ?", (site, media_id))
+            self._conn.execute("DELETE FROM sources WHERE site = ? AND media_id = ?", (site, media_id))
+
+    def close(self) -> None:
+        """Закрывает соединение с базой"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,274 @@
+"""
+Read routing across WordPress origins and read replicas.
+
+GET requests are spread over the primary and the configured read endpoints
+at random, weighted by observed latency and requests in flight. Endpoints that fail repeatedly or answer much slower than their
+peers are ejected passively (no extra health probes) for a backoff period.
+Writes always go to the primary, and after a write the same session reads
+from the primary for a short window, so it never sees its own change
+missing from a lagging replica.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import random
+import statistics
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import httpx
+
+# Session of the current tool call; None means a single-session process
+current_session: contextvars.ContextVar[Optional[Hashable]] = contextvars.ContextVar(
+    "read_routing_session", default=None
+)
+
+_READ_METHODS = {"GET", "HEAD"}
+# Statuses retried on the primary when a read endpoint returns them
+_RETRY_STATUSES = {502, 503, 504}
+
+
+class _Endpoint:
+    __slots__ = ("url", "primary", "ewma", "in_flight", "failures", "ejections", "ejected_until", "requests", "errors")
+
+    def __init__(self, url: str, primary: bool) -> None:
+        self.url = httpx.URL(url.rstrip("/") + "/")
+        self.primary = primary
+        self.ewma = 0.0  # seconds; 0 until the first response
+        self.in_flight = 0
+        self.failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+
+
+class ReadRouter:
+    """
+    Latency- and health-aware choice of endpoint for reads (thread-safe).
+    """
+
+    def __init__(
+        self,
+        primary: str,
+        read_urls: Sequence[str],
+        sticky_seconds: float = 10.0,
+        eject_after: int = 3,
+        eject_seconds: float = 30.0,
+        slow_factor: float = 3.0,
+        slow_min_ms: float = 250.0,
+    ) -> None:
+        self.primary = _Endpoint(primary, primary=True)
+        self.endpoints: List[_Endpoint] = [self.primary] + [
+            _Endpoint(url, primary=False) for url in read_urls if url.rstrip("/") != primary.rstrip("/")
+        ]
+        self.sticky_seconds = sticky_seconds
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = eject_seconds
+        self.slow_factor = slow_factor
+        self.slow_min = slow_min_ms / 1000
+        self._lock = threading.Lock()
+        # session -> monotonic time until which its reads go to the primary
+        self._sticky: "OrderedDict[Hashable, float]" = OrderedDict()
+        self.sticky_reads = 0
+
+    # ------------------------------------------------------------- choice
+
+    def mark_write(self, session: Optional[Hashable]) -> None:
+        with self._lock:
+            self._sticky[session] = time.monotonic() + self.sticky_seconds
+            self._sticky.move_to_end(session)
+            while len(self._sticky) > 10000:
+                self._sticky.popitem(last=False)
+
+    def choose(self, session: Optional[Hashable]) -> _Endpoint:
+        """
+        Endpoint for a read by session; counts it as in flight.
+        """
+        now = time.monotonic()
+        with self._lock:
+            until = self._sticky.get(session)
+            if until is not None and until > now:
+                self.sticky_reads += 1
+                endpoint = self.primary
+            else:
+                if until is not None:
+                    del self._sticky[session]
+                healthy = [e for e in self.endpoints if e.ejected_until <= now]
+                if not healthy:
+                    endpoint = self.primary
+                elif len(healthy) == 1:
+                    endpoint = healthy[0]
+                else:
+                    endpoint = random.choices(healthy, weights=self._weights(healthy))[0]
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    @staticmethod
+    def _weights(endpoints: List[_Endpoint]) -> List[float]:
+        # Share of reads inversely proportional to latency times load, so
+        # slower nodes still get some traffic and their estimate stays fresh.
+        # Unmeasured endpoints are treated as fast as the best known one.
+        measured = [e.ewma for e in endpoints if e.ewma]
+        floor = min(measured) if measured else 0.001
+        return [1.0 / (max(e.ewma or floor, 0.001) * (e.in_flight + 1)) for e in endpoints]
+
+    def finish(self, endpoint: _Endpoint, elapsed: float, ok: bool) -> None:
+        """
+        Record the outcome of a read and eject the endpoint if it is
+        failing or much slower than its peers.
+        """
+        now = time.monotonic()
+        with self._lock:
+            endpoint.in_flight -= 1
+            if not ok:
+                endpoint.errors += 1
+                endpoint.failures += 1
+                if endpoint.failures >= self.eject_after:
+                    self._eject(endpoint, now)
+                return
+            endpoint.failures = 0
+            endpoint.ewma = elapsed if endpoint.ewma == 0 else 0.8 * endpoint.ewma + 0.2 * elapsed
+            peers = [e.ewma for e in self.endpoints if e is not endpoint and e.ewma and e.ejected_until <= now]
+            if peers and endpoint.ewma > self.slow_min and endpoint.ewma > self.slow_factor * statistics.median(peers):
+                self._eject(endpoint, now)
+            else:
+                endpoint.ejections = 0
+
+    def _eject(self, endpoint: _Endpoint, now: float) -> None:
+        # Called under self._lock; the backoff doubles with each ejection in a row
+        endpoint.ejections += 1
+        endpoint.failures = 0
+        endpoint.ejected_until = now + min(300.0, self.eject_seconds * 2 ** (endpoint.ejections - 1))
+        # Forget the slow average so the endpoint gets a fair retry when it returns
+        endpoint.ewma = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            endpoints = [
+                {
+                    "url": str(e.url),
+                    "primary": e.primary,
+                    "latency_ms": round(e.ewma * 1000, 1),
+                    "in_flight": e.in_flight,
+                    "requests": e.requests,
+                    "errors": e.errors,
+                    "ejected_for_s": round(e.ejected_until - now, 1) if e.ejected_until > now else 0,
+                }
+                for e in self.endpoints
+            ]
+            sticky = sum(1 for until in self._sticky.values() if until > now)
+        return {"endpoints": endpoints, "sticky_sessions": sticky, "sticky_reads": self.sticky_reads}
+
+    # ---------------------------------------------------------- rewriting
+
+    def route(self, request: httpx.Request, endpoint: _Endpoint) -> httpx.Request:
+        """
+        Copy of a primary-bound request sent to endpoint instead.
+        """
+        if endpoint.primary:
+            return request
+        base = self.primary.url
+        path = request.url.raw_path.decode("ascii")
+        prefix = base.raw_path.decode("ascii")
+        if request.url.host != base.host or request.url.port != base.port or not path.startswith(prefix):
+            return request
+        target = endpoint.url.raw_path.decode("ascii") + path[len(prefix):]
+        url = request.url.copy_with(
+            scheme=endpoint.url.scheme,
+            host=endpoint.url.host,
+            port=endpoint.url.port,
+            raw_path=target.encode("ascii"),
+        )
+        headers = request.headers.copy()
+        headers["Host"] = url.netloc.decode("ascii")
+        return httpx.Request(request.method, url, headers=headers, extensions=request.extensions)
+
+
+class RoutingTransport(httpx.BaseTransport):
+    """
+    Sync transport sending reads through a ReadRouter and writes to the primary.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, router: ReadRouter) -> None:
+        self.transport = transport
+        self.router = router
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        session = current_session.get()
+        if request.method not in _READ_METHODS:
+            self.router.mark_write(session)
+            try:
+                return self.transport.handle_request(request)
+            finally:
+                # The sticky window starts when the write is done (or failed: it
+                # may still have been applied), not when a slow write started
+                self.router.mark_write(session)
+        endpoint = self.router.choose(session)
+        started = time.perf_counter()
+        try:
+            response = self.transport.handle_request(self.router.route(request, endpoint))
+        except httpx.TransportError:
+            self.router.finish(endpoint, time.perf_counter() - started, ok=False)
+            if endpoint.primary:
+                raise
+            return self.transport.handle_request(request)
+        ok = response.status_code not in _RETRY_STATUSES
+        self.router.finish(endpoint, time.perf_counter() - started, ok=ok)
+        if ok or endpoint.primary:
+            return response
+        response.close()
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncRoutingTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of RoutingTransport.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, router: ReadRouter) -> None:
+        self.transport = transport
+        self.router = router
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        session = current_session.get()
+        if request.method not in _READ_METHODS:
+            self.router.mark_write(session)
+            try:
+                return await self.transport.handle_async_request(request)
+            finally:
+                self.router.mark_write(session)
+        endpoint = self.router.choose(session)
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(self.router.route(request, endpoint))
+        except httpx.TransportError:
+            self.router.finish(endpoint, time.perf_counter() - started, ok=False)
+            if endpoint.primary:
+                raise
+            return await self.transport.handle_async_request(request)
+        ok = response.status_code not in _RETRY_STATUSES
+        self.router.finish(endpoint, time.perf_counter() - started, ok=ok)
+        if ok or endpoint.primary:
+            return response
+        await response.aclose()
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = [
+    "AsyncRoutingTransport",
+    "ReadRouter",
+    "RoutingTransport",
+    "current_session",
+]
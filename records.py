@@ -0,0 +1,221 @@
+"""
+Compact records for WordPress entities held in memory.
+
+A post parsed from REST JSON is a dict of ~25 keys with nested
+{"rendered": ...} dicts, and each parsed response carries its own copies of
+every key string. The classes below store the same data in __slots__,
+flatten rendered fields to plain strings, keep ID lists as tuples and
+intern the few strings that repeat across items (status, type, ...).
+Fields a record does not know are kept in an "extra" dict, so to_dict()
+reproduces the REST JSON.
+"""
+
+from __future__ import annotations
+
+import sys
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple
+
+_intern = sys.intern
+
+
+class _Missing:
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+# Marks a field absent from the source item, so it is left out of to_dict()
+MISSING: Any = _Missing()
+
+
+class Record(ABC):
+    """
+    Base of the record classes: slot-wise equality and repr.
+    """
+
+    __slots__ = ()
+
+    @abstractmethod
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        The REST JSON form of the record.
+        """
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(id={getattr(self, 'id', None)!r})"
+
+
+class Post(Record):
+    """
+    A post or page as returned by /wp/v2/posts and /wp/v2/pages.
+    """
+
+    __slots__ = (
+        "id", "date", "date_gmt", "guid", "modified", "modified_gmt", "slug", "status", "type", "link",
+        "title", "content", "excerpt", "author", "featured_media", "parent", "menu_order",
+        "comment_status", "ping_status", "sticky", "template", "format", "categories", "tags",
+        "extra", "protected",
+    )
+
+    # Fields holding {"rendered": ...} (content and excerpt also carry "protected")
+    RENDERED: Tuple[str, ...] = ("guid", "title", "content", "excerpt")
+    # Short strings shared by many items
+    INTERNED: Tuple[str, ...] = ("status", "type", "comment_status", "ping_status", "template", "format")
+    ID_LISTS: Tuple[str, ...] = ("categories", "tags")
+    PLAIN: Tuple[str, ...] = (
+        "id", "date", "date_gmt", "modified", "modified_gmt", "slug", "link",
+        "author", "featured_media", "parent", "menu_order", "sticky",
+    )
+
+    @classmethod
+    def from_rest(cls, item: Dict[str, Any]) -> "Post":
+        record = cls.__new__(cls)
+        known = 0
+        for name in cls.PLAIN:
+            value = item.get(name, MISSING)
+            if value is not MISSING:
+                known += 1
+            setattr(record, name, value)
+        for name in cls.INTERNED:
+            value = item.get(name, MISSING)
+            if value is not MISSING:
+                known += 1
+                if type(value) is str:
+                    value = _intern(value)
+            setattr(record, name, value)
+        for name in cls.ID_LISTS:
+            value = item.get(name, MISSING)
+            if value is not MISSING:
+                known += 1
+                if type(value) is list:
+                    value = tuple(value)
+            setattr(record, name, value)
+        # Bit i set: RENDERED[i] had "protected": false next to "rendered"
+        protected = 0
+        for bit, name in enumerate(cls.RENDERED):
+            value = item.get(name, MISSING)
+            if value is not MISSING:
+                known += 1
+                if type(value) is dict and type(value.get("rendered")) is str:
+                    if len(value) == 1:
+                        value = value["rendered"]
+                    elif len(value) == 2 and value.get("protected", True) is False:
+                        value = value["rendered"]
+                        protected |= 1 << bit
+            setattr(record, name, value)
+        record.protected = protected
+        if known == len(item):
+            record.extra = None
+        else:
+            record.extra = {key: value for key, value in item.items() if key not in _POST_FIELDS}
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        item: Dict[str, Any] = {}
+        for name in _SCALARS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                item[name] = value
+        for name in self.ID_LISTS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                item[name] = list(value) if type(value) is tuple else value
+        for bit, name in enumerate(self.RENDERED):
+            value = getattr(self, name)
+            if value is MISSING:
+                continue
+            if type(value) is str:
+                value = {"rendered": value, "protected": False} if self.protected >> bit & 1 else {"rendered": value}
+            item[name] = value
+        if self.extra:
+            item.update(self.extra)
+        return item
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """
+        Dict-style read of a REST field (rendered fields in their JSON form).
+        """
+        if name in _POST_FIELDS:
+            value = getattr(self, name)
+            if value is MISSING:
+                return default
+            if name in self.RENDERED and type(value) is str:
+                bit = self.RENDERED.index(name)
+                return {"rendered": value, "protected": False} if self.protected >> bit & 1 else {"rendered": value}
+            return list(value) if name in self.ID_LISTS and type(value) is tuple else value
+        return (self.extra or {}).get(name, default)
+
+
+_SCALARS = Post.PLAIN + Post.INTERNED
+_POST_FIELDS = frozenset(_SCALARS + Post.ID_LISTS + Post.RENDERED)
+
+
+class Term(Record):
+    """
+    Brief of a user, category or tag (the fields used to expand posts).
+    """
+
+    __slots__ = ("id", "name", "slug", "link")
+
+    def __init__(self, id: int, name: str = "", slug: str = "", link: str = "") -> None:
+        self.id = id
+        self.name = name
+        self.slug = slug
+        self.link = link
+
+    @classmethod
+    def from_rest(cls, item: Dict[str, Any]) -> "Term":
+        return cls(item["id"], item.get("name", ""), item.get("slug", ""), item.get("link", ""))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "name": self.name, "slug": self.slug, "link": self.link}
+
+
+class PageNode(Record):
+    """
+    Page in a page-tree index.
+    """
+
+    __slots__ = ("id", "title", "slug", "status", "link")
+
+    def __init__(self, id: int, title: str, slug: str, status: str, link: str) -> None:
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.status = _intern(status) if type(status) is str else status
+        self.link = link
+
+    @classmethod
+    def from_rest(cls, item: Dict[str, Any]) -> "PageNode":
+        title = item.get("title")
+        return cls(
+            item["id"],
+            title.get("rendered", "") if isinstance(title, dict) else (title or ""),
+            item.get("slug", ""),
+            item.get("status", ""),
+            item.get("link", ""),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "title": self.title, "slug": self.slug, "status": self.status, "link": self.link}
+
+
+def to_json(value: Any) -> Any:
+    """
+    json.dumps default= hook serializing records.
+    """
+    if isinstance(value, Record):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+__all__ = ["MISSING", "PageNode", "Post", "Record", "Term", "to_json"]
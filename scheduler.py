@@ -0,0 +1,233 @@
+"""
+Admission control and fair scheduling for tool calls on the SSE server.
+
+Tool calls wait in per-session FIFO queues grouped by priority class.
+Free slots are granted round-robin across sessions, with interactive calls
+weighted ahead of bulk ones, while per-tool concurrency caps are respected.
+When queues exceed their bounds, callers are rejected immediately with a
+retry hint instead of piling up behind a single noisy session.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)
+
+
+class SchedulerBusy(Exception):
+    """
+    Raised when a call cannot be queued; carries a retry hint in seconds.
+    """
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("session", "tool", "priority", "future", "enqueued")
+
+    def __init__(self, session: str, tool: str, priority: str, future: asyncio.Future) -> None:
+        self.session = session
+        self.tool = tool
+        self.priority = priority
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+class RequestScheduler:
+    """
+    Fair, priority-aware admission control for concurrent tool calls.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        max_queue: int = 256,
+        max_session_queue: int = 32,
+        tool_concurrency: Optional[Dict[str, int]] = None,
+        interactive_weight: int = 4,
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_session_queue = max_session_queue
+        self.tool_concurrency = dict(tool_concurrency or {})
+        self.interactive_weight = max(1, interactive_weight)
+        # priority -> session -> queued waiters; OrderedDict order is the round-robin order
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._queued = 0
+        self._running = 0
+        self._running_by_tool: Dict[str, int] = {}
+        self._interactive_streak = 0
+        # Exponential moving average of call duration, used for retry hints
+        self._avg_service = 0.2
+        self.rejected = 0
+        self.completed = 0
+
+    # ------------------------------------------------------------------ API
+
+    @asynccontextmanager
+    async def slot(self, session: str, tool: str, priority: str = INTERACTIVE) -> AsyncIterator[float]:
+        """
+        Wait for an execution slot; yields the time spent queued in seconds.
+        """
+        waited = await self._acquire(session, tool, priority)
+        started = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self._avg_service = 0.9 * self._avg_service + 0.1 * (time.perf_counter() - started)
+            self._release(tool)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "max_concurrency": self.max_concurrency,
+            "queued_by_priority": {p: sum(len(q) for q in self._queues[p].values()) for p in PRIORITIES},
+            "sessions_waiting": len({s for p in PRIORITIES for s in self._queues[p]}),
+            "running_by_tool": dict(self._running_by_tool),
+            "avg_service_ms": round(self._avg_service * 1000, 1),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    # ------------------------------------------------------------ internals
+
+    def _retry_after(self) -> float:
+        backlog = self._queued + self._running
+        return round(max(0.1, backlog * self._avg_service / max(1, self.max_concurrency)), 2)
+
+    def _tool_has_capacity(self, tool: str) -> bool:
+        cap = self.tool_concurrency.get(tool)
+        return cap is None or self._running_by_tool.get(tool, 0) < cap
+
+    async def _acquire(self, session: str, tool: str, priority: str) -> float:
+        if priority not in self._queues:
+            priority = INTERACTIVE
+        # Fast path: nothing queued ahead of us and capacity is available
+        if self._queued == 0 and self._running < self.max_concurrency and self._tool_has_capacity(tool):
+            self._start(tool)
+            return 0.0
+
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerBusy("Server queue is full", self._retry_after())
+        session_queue = self._queues[priority].get(session)
+        session_depth = sum(len(self._queues[p].get(session, ())) for p in PRIORITIES)
+        if session_depth >= self.max_session_queue:
+            self.rejected += 1
+            raise SchedulerBusy("Too many queued requests for this session", self._retry_after())
+
+        waiter = _Waiter(session, tool, priority, asyncio.get_running_loop().create_future())
+        if session_queue is None:
+            session_queue = self._queues[priority][session] = deque()
+        session_queue.append(waiter)
+        self._queued += 1
+        # Waiters ahead of us may all be blocked by their tool caps while a
+        # slot is free for this tool; nothing else would dispatch until a release
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Slot was granted just before cancellation; give it back
+                self._release(tool)
+            else:
+                self._remove(waiter)
+            raise
+        return time.perf_counter() - waiter.enqueued
+
+    def _start(self, tool: str) -> None:
+        self._running += 1
+        self._running_by_tool[tool] = self._running_by_tool.get(tool, 0) + 1
+
+    def _release(self, tool: str) -> None:
+        self._running -= 1
+        self.completed += 1
+        remaining = self._running_by_tool.get(tool, 1) - 1
+        if remaining:
+            self._running_by_tool[tool] = remaining
+        else:
+            self._running_by_tool.pop(tool, None)
+        self._dispatch()
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.priority].get(waiter.session)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._queues[waiter.priority][waiter.session]
+
+    def _priority_order(self) -> Tuple[str, ...]:
+        # Every interactive_weight interactive grants, let bulk go first once
+        if self._interactive_streak >= self.interactive_weight:
+            return (BULK, INTERACTIVE)
+        return PRIORITIES
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        for priority in self._priority_order():
+            sessions = self._queues[priority]
+            for session in list(sessions):
+                queue = sessions[session]
+                # Rotate the session to the back so the next grant goes to someone else
+                sessions.move_to_end(session)
+                if self._tool_has_capacity(queue[0].tool):
+                    waiter = queue.popleft()
+                    if not queue:
+                        del sessions[session]
+                    self._interactive_streak = self._interactive_streak + 1 if priority == INTERACTIVE else 0
+                    return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        while self._running < self.max_concurrency and self._queued:
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            self._queued -= 1
+            if waiter.future.done():
+                continue
+            self._start(waiter.tool)
+            waiter.future.set_result(None)
+
+
+def session_key(headers: Any, client_host: Optional[str]) -> str:
+    """
+    Identify the calling session from MCP / custom headers, else the client address.
+    """
+    for header in ("mcp-session-id", "x-session-id", "x-forwarded-for"):
+        value = headers.get(header)
+        if value:
+            return value.split(",")[0].strip()
+    return client_host or "anonymous"
+
+
+def busy_error(exc: SchedulerBusy) -> Dict[str, Any]:
+    """
+    JSON-RPC error object for a rejected call.
+    """
+    return {
+        "code": -32001,
+        "message": f"Server busy: {exc.reason}",
+        "data": {"retry_after": exc.retry_after},
+    }
+
+
+__all__: List[str] = [
+    "BULK",
+    "INTERACTIVE",
+    "RequestScheduler",
+    "SchedulerBusy",
+    "busy_error",
+    "session_key",
+]
@@ -4,15 +4,48 @@ WordPress MCP Server
 Полнофункциональный MCP сервер для управления WordPress через ChatGPT
 """
 
+import time
+
+# Отметки этапов запуска для --profile-startup
+STARTUP_MARKS = [("start", time.perf_counter())]
+
 import os
+import re
+import sys
 import base64
-from typing import Optional, List, Dict, Any
+import asyncio
+import atexit
+import hashlib
+import json
+import fnmatch
+import functools
+import inspect
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, List, Dict, Any, Tuple, Callable, Iterator, Set
 from urllib.parse import urljoin
 
 import httpx
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
+from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
+
+from idempotency import IdempotencyStore
+from wp_cache import TTLCache
+from sites import BudgetTransport, SiteConfig, SiteRegistry, UnknownSite, load_site_configs
+from read_routing import ReadRouter, RoutingTransport
+from stale_cache import StaleCache
+from warmup import AccessTracker, Warmer, load_warmup_plan
+from html_text import html_to_text, render_content
+from json_stream import iter_array
+from records import PageNode, Term
+
+# Редко используемые подсистемы (индекс медиа, оптимизация изображений, пул процессов)
+# импортируются при первом обращении, чтобы не замедлять запуск stdio сервера
+
+STARTUP_MARKS.append(("imports", time.perf_counter()))
 
 # Загружаем переменные окружения
 load_dotenv()
@@ -26,55 +59,423 @@ WORDPRESS_USERNAME = os.getenv("WORDPRESS_USERNAME", "")
 WORDPRESS_APP_PASSWORD = os.getenv("WORDPRESS_APP_PASSWORD", "")
 WORDPRESS_TIMEOUT = int(os.getenv("WORDPRESS_TIMEOUT", "30"))
 
-# Базовый URL для REST API
-API_BASE = f"{WORDPRESS_URL}/wp-json/wp/v2"
+# Ограничения параллелизма для пакетной загрузки медиафайлов
+WORDPRESS_DOWNLOAD_CONCURRENCY = int(os.getenv("WORDPRESS_DOWNLOAD_CONCURRENCY", "8"))
+WORDPRESS_UPLOAD_CONCURRENCY = int(os.getenv("WORDPRESS_UPLOAD_CONCURRENCY", "4"))
+
+# Кэш авторов и терминов для раскрытия ID в постах (секунды)
+WORDPRESS_ENTITY_CACHE_TTL = int(os.getenv("WORDPRESS_ENTITY_CACHE_TTL", "600"))
+
+# Кэш иерархии страниц (секунды); сбрасывается при изменении страниц через сервер
+WORDPRESS_PAGE_TREE_TTL = int(os.getenv("WORDPRESS_PAGE_TREE_TTL", "3600"))
+
+# Кэш информации о сайте (секунды); после половины срока обновляется в фоне
+WORDPRESS_SITE_INFO_TTL = int(os.getenv("WORDPRESS_SITE_INFO_TTL", "3600"))
+
+# Кэш статистики сайта для wp_site_stats (секунды)
+WORDPRESS_STATS_TTL = int(os.getenv("WORDPRESS_STATS_TTL", "60"))
+
+# Сколько хранить результаты создающих вызовов с idempotency_key (секунды)
+WORDPRESS_IDEMPOTENCY_TTL = int(os.getenv("WORDPRESS_IDEMPOTENCY_TTL", "86400"))
+
+# Устаревшие ответы инструментов чтения (секунды, по умолчанию все выключено): результат
+# не старше WORDPRESS_STALE_WHILE_REVALIDATE отдается сразу и обновляется в фоне;
+# не старше WORDPRESS_STALE_IF_ERROR - отдается при ошибке WordPress или если он не
+# ответил за WORDPRESS_STALE_DEADLINE секунд (0 - ждать таймаута запроса).
+# Такие ответы помечаются stale: true
+WORDPRESS_STALE_WHILE_REVALIDATE = float(os.getenv("WORDPRESS_STALE_WHILE_REVALIDATE", "0"))
+WORDPRESS_STALE_IF_ERROR = float(os.getenv("WORDPRESS_STALE_IF_ERROR", "0"))
+WORDPRESS_STALE_DEADLINE = float(os.getenv("WORDPRESS_STALE_DEADLINE", "0"))
+WORDPRESS_STALE_CACHE_SIZE = int(os.getenv("WORDPRESS_STALE_CACHE_SIZE", "256"))
+# Потоки фонового обновления на сайт; если все заняты, чтение обращается к WordPress само
+WORDPRESS_STALE_WORKERS = int(os.getenv("WORDPRESS_STALE_WORKERS", "4"))
+
+# Федеративный поиск wp_search: служебные типы записей, которые не ищем, и типы
+# по умолчанию, если сайт не отдает /wp/v2/types
+SEARCH_EXCLUDED_TYPES = {
+    "nav_menu_item", "wp_block", "wp_template", "wp_template_part", "wp_navigation",
+    "wp_global_styles", "wp_font_family", "wp_font_face"
+}
+DEFAULT_SEARCH_TYPES = {"post": "posts", "page": "pages", "attachment": "media"}
+SEARCH_RANK_K = 10  # сглаживание позиции при слиянии выдачи разных типов
+
+# Параллельная пагинация и групповые записи
+WORDPRESS_PAGINATION_CONCURRENCY = int(os.getenv("WORDPRESS_PAGINATION_CONCURRENCY", "6"))
+WORDPRESS_WRITE_CONCURRENCY = int(os.getenv("WORDPRESS_WRITE_CONCURRENCY", "6"))
+WORDPRESS_BATCH_SIZE = 25  # ограничение WordPress на число запросов в /batch/v1
+# Ответы, по которым считаем, что маршрут не поддерживает /batch/v1 (кроме HTTP 404)
+BATCH_UNSUPPORTED_CODES = {"rest_no_route", "rest_batch_not_allowed"}
+
+# Оптимизация изображений перед загрузкой (требует Pillow)
+WORDPRESS_IMAGE_OPTIMIZE = os.getenv("WORDPRESS_IMAGE_OPTIMIZE", "false").lower() == "true"
+WORDPRESS_IMAGE_MAX_DIMENSION = int(os.getenv("WORDPRESS_IMAGE_MAX_DIMENSION", "2560"))
+WORDPRESS_IMAGE_FORMAT = os.getenv("WORDPRESS_IMAGE_FORMAT", "webp").lower()
+WORDPRESS_IMAGE_QUALITY = int(os.getenv("WORDPRESS_IMAGE_QUALITY", "82"))
+WORDPRESS_IMAGE_WORKERS = int(os.getenv("WORDPRESS_IMAGE_WORKERS", str(os.cpu_count() or 2)))
+
+# Локальный индекс загруженных медиафайлов (пустое значение отключает дедупликацию)
+WORDPRESS_MEDIA_INDEX = os.getenv(
+    "WORDPRESS_MEDIA_INDEX",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".media_index.db")
+)
+
+# Журнал фоновых заданий записи (пустое значение отключает параметр background)
+WORDPRESS_JOB_QUEUE = os.getenv(
+    "WORDPRESS_JOB_QUEUE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".jobs.db")
+)
+WORDPRESS_JOB_WORKERS = int(os.getenv("WORDPRESS_JOB_WORKERS", "2"))
+WORDPRESS_JOB_MAX_ATTEMPTS = int(os.getenv("WORDPRESS_JOB_MAX_ATTEMPTS", "3"))
+WORDPRESS_JOB_CHUNK = 10  # медиафайлов между контрольными точками пакетного задания
+
+# Реестр сайтов: JSON-объект "имя -> {url, username, app_password или app_password_env, concurrency}"
+# или путь к JSON-файлу. Сайт из WORDPRESS_URL регистрируется под именем WORDPRESS_DEFAULT_SITE
+WORDPRESS_SITES = os.getenv("WORDPRESS_SITES", "")
+WORDPRESS_DEFAULT_SITE = os.getenv("WORDPRESS_DEFAULT_SITE", "default")
+WORDPRESS_MAX_ACTIVE_SITES = int(os.getenv("WORDPRESS_MAX_ACTIVE_SITES", "16"))
+WORDPRESS_SITE_IDLE_TTL = int(os.getenv("WORDPRESS_SITE_IDLE_TTL", "900"))
+# Одновременных запросов к одному сайту и ко всем сайтам вместе
+WORDPRESS_SITE_CONCURRENCY = int(os.getenv("WORDPRESS_SITE_CONCURRENCY", "8"))
+WORDPRESS_MAX_CONNECTIONS = int(os.getenv("WORDPRESS_MAX_CONNECTIONS", "64"))
+
+# Дополнительные узлы или реплики основного сайта для чтения (через запятую);
+# после записи чтения идут на основной узел еще WORDPRESS_READ_STICKY_SECONDS секунд
+WORDPRESS_READ_URLS = [u.strip().rstrip("/") for u in os.getenv("WORDPRESS_READ_URLS", "").split(",") if u.strip()]
+WORDPRESS_READ_STICKY_SECONDS = float(os.getenv("WORDPRESS_READ_STICKY_SECONDS", "10"))
+
+# Прогрев инструментов чтения при запуске и каждые WORDPRESS_WARMUP_INTERVAL секунд
+# (0 - только при запуске). Включается только явно, потому что клиенты запускают
+# по процессу на сессию: план WORDPRESS_WARMUP (JSON-список, путь к файлу, "default" -
+# план по умолчанию, "[]" - без плана) и WORDPRESS_WARMUP_HOT_KEYS самых частых
+# вызовов, счетчики которых сохраняются в WORDPRESS_WARMUP_STATE между перезапусками
+WORDPRESS_WARMUP = os.getenv("WORDPRESS_WARMUP", "")
+WORDPRESS_WARMUP_INTERVAL = float(os.getenv("WORDPRESS_WARMUP_INTERVAL", "0"))
+WORDPRESS_WARMUP_HOT_KEYS = int(os.getenv("WORDPRESS_WARMUP_HOT_KEYS", "20"))
+WORDPRESS_WARMUP_CONCURRENCY = int(os.getenv("WORDPRESS_WARMUP_CONCURRENCY", "4"))
+WORDPRESS_WARMUP_STATE = os.getenv(
+    "WORDPRESS_WARMUP_STATE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".warmup.json")
+)
+# План по умолчанию: то, что запрашивают первым после запуска
+DEFAULT_WARMUP_PLAN = [
+    {"tool": "wp_get_site_info"},
+    {"tool": "wp_list_posts"},
+    {"tool": "wp_list_pages"},
+    {"tool": "wp_list_categories"},
+    {"tool": "wp_list_tags"},
+]
+
+
+def _sha256(content: bytes) -> str:
+    """SHA-256 содержимого файла (ключ дедупликации в индексе медиа)"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _entity_dict(resolved: Dict[int, Term], entity_id: int) -> Dict[str, Any]:
+    """Описание сущности для ответа (только ID, если она не найдена)"""
+    entity = resolved.get(entity_id)
+    return entity.to_dict() if entity is not None else {"id": entity_id}
+
+
+# Общие для всех сайтов ресурсы: индекс медиа (ключ - URL сайта), пул процессов
+# оптимизации изображений и клиент для скачивания файлов из внешних источников
+_shared_lock = threading.Lock()
+_shared_media_index = None
+_shared_image_pool = None
+_shared_download_client: Optional[httpx.Client] = None
+# Общий бюджет одновременных запросов ко всем сайтам
+_connection_budget = threading.BoundedSemaphore(max(1, WORDPRESS_MAX_CONNECTIONS))
+# Ключи идемпотентности по имени сайта: живут дольше клиента, которого реестр
+# закрывает после WORDPRESS_SITE_IDLE_TTL секунд простоя
+_idempotency_stores: Dict[str, IdempotencyStore] = {}
+
+
+def _idempotency_store(site: str) -> IdempotencyStore:
+    """Хранилище ключей идемпотентности сайта"""
+    with _shared_lock:
+        store = _idempotency_stores.get(site)
+        if store is None:
+            store = _idempotency_stores[site] = IdempotencyStore(ttl=WORDPRESS_IDEMPOTENCY_TTL)
+        return store
 
 
 class WordPressClient:
-    """Клиент для работы с WordPress REST API"""
+    """Клиент для работы с WordPress REST API одного сайта"""
     
-    def __init__(self):
-        if not all([WORDPRESS_URL, WORDPRESS_USERNAME, WORDPRESS_APP_PASSWORD]):
-            raise ValueError("Необходимо настроить WORDPRESS_URL, WORDPRESS_USERNAME и WORDPRESS_APP_PASSWORD")
+    def __init__(self, site: SiteConfig):
+        self.site = site.name
+        self.url = site.url
+        self.username = site.username
+        self.api_base = f"{site.url}/wp-json/wp/v2"
         
         # Создаем Basic Auth заголовок
-        credentials = f"{WORDPRESS_USERNAME}:{WORDPRESS_APP_PASSWORD}"
+        credentials = f"{site.username}:{site.password}"
         encoded_credentials = base64.b64encode(credentials.encode()).decode()
         self.auth_header = f"Basic {encoded_credentials}"
         
+        # Запросы проходят через лимит сайта и общий бюджет соединений
+        self.transport = BudgetTransport(
+            httpx.HTTPTransport(limits=httpx.Limits(
+                max_connections=site.concurrency,
+                max_keepalive_connections=site.concurrency
+            )),
+            site.concurrency,
+            _connection_budget
+        )
+        # Чтения распределяются по узлам с учетом задержки и ошибок, записи идут на основной узел
+        self.router = ReadRouter(
+            site.url, site.read_urls, sticky_seconds=WORDPRESS_READ_STICKY_SECONDS
+        ) if site.read_urls else None
+        # Content-Type не задается по умолчанию: httpx выставляет его сам для JSON
+        # и multipart (иначе загрузка медиа уходит без границы multipart)
         self.client = httpx.Client(
             timeout=WORDPRESS_TIMEOUT,
+            transport=RoutingTransport(self.transport, self.router) if self.router else self.transport,
             headers={
                 "Authorization": self.auth_header,
-                "Content-Type": "application/json",
                 "Accept": "application/json"
             }
         )
+        # Общий кэш пользователей и терминов: ключ (endpoint, id)
+        self.entity_cache = TTLCache(ttl=WORDPRESS_ENTITY_CACHE_TTL, maxsize=10000)
+        # Плоский список страниц и индекс parent -> children: ключ - статус
+        self.page_tree_cache = TTLCache(ttl=WORDPRESS_PAGE_TREE_TTL, maxsize=16)
+        self.stats_cache = TTLCache(ttl=WORDPRESS_STATS_TTL, maxsize=1)
+        # Типы записей для поиска (slug -> rest_base)
+        self.search_types_cache = TTLCache(ttl=WORDPRESS_SITE_INFO_TTL, maxsize=1)
+        self.idempotency = _idempotency_store(site.name)
+        # Последние успешные ответы инструментов чтения; любая запись через клиент
+        # запрещает отдавать их без проверки, чтобы сессия видела свои изменения
+        self.stale = StaleCache(
+            revalidate=WORDPRESS_STALE_WHILE_REVALIDATE,
+            stale_if_error=WORDPRESS_STALE_IF_ERROR,
+            deadline=WORDPRESS_STALE_DEADLINE or None,
+            maxsize=WORDPRESS_STALE_CACHE_SIZE,
+            workers=WORDPRESS_STALE_WORKERS
+        )
+        self.client.event_hooks["request"].append(self._on_request)
+        # (данные, время загрузки) для wp_get_site_info
+        self._site_info: Optional[Tuple[Dict[str, Any], float]] = None
+        self._site_info_lock = threading.Lock()
+        self._site_info_refreshing = False
+        # Поддержка /batch/v1 по маршрутам (posts, comments, ...); отсутствие ключа - еще не проверяли
+        self.batch_routes: Dict[str, bool] = {}
     
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Выполняет HTTP запрос к WordPress API"""
-        url = urljoin(API_BASE + "/", endpoint.lstrip("/"))
+    @property
+    def media_index(self):
+        """Индекс медиафайлов (открывается при первом обращении; None, если отключен)"""
+        global _shared_media_index
+        if _shared_media_index is None and WORDPRESS_MEDIA_INDEX:
+            with _shared_lock:
+                if _shared_media_index is None:
+                    from media_index import MediaIndex
+                    _shared_media_index = MediaIndex(WORDPRESS_MEDIA_INDEX)
+        return _shared_media_index
+    
+    @property
+    def download_client(self) -> httpx.Client:
+        """Пул соединений для скачивания файлов из внешних источников"""
+        global _shared_download_client
+        if _shared_download_client is None:
+            with _shared_lock:
+                if _shared_download_client is None:
+                    _shared_download_client = httpx.Client(timeout=WORDPRESS_TIMEOUT)
+        return _shared_download_client
+    
+    def _on_request(self, request: httpx.Request) -> None:
+        """Отмечает запись для кэша устаревших ответов"""
+        if request.method not in ("GET", "HEAD"):
+            self.stale.bump()
+    
+    @staticmethod
+    def _error_message(e: httpx.HTTPStatusError) -> str:
+        """Текст ошибки WordPress для исключения инструмента"""
+        error_msg = f"HTTP {e.response.status_code}"
+        if e.response.text:
+            try:
+                error_data = e.response.json()
+                error_msg += f": {error_data.get('message', e.response.text)}"
+            except:
+                error_msg += f": {e.response.text}"
+        return error_msg
+    
+    @staticmethod
+    def _error_code(response: httpx.Response) -> Optional[str]:
+        """Код ошибки WordPress REST (поле code) или None"""
+        try:
+            body = response.json()
+        except ValueError:
+            return None
+        return body.get("code") if isinstance(body, dict) else None
+    
+    def _send(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Выполняет HTTP запрос к WordPress API и возвращает ответ целиком"""
+        url = urljoin(self.api_base + "/", endpoint.lstrip("/"))
         
         try:
             response = self.client.request(method, url, **kwargs)
             response.raise_for_status()
-            return response.json()
+            return response
         except httpx.HTTPStatusError as e:
-            error_msg = f"HTTP {e.response.status_code}"
-            if e.response.text:
-                try:
-                    error_data = e.response.json()
-                    error_msg += f": {error_data.get('message', e.response.text)}"
-                except:
-                    error_msg += f": {e.response.text}"
-            raise Exception(error_msg)
+            raise Exception(self._error_message(e))
         except httpx.RequestError as e:
             raise Exception(f"Ошибка подключения: {str(e)}")
     
+    def iter_list(self, endpoint: str, params: Optional[Dict] = None) -> Iterator[Dict[str, Any]]:
+        """
+        GET запрос списка с потоковым разбором: элементы выдаются по мере получения тела,
+        поэтому ответ целиком (байты и дерево JSON) не держится в памяти
+        """
+        url = urljoin(self.api_base + "/", endpoint.lstrip("/"))
+        
+        try:
+            with self.client.stream("GET", url, params=params) as response:
+                if response.is_error:
+                    response.read()
+                    response.raise_for_status()
+                yield from iter_array(response.iter_bytes())
+        except httpx.HTTPStatusError as e:
+            raise Exception(self._error_message(e))
+        except httpx.RequestError as e:
+            raise Exception(f"Ошибка подключения: {str(e)}")
+    
+    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Выполняет HTTP запрос к WordPress API"""
+        return self._send(method, endpoint, **kwargs).json()
+    
     def get(self, endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
         """GET запрос"""
         return self._request("GET", endpoint, params=params)
     
+    def count(self, endpoint: str, params: Optional[Dict] = None) -> Optional[int]:
+        """Возвращает общее число элементов списка по заголовку X-WP-Total"""
+        params = {**(params or {}), "per_page": 1, "_fields": "id"}
+        total = self._send("GET", endpoint, params=params).headers.get("X-WP-Total")
+        return int(total) if total is not None else None
+    
+    def get_page(self, endpoint: str, params: Optional[Dict] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Возвращает страницу списка и общее число элементов по заголовку X-WP-Total"""
+        response = self._send("GET", endpoint, params=params)
+        total = response.headers.get("X-WP-Total")
+        return response.json(), int(total) if total is not None else None
+    
+    def search_types(self) -> Dict[str, str]:
+        """Типы записей сайта для поиска (slug -> rest_base), включая зарегистрированные плагинами"""
+        types = self.search_types_cache.get("types")
+        if types is not None:
+            return types
+        try:
+            registered = self.get("types")
+        except Exception:
+            # Без /wp/v2/types ищем по встроенным типам и повторим в следующий раз
+            return dict(DEFAULT_SEARCH_TYPES)
+        types = {}
+        for slug, info in (registered.items() if isinstance(registered, dict) else []):
+            if slug in SEARCH_EXCLUDED_TYPES or not isinstance(info, dict) or not info.get("rest_base"):
+                continue
+            # Типы из других пространств имен и невидимые на сайте не ищем
+            if info.get("rest_namespace", "wp/v2") != "wp/v2" or info.get("viewable") is False:
+                continue
+            types[slug] = info["rest_base"]
+        types = types or dict(DEFAULT_SEARCH_TYPES)
+        self.search_types_cache.set("types", types)
+        return types
+    
+    def get_all(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict[str, Any]]:
+        """Получает все страницы списка; страницы после первой запрашиваются параллельно"""
+        params = dict(params or {})
+        params.setdefault("per_page", 100)
+        params["page"] = 1
+        response = self._send("GET", endpoint, params=params)
+        items = response.json()
+        total_pages = int(response.headers.get("X-WP-TotalPages", "1") or 1)
+        if total_pages > 1:
+            def fetch_page(page: int) -> List[Dict[str, Any]]:
+                return self.get(endpoint, params={**params, "page": page})
+            
+            workers = min(WORDPRESS_PAGINATION_CONCURRENCY, total_pages - 1)
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                for page_items in executor.map(fetch_page, range(2, total_pages + 1)):
+                    items.extend(page_items)
+        return items
+    
+    def batch(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Dict[str, Any]]:
+        """
+        Выполняет группу запросов (method, endpoint, data); возвращает результаты по порядку.
+        Использует /batch/v1, если маршрут его поддерживает, иначе отправляет запросы параллельно.
+        """
+        results: List[Dict[str, Any]] = []
+        for start in range(0, len(requests), WORDPRESS_BATCH_SIZE):
+            chunk = requests[start:start + WORDPRESS_BATCH_SIZE]
+            routes = {endpoint.lstrip("/").split("/")[0] for _, endpoint, _ in chunk}
+            if all(self.batch_routes.get(route, True) for route in routes):
+                chunk_results = self._batch_api(chunk)
+            else:
+                chunk_results = [None] * len(chunk)
+            
+            # Запросы, которые batch API не принял, выполняем по отдельности
+            pending = [i for i, result in enumerate(chunk_results) if result is None]
+            if pending:
+                for i, result in zip(pending, self._batch_parallel([chunk[i] for i in pending])):
+                    chunk_results[i] = result
+            results.extend(chunk_results)
+        return results
+    
+    def _batch_api(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Optional[Dict[str, Any]]]:
+        """Отправляет группу запросов через /batch/v1; None - запрос не принят batch API"""
+        payload = {
+            "validation": "normal",
+            "requests": [
+                {"method": method, "path": f"/wp/v2/{endpoint.lstrip('/')}", "body": data or {}}
+                for method, endpoint, data in requests
+            ]
+        }
+        routes = [endpoint.lstrip("/").split("/")[0] for _, endpoint, _ in requests]
+        try:
+            response = self.client.post(f"{self.url}/wp-json/batch/v1", json=payload)
+            response.raise_for_status()
+            responses = response.json().get("responses", [])
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404 or self._error_code(e.response) in BATCH_UNSUPPORTED_CODES:
+                self.batch_routes.update(dict.fromkeys(routes, False))
+                return [None] * len(requests)
+            return [{"success": False, "error": self._error_message(e)}] * len(requests)
+        except Exception as e:
+            # Запросы могли быть выполнены, поэтому повторно их не отправляем
+            error = f"Ошибка подключения: {e}" if isinstance(e, httpx.RequestError) else str(e)
+            return [{"success": False, "error": error}] * len(requests)
+        
+        results: List[Optional[Dict[str, Any]]] = []
+        for route, item in zip(routes, responses):
+            body = item.get("body") or {}
+            status = item.get("status", 200)
+            message = body.get("message", "") if isinstance(body, dict) else body
+            if status >= 400 and isinstance(body, dict) and body.get("code") in BATCH_UNSUPPORTED_CODES:
+                self.batch_routes[route] = False
+                results.append(None)
+            elif status >= 400:
+                results.append({"success": False, "error": f"HTTP {status}: {message}"})
+            else:
+                self.batch_routes[route] = True
+                results.append({"success": True, "data": body})
+        missing = {"success": False, "error": "batch API не вернул результат запроса"}
+        results.extend([missing] * (len(requests) - len(results)))
+        return results
+    
+    def _batch_parallel(self, requests: List[Tuple[str, str, Optional[Dict]]]) -> List[Dict[str, Any]]:
+        """Выполняет группу запросов параллельно отдельными вызовами"""
+        def run(request: Tuple[str, str, Optional[Dict]]) -> Dict[str, Any]:
+            method, endpoint, data = request
+            try:
+                if method == "DELETE":
+                    return {"success": True, "data": self._request(method, endpoint, params=data)}
+                return {"success": True, "data": self._request(method, endpoint, json=data)}
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(WORDPRESS_WRITE_CONCURRENCY, len(requests)))) as executor:
+            return list(executor.map(run, requests))
+    
     def post(self, endpoint: str, data: Optional[Dict] = None) -> Dict[str, Any]:
         """POST запрос"""
         return self._request("POST", endpoint, json=data)
@@ -87,18 +488,200 @@ class WordPressClient:
         """DELETE запрос"""
         return self._request("DELETE", endpoint, params=params)
     
-    def upload_media(self, file_url: str, title: Optional[str] = None, alt_text: Optional[str] = None) -> Dict[str, Any]:
-        """Загружает медиафайл по URL"""
-        # Скачиваем файл
+    def _load_site_info(self) -> Dict[str, Any]:
+        """Параллельно запрашивает корень REST API и текущего пользователя"""
+        def current_user() -> Optional[Dict[str, Any]]:
+            try:
+                return self.get("users/me")
+            except Exception:
+                return None
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            site_future = executor.submit(self.get, "")
+            user_future = executor.submit(current_user)
+            info = {"site": site_future.result(), "user": user_future.result()}
+        with self._site_info_lock:
+            self._site_info = (info, time.monotonic())
+        return info
+    
+    def _refresh_site_info(self) -> None:
+        """Обновляет информацию о сайте в фоне (не более одного обновления одновременно)"""
+        with self._site_info_lock:
+            if self._site_info_refreshing:
+                return
+            self._site_info_refreshing = True
+        
+        def refresh() -> None:
+            try:
+                self._load_site_info()
+            except Exception:
+                pass
+            finally:
+                with self._site_info_lock:
+                    self._site_info_refreshing = False
+        
+        threading.Thread(target=refresh, daemon=True).start()
+    
+    def site_info(self, refresh: bool = False) -> Dict[str, Any]:
+        """Возвращает информацию о сайте и текущем пользователе из кэша"""
+        with self._site_info_lock:
+            entry = self._site_info
+        if entry and not refresh:
+            info, loaded = entry
+            age = time.monotonic() - loaded
+            if age < WORDPRESS_SITE_INFO_TTL:
+                if age > WORDPRESS_SITE_INFO_TTL / 2:
+                    self._refresh_site_info()
+                return info
+        return self._load_site_info()
+    
+    def cache_entity(self, endpoint: str, item: Dict[str, Any]) -> Term:
+        """Сохраняет краткое описание пользователя или термина в общий кэш (компактной записью)"""
+        entity = Term.from_rest(item)
+        self.entity_cache.set((endpoint, entity.id), entity)
+        return entity
+    
+    def resolve_entities(self, endpoint: str, ids: List[int]) -> Dict[int, Term]:
+        """Возвращает пользователей или термины по ID; недостающие запрашиваются одним запросом include"""
+        resolved: Dict[int, Term] = {}
+        missing = []
+        for entity_id in dict.fromkeys(ids):
+            entity = self.entity_cache.get((endpoint, entity_id))
+            if entity is None:
+                missing.append(entity_id)
+            else:
+                resolved[entity_id] = entity
+        for start in range(0, len(missing), 100):
+            chunk = missing[start:start + 100]
+            items = self.get(endpoint, params={
+                "include": ",".join(map(str, chunk)),
+                "per_page": len(chunk),
+                "_fields": "id,name,slug,link"
+            })
+            for item in items:
+                resolved[item["id"]] = self.cache_entity(endpoint, item)
+        return resolved
+    
+    def expand_posts(self, posts: List[Dict[str, Any]]) -> None:
+        """Заменяет ID автора, категорий и тегов описаниями (параллельно по типам сущностей)"""
+        fields = {"author": "users", "categories": "categories", "tags": "tags"}
+        ids = {field: [] for field in fields}
+        for post in posts:
+            for field in fields:
+                value = post.get(field)
+                if isinstance(value, list):
+                    ids[field].extend(value)
+                elif value:
+                    ids[field].append(value)
+        
+        with ThreadPoolExecutor(max_workers=len(fields)) as executor:
+            futures = {
+                field: executor.submit(self.resolve_entities, endpoint, ids[field])
+                for field, endpoint in fields.items() if ids[field]
+            }
+            resolved = {field: future.result() for field, future in futures.items()}
+        
+        for post in posts:
+            for field in resolved:
+                value = post.get(field)
+                if isinstance(value, list):
+                    post[field] = [_entity_dict(resolved[field], i) for i in value]
+                elif value:
+                    post[field] = _entity_dict(resolved[field], value)
+    
+    def _download(self, file_url: str, etag: Optional[str] = None) -> httpx.Response:
+        """Скачивает файл по URL (с условным запросом, если известен ETag)"""
+        headers = {"If-None-Match": etag} if etag else {}
         try:
-            file_response = httpx.get(file_url, timeout=WORDPRESS_TIMEOUT)
-            file_response.raise_for_status()
-            file_content = file_response.content
-            file_name = os.path.basename(file_url)
+            response = self.download_client.get(file_url, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+            return response
         except Exception as e:
             raise Exception(f"Не удалось загрузить файл: {str(e)}")
+    
+    def _get_indexed_media(self, media_id: int) -> Optional[Dict[str, Any]]:
+        """Возвращает медиафайл из индекса, если он все еще существует в WordPress"""
+        try:
+            result = self.get(f"media/{media_id}")
+        except Exception:
+            self.media_index.forget(self.url, media_id)
+            return None
+        result["deduplicated"] = True
+        return result
+    
+    def fetch_media(self, file_url: str) -> Dict[str, Any]:
+        """Скачивает файл и проверяет индекс; existing содержит найденный медиафайл"""
+        known = self.media_index.find_by_url(self.url, file_url) if self.media_index else None
+        
+        # Скачиваем файл; 304 означает, что источник не менялся с прошлой загрузки
+        file_response = self._download(file_url, known["etag"] if known else None)
+        if file_response.status_code == 304:
+            existing = self._get_indexed_media(known["media_id"])
+            if existing:
+                return {"existing": existing}
+            file_response = self._download(file_url)
+        fetched = {
+            "existing": None,
+            "file_name": os.path.basename(file_url),
+            "content": file_response.content,
+            "sha256": _sha256(file_response.content),
+            "etag": file_response.headers.get("ETag")
+        }
+        
+        # Тот же файл мог быть загружен раньше с другого URL
+        if self.media_index:
+            media_id = self.media_index.find_by_hash(self.url, fetched["sha256"])
+            if media_id:
+                existing = self._get_indexed_media(media_id)
+                if existing:
+                    self.media_index.record(self.url, media_id, source_url=file_url, etag=fetched["etag"])
+                    fetched["existing"] = existing
+        return fetched
+    
+    def optimize_media(self, file_name: str, content: bytes) -> Tuple[str, bytes, Optional[str]]:
+        """
+        Оптимизирует изображение в пуле процессов; возвращает (имя файла, байты, причина),
+        где причина - почему файл оставлен как есть (None, если оптимизирован)
+        """
+        import image_optimizer
+        from concurrent.futures import ProcessPoolExecutor
         
-        # Загружаем в WordPress
+        if WORDPRESS_IMAGE_FORMAT not in image_optimizer.OUTPUT_FORMATS:
+            return file_name, content, f"неизвестный формат WORDPRESS_IMAGE_FORMAT: {WORDPRESS_IMAGE_FORMAT}"
+        if not image_optimizer.is_available():
+            return file_name, content, "не установлен Pillow"
+        global _shared_image_pool
+        with _shared_lock:
+            if _shared_image_pool is None:
+                _shared_image_pool = ProcessPoolExecutor(max_workers=max(1, WORDPRESS_IMAGE_WORKERS))
+        optimized = _shared_image_pool.submit(
+            image_optimizer.optimize_image,
+            content,
+            file_name,
+            WORDPRESS_IMAGE_MAX_DIMENSION,
+            WORDPRESS_IMAGE_FORMAT,
+            WORDPRESS_IMAGE_QUALITY
+        ).result()
+        if isinstance(optimized, str):
+            return file_name, content, optimized
+        return optimized[1], optimized[0], None
+    
+    def store_media(
+        self,
+        file_url: str,
+        fetched: Dict[str, Any],
+        title: Optional[str] = None,
+        alt_text: Optional[str] = None,
+        optimize: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Загружает скачанный файл в WordPress и добавляет его в индекс"""
+        file_name, file_content = fetched["file_name"], fetched["content"]
+        if optimize is None:
+            optimize = WORDPRESS_IMAGE_OPTIMIZE
+        skipped = None
+        if optimize:
+            file_name, file_content, skipped = self.optimize_media(file_name, file_content)
         files = {
             "file": (file_name, file_content)
         }
@@ -108,29 +691,291 @@ class WordPressClient:
         if alt_text:
             data["alt_text"] = alt_text
         
-        url = urljoin(API_BASE + "/", "media")
+        url = urljoin(self.api_base + "/", "media")
         response = self.client.post(url, files=files, data=data)
         response.raise_for_status()
-        return response.json()
+        result = response.json()
+        if self.media_index:
+            self.media_index.record(
+                self.url, result["id"], sha256=fetched["sha256"], source_url=file_url, etag=fetched["etag"]
+            )
+        if optimize:
+            result["optimized"] = skipped is None
+            if skipped:
+                result["optimize_skipped"] = skipped
+        return result
+    
+    def upload_media(
+        self,
+        file_url: str,
+        title: Optional[str] = None,
+        alt_text: Optional[str] = None,
+        optimize: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """Загружает медиафайл по URL (повторная загрузка того же файла возвращает существующий)"""
+        fetched = self.fetch_media(file_url)
+        if fetched["existing"]:
+            return fetched["existing"]
+        return self.store_media(file_url, fetched, title, alt_text, optimize)
+    
+    def index_media(self, media_items: List[Dict[str, Any]]) -> int:
+        """Заполняет индекс по уже существующим медиафайлам (скачивает их для подсчета хэша)"""
+        if not self.media_index:
+            return 0
+        indexed = 0
+        for media in media_items:
+            try:
+                file_response = self._download(media["source_url"])
+            except Exception:
+                continue
+            self.media_index.record(
+                self.url,
+                media["id"],
+                sha256=_sha256(file_response.content),
+                source_url=media["source_url"],
+                etag=file_response.headers.get("ETag")
+            )
+            indexed += 1
+        return indexed
+    
+    def retire(self) -> None:
+        """Закрывает соединения сайта, вытесненного из реестра, после завершения текущих запросов"""
+        self.transport.retire()
     
     def close(self):
         """Закрывает HTTP клиент"""
         self.client.close()
+        self.stale.close()
 
 
-# Глобальный клиент WordPress
-wp_client: Optional[WordPressClient] = None
+def close_shared() -> None:
+    """Закрывает общие для всех сайтов ресурсы"""
+    with _shared_lock:
+        if _shared_download_client:
+            _shared_download_client.close()
+        if _shared_media_index:
+            _shared_media_index.close()
+        if _shared_image_pool:
+            _shared_image_pool.shutdown()
 
 
-def get_client() -> WordPressClient:
-    """Получает или создает клиент WordPress"""
-    global wp_client
-    if wp_client is None:
-        try:
-            wp_client = WordPressClient()
-        except ValueError as e:
-            raise Exception(f"Ошибка конфигурации: {str(e)}. Проверьте настройки в .env файле.")
-    return wp_client
+def _site_configs() -> Dict[str, SiteConfig]:
+    """Сайты из WORDPRESS_SITES и основной сайт из WORDPRESS_URL"""
+    configs: Dict[str, SiteConfig] = {}
+    if WORDPRESS_URL or WORDPRESS_USERNAME or WORDPRESS_APP_PASSWORD:
+        if not all([WORDPRESS_URL, WORDPRESS_USERNAME, WORDPRESS_APP_PASSWORD]):
+            raise ValueError("Необходимо настроить WORDPRESS_URL, WORDPRESS_USERNAME и WORDPRESS_APP_PASSWORD")
+        configs[WORDPRESS_DEFAULT_SITE] = SiteConfig(
+            name=WORDPRESS_DEFAULT_SITE,
+            url=WORDPRESS_URL,
+            username=WORDPRESS_USERNAME,
+            password=WORDPRESS_APP_PASSWORD,
+            concurrency=WORDPRESS_SITE_CONCURRENCY,
+            read_urls=WORDPRESS_READ_URLS
+        )
+    for name, config in load_site_configs(WORDPRESS_SITES, WORDPRESS_SITE_CONCURRENCY).items():
+        configs.setdefault(name, config)
+    if not configs:
+        raise ValueError("Необходимо настроить WORDPRESS_URL, WORDPRESS_USERNAME и WORDPRESS_APP_PASSWORD или WORDPRESS_SITES")
+    return configs
+
+
+# Реестр сайтов с клиентами WordPress (создаются при первом обращении)
+sites: Optional[SiteRegistry] = None
+_sites_lock = threading.Lock()
+
+
+def get_sites() -> SiteRegistry:
+    """Получает или создает реестр сайтов"""
+    global sites
+    if sites is None:
+        with _sites_lock:
+            if sites is None:
+                try:
+                    configs = _site_configs()
+                except (ValueError, OSError) as e:
+                    raise Exception(f"Ошибка конфигурации: {str(e)}. Проверьте настройки в .env файле.")
+                sites = SiteRegistry(
+                    configs,
+                    factory=WordPressClient,
+                    retire=WordPressClient.retire,
+                    default_site=WORDPRESS_DEFAULT_SITE if WORDPRESS_DEFAULT_SITE in configs else next(iter(configs)),
+                    max_active=WORDPRESS_MAX_ACTIVE_SITES,
+                    idle_ttl=WORDPRESS_SITE_IDLE_TTL
+                )
+    return sites
+
+
+def get_client(site: Optional[str] = None) -> WordPressClient:
+    """Получает клиент WordPress для сайта из реестра (без имени - основной сайт)"""
+    registry = get_sites()
+    try:
+        return registry.get(site)
+    except UnknownSite:
+        raise Exception(f"Неизвестный сайт '{site}'. Доступные сайты: {', '.join(registry.configs)}")
+
+
+job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Получает или открывает очередь фоновых заданий и запускает ее рабочие потоки"""
+    global job_queue
+    if not WORDPRESS_JOB_QUEUE:
+        raise Exception("Фоновые задания отключены: задайте WORDPRESS_JOB_QUEUE в .env файле")
+    if job_queue is None:
+        with _job_queue_lock:
+            if job_queue is None:
+                from job_queue import JobQueue
+                queue = JobQueue(
+                    WORDPRESS_JOB_QUEUE,
+                    JOB_HANDLERS,
+                    workers=WORDPRESS_JOB_WORKERS,
+                    max_attempts=WORDPRESS_JOB_MAX_ATTEMPTS,
+                    once=ONCE_JOBS
+                )
+                queue.start()
+                job_queue = queue
+    return job_queue
+
+
+def _enqueue_job(kind: str, arguments: Dict[str, Any], total: int = 1) -> Dict[str, Any]:
+    """Ставит вызов инструмента в очередь фоновых заданий вместо немедленного выполнения"""
+    def plain(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return value.model_dump()
+        if isinstance(value, list):
+            return [plain(v) for v in value]
+        return value
+    
+    payload = {name: plain(value) for name, value in arguments.items() if name != "background"}
+    
+    def submit() -> Dict[str, Any]:
+        job_id = get_job_queue().submit(kind, payload, total=total)
+        return {
+            "success": True,
+            "queued": True,
+            "job_id": job_id,
+            "message": f"Задание {job_id} поставлено в очередь; состояние - wp_job_status"
+        }
+    
+    # Повтор фонового вызова с тем же ключом возвращает то же задание
+    client = get_client(payload.get("site"))
+    return _idempotent(client, f"{kind}:background", payload.get("idempotency_key"), payload, submit)
+
+
+def _idempotent(
+    client: "WordPressClient",
+    tool: str,
+    idempotency_key: Optional[str],
+    arguments: Dict[str, Any],
+    create: Callable[[], Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Выполняет создающий вызов не более одного раза для ключа идемпотентности (ключи у каждого сайта свои)"""
+    if not idempotency_key:
+        return create()
+    result, replayed = client.idempotency.run((tool, idempotency_key), arguments, create)
+    return {**result, "replayed": True} if replayed else result
+
+
+def _content_fields(
+    client: "WordPressClient",
+    item: Dict[str, Any],
+    kind: str,
+    content_format: str,
+    max_chars: Optional[int],
+    max_tokens: Optional[int]
+) -> Dict[str, Any]:
+    """Содержимое поста или страницы в запрошенном формате и объеме"""
+    content = item["content"]["rendered"]
+    if content_format == "html" and not max_chars and not max_tokens:
+        return {"content": content}
+    # Версия содержимого определяется датой изменения, поэтому сброс кэша не нужен
+    cache_key = (client.url, kind, item["id"], item.get("modified"))
+    rendered = render_content(content, content_format, max_chars, max_tokens, cache_key)
+    return {
+        "content": rendered["rendered"],
+        "content_format": rendered["format"],
+        "content_length": rendered["length"],
+        "truncated": rendered["truncated"]
+    }
+
+
+# Инструменты чтения по имени (для прогрева) и частота их вызовов
+_read_tools: Dict[str, Callable[..., Dict[str, Any]]] = {}
+# Инструменты со своим кэшем: прогрев вызывает их с refresh=True
+_self_cached_tools: Set[str] = set()
+access_tracker = AccessTracker()
+
+
+def _stale_key(name: str, kwargs: Dict[str, Any]) -> Tuple[str, str]:
+    return name, json.dumps(kwargs, sort_keys=True, default=str)
+
+
+def _serve_stale(tool: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Декоратор инструмента чтения: последний успешный ответ отдается сразу с фоновым
+    обновлением, при ошибке или медленном ответе WordPress (с пометкой stale: true)
+    """
+    _read_tools[tool.__name__] = tool
+    
+    @functools.wraps(tool)
+    def wrapper(**kwargs: Any) -> Dict[str, Any]:
+        client = get_client(kwargs.get("site"))
+        access_tracker.record({"tool": tool.__name__, "args": kwargs})
+        # Явный refresh всегда идет в WordPress
+        if kwargs.get("refresh"):
+            return tool(**kwargs)
+        return client.stale.serve(_stale_key(tool.__name__, kwargs), lambda: tool(**kwargs))
+    
+    return wrapper
+
+
+def _warmable(tool: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """
+    Декоратор инструмента чтения со своим кэшем (TTLCache клиента): учитывает вызовы
+    для прогрева, но не кэширует ответы второй раз
+    """
+    _read_tools[tool.__name__] = tool
+    _self_cached_tools.add(tool.__name__)
+    
+    @functools.wraps(tool)
+    def wrapper(**kwargs: Any) -> Dict[str, Any]:
+        access_tracker.record({"tool": tool.__name__, "args": kwargs})
+        return tool(**kwargs)
+    
+    return wrapper
+
+
+def _tool_arguments(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    """Аргументы вызова инструмента чтения со значениями по умолчанию, как их передает MCP"""
+    tool = _read_tools.get(name)
+    if tool is None:
+        raise ValueError(f"Неизвестный инструмент чтения для прогрева: {name}")
+    arguments = {}
+    for parameter in inspect.signature(tool).parameters.values():
+        default = parameter.default
+        if isinstance(default, FieldInfo):
+            default = default.default
+        if default is not inspect.Parameter.empty and default is not PydanticUndefined:
+            arguments[parameter.name] = default
+    arguments.update(args)
+    missing = [p for p in inspect.signature(tool).parameters if p not in arguments]
+    if missing:
+        raise ValueError(f"В плане прогрева для {name} не хватает аргументов: {', '.join(missing)}")
+    return arguments
+
+
+def _warm_call(call: Dict[str, Any]) -> Dict[str, Any]:
+    """Обновляет сохраненный результат вызова инструмента чтения"""
+    name, kwargs = call["tool"], call["args"]
+    tool = _read_tools[name]
+    if name in _self_cached_tools:
+        return tool(**{**kwargs, "refresh": True})
+    client = get_client(kwargs.get("site"))
+    # Прогретый результат отдается сразу до следующего прогрева
+    return client.stale.prefetch(_stale_key(name, kwargs), lambda: tool(**kwargs), fresh=WORDPRESS_WARMUP_INTERVAL)
 
 
 # ==================== ИНСТРУМЕНТЫ ДЛЯ ПОСТОВ ====================
@@ -143,10 +988,15 @@ def wp_create_post(
     excerpt: Optional[str] = Field(None, description="Краткое описание поста"),
     categories: Optional[List[int]] = Field(None, description="ID категорий"),
     tags: Optional[List[int]] = Field(None, description="ID тегов"),
-    featured_media: Optional[int] = Field(None, description="ID изображения для обложки")
+    featured_media: Optional[int] = Field(None, description="ID изображения для обложки"),
+    idempotency_key: Optional[str] = Field(None, description="Ключ идемпотентности: повтор с тем же ключом вернет результат первого вызова"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
 ) -> Dict[str, Any]:
     """Создает новый пост в WordPress"""
-    client = get_client()
+    if background:
+        return _enqueue_job("wp_create_post", locals())
+    client = get_client(site)
     data = {
         "title": title,
         "content": content,
@@ -161,51 +1011,68 @@ def wp_create_post(
     if featured_media:
         data["featured_media"] = featured_media
     
-    result = client.post("posts", data=data)
-    return {
-        "success": True,
-        "message": f"Пост '{title}' успешно создан",
-        "post": {
-            "id": result["id"],
-            "title": result["title"]["rendered"],
-            "link": result["link"],
-            "status": result["status"]
+    def create() -> Dict[str, Any]:
+        result = client.post("posts", data=data)
+        return {
+            "success": True,
+            "message": f"Пост '{title}' успешно создан",
+            "post": {
+                "id": result["id"],
+                "title": result["title"]["rendered"],
+                "link": result["link"],
+                "status": result["status"]
+            }
         }
-    }
+    
+    return _idempotent(client, "wp_create_post", idempotency_key, data, create)
 
 
 @mcp.tool()
-def wp_get_post(post_id: int = Field(..., description="ID поста")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_post(
+    post_id: int = Field(..., description="ID поста"),
+    expand: bool = Field(False, description="Раскрыть автора, категории и теги (имена вместо ID)"),
+    content_format: str = Field("html", description="Формат содержимого: html, text (чистый текст) или markdown"),
+    max_chars: Optional[int] = Field(None, description="Обрезать содержимое text/markdown до N символов по границе предложения"),
+    max_tokens: Optional[int] = Field(None, description="Обрезать содержимое text/markdown до ~N токенов (около 4 символов на токен)"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает пост по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"posts/{post_id}")
+    post = {
+        "id": result["id"],
+        "title": result["title"]["rendered"],
+        **_content_fields(client, result, "post", content_format, max_chars, max_tokens),
+        "excerpt": result["excerpt"]["rendered"],
+        "status": result["status"],
+        "date": result["date"],
+        "link": result["link"],
+        "author": result["author"],
+        "categories": result["categories"],
+        "tags": result["tags"]
+    }
+    if expand:
+        client.expand_posts([post])
     return {
         "success": True,
-        "post": {
-            "id": result["id"],
-            "title": result["title"]["rendered"],
-            "content": result["content"]["rendered"],
-            "excerpt": result["excerpt"]["rendered"],
-            "status": result["status"],
-            "date": result["date"],
-            "link": result["link"],
-            "author": result["author"],
-            "categories": result["categories"],
-            "tags": result["tags"]
-        }
+        "post": post
     }
 
 
 @mcp.tool()
+@_serve_stale
 def wp_list_posts(
     per_page: int = Field(10, description="Количество постов на странице"),
     page: int = Field(1, description="Номер страницы"),
     status: Optional[str] = Field(None, description="Фильтр по статусу: publish, draft, pending, private"),
     search: Optional[str] = Field(None, description="Поисковый запрос"),
-    categories: Optional[List[int]] = Field(None, description="Фильтр по категориям (ID)")
+    categories: Optional[List[int]] = Field(None, description="Фильтр по категориям (ID)"),
+    expand: bool = Field(False, description="Добавить автора, категории и теги с именами"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список постов"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -217,7 +1084,7 @@ def wp_list_posts(
     if categories:
         params["categories"] = ",".join(map(str, categories))
     
-    result = client.get("posts", params=params)
+    result = client.iter_list("posts", params=params)
     posts = []
     for post in result:
         posts.append({
@@ -228,6 +1095,10 @@ def wp_list_posts(
             "date": post["date"],
             "link": post["link"]
         })
+        if expand:
+            posts[-1].update(author=post["author"], categories=post["categories"], tags=post["tags"])
+    if expand:
+        client.expand_posts(posts)
     
     return {
         "success": True,
@@ -244,10 +1115,14 @@ def wp_update_post(
     status: Optional[str] = Field(None, description="Новый статус"),
     excerpt: Optional[str] = Field(None, description="Новое краткое описание"),
     categories: Optional[List[int]] = Field(None, description="ID категорий"),
-    tags: Optional[List[int]] = Field(None, description="ID тегов")
+    tags: Optional[List[int]] = Field(None, description="ID тегов"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
 ) -> Dict[str, Any]:
     """Обновляет существующий пост"""
-    client = get_client()
+    if background:
+        return _enqueue_job("wp_update_post", locals())
+    client = get_client(site)
     data = {}
     if title:
         data["title"] = title
@@ -278,10 +1153,11 @@ def wp_update_post(
 @mcp.tool()
 def wp_delete_post(
     post_id: int = Field(..., description="ID поста для удаления"),
-    force: bool = Field(False, description="Принудительное удаление (минуя корзину)")
+    force: bool = Field(False, description="Принудительное удаление (минуя корзину)"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Удаляет пост"""
-    client = get_client()
+    client = get_client(site)
     params = {"force": force} if force else {}
     result = client.delete(f"posts/{post_id}", params=params)
     return {
@@ -300,10 +1176,15 @@ def wp_create_page(
     status: str = Field("publish", description="Статус страницы: draft, publish, pending, private"),
     excerpt: Optional[str] = Field(None, description="Краткое описание страницы"),
     parent: Optional[int] = Field(None, description="ID родительской страницы"),
-    template: Optional[str] = Field(None, description="Шаблон страницы")
+    template: Optional[str] = Field(None, description="Шаблон страницы"),
+    idempotency_key: Optional[str] = Field(None, description="Ключ идемпотентности: повтор с тем же ключом вернет результат первого вызова"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
 ) -> Dict[str, Any]:
     """Создает новую страницу в WordPress"""
-    client = get_client()
+    if background:
+        return _enqueue_job("wp_create_page", locals())
+    client = get_client(site)
     data = {
         "title": title,
         "content": content,
@@ -316,30 +1197,41 @@ def wp_create_page(
     if template:
         data["template"] = template
     
-    result = client.post("pages", data=data)
-    return {
-        "success": True,
-        "message": f"Страница '{title}' успешно создана",
-        "page": {
-            "id": result["id"],
-            "title": result["title"]["rendered"],
-            "link": result["link"],
-            "status": result["status"]
+    def create() -> Dict[str, Any]:
+        result = client.post("pages", data=data)
+        client.page_tree_cache.clear()
+        return {
+            "success": True,
+            "message": f"Страница '{title}' успешно создана",
+            "page": {
+                "id": result["id"],
+                "title": result["title"]["rendered"],
+                "link": result["link"],
+                "status": result["status"]
+            }
         }
-    }
+    
+    return _idempotent(client, "wp_create_page", idempotency_key, data, create)
 
 
 @mcp.tool()
-def wp_get_page(page_id: int = Field(..., description="ID страницы")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_page(
+    page_id: int = Field(..., description="ID страницы"),
+    content_format: str = Field("html", description="Формат содержимого: html, text (чистый текст) или markdown"),
+    max_chars: Optional[int] = Field(None, description="Обрезать содержимое text/markdown до N символов по границе предложения"),
+    max_tokens: Optional[int] = Field(None, description="Обрезать содержимое text/markdown до ~N токенов (около 4 символов на токен)"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает страницу по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"pages/{page_id}")
     return {
         "success": True,
         "page": {
             "id": result["id"],
             "title": result["title"]["rendered"],
-            "content": result["content"]["rendered"],
+            **_content_fields(client, result, "page", content_format, max_chars, max_tokens),
             "excerpt": result["excerpt"]["rendered"],
             "status": result["status"],
             "date": result["date"],
@@ -350,15 +1242,17 @@ def wp_get_page(page_id: int = Field(..., description="ID страницы")) ->
 
 
 @mcp.tool()
+@_serve_stale
 def wp_list_pages(
     per_page: int = Field(10, description="Количество страниц на странице"),
     page: int = Field(1, description="Номер страницы"),
     status: Optional[str] = Field(None, description="Фильтр по статусу"),
     search: Optional[str] = Field(None, description="Поисковый запрос"),
-    parent: Optional[int] = Field(None, description="ID родительской страницы")
+    parent: Optional[int] = Field(None, description="ID родительской страницы"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список страниц"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -370,7 +1264,7 @@ def wp_list_pages(
     if parent:
         params["parent"] = parent
     
-    result = client.get("pages", params=params)
+    result = client.iter_list("pages", params=params)
     pages = []
     for page_item in result:
         pages.append({
@@ -397,10 +1291,14 @@ def wp_update_page(
     content: Optional[str] = Field(None, description="Новое содержимое"),
     status: Optional[str] = Field(None, description="Новый статус"),
     excerpt: Optional[str] = Field(None, description="Новое краткое описание"),
-    parent: Optional[int] = Field(None, description="ID родительской страницы")
+    parent: Optional[int] = Field(None, description="ID родительской страницы"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
 ) -> Dict[str, Any]:
     """Обновляет существующую страницу"""
-    client = get_client()
+    if background:
+        return _enqueue_job("wp_update_page", locals())
+    client = get_client(site)
     data = {}
     if title:
         data["title"] = title
@@ -414,6 +1312,7 @@ def wp_update_page(
         data["parent"] = parent
     
     result = client.put(f"pages/{page_id}", data=data)
+    client.page_tree_cache.clear()
     return {
         "success": True,
         "message": f"Страница #{page_id} успешно обновлена",
@@ -429,12 +1328,14 @@ def wp_update_page(
 @mcp.tool()
 def wp_delete_page(
     page_id: int = Field(..., description="ID страницы для удаления"),
-    force: bool = Field(False, description="Принудительное удаление")
+    force: bool = Field(False, description="Принудительное удаление"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Удаляет страницу"""
-    client = get_client()
+    client = get_client(site)
     params = {"force": force} if force else {}
     result = client.delete(f"pages/{page_id}", params=params)
+    client.page_tree_cache.clear()
     return {
         "success": True,
         "message": f"Страница #{page_id} успешно удалена",
@@ -442,13 +1343,85 @@ def wp_delete_page(
     }
 
 
+def _load_page_index(client: WordPressClient, status: str) -> Dict[str, Any]:
+    """Загружает все страницы и строит индекс parent -> children (с кэшированием)"""
+    index = client.page_tree_cache.get(status)
+    if index is not None:
+        return index
+    
+    pages = client.get_all("pages", params={
+        "status": status,
+        "orderby": "menu_order",
+        "order": "asc",
+        "_fields": "id,parent,title,slug,status,menu_order,link"
+    })
+    nodes = {}
+    children: Dict[int, List[int]] = {}
+    for page_item in pages:
+        nodes[page_item["id"]] = PageNode.from_rest(page_item)
+        children.setdefault(page_item.get("parent", 0), []).append(page_item["id"])
+    
+    # Страницы, чей родитель не попал в выборку (например, черновик), считаем корневыми
+    for parent_id in list(children):
+        if parent_id and parent_id not in nodes:
+            children.setdefault(0, []).extend(children.pop(parent_id))
+    
+    index = {"nodes": nodes, "children": children}
+    client.page_tree_cache.set(status, index)
+    return index
+
+
+def _build_page_tree(index: Dict[str, Any], parent_id: int, depth: Optional[int]) -> List[Dict[str, Any]]:
+    """Строит дерево потомков страницы с ограничением глубины"""
+    tree = []
+    for child_id in index["children"].get(parent_id, []):
+        node = index["nodes"][child_id].to_dict()
+        child_count = len(index["children"].get(child_id, []))
+        if depth is None or depth > 1:
+            node["children"] = _build_page_tree(index, child_id, None if depth is None else depth - 1)
+        elif child_count:
+            node["child_count"] = child_count
+        tree.append(node)
+    return tree
+
+
+@mcp.tool()
+@_warmable
+def wp_get_page_tree(
+    root: int = Field(0, description="ID страницы, от которой строить дерево (0 - весь сайт)"),
+    max_depth: Optional[int] = Field(None, description="Максимальная глубина дерева (по умолчанию без ограничения)"),
+    status: str = Field("publish", description="Статус страниц: publish, draft, private, any"),
+    refresh: bool = Field(False, description="Перечитать страницы из WordPress, игнорируя кэш"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
+    """Получает иерархию страниц сайта одним вызовом"""
+    client = get_client(site)
+    if refresh:
+        client.page_tree_cache.delete(status)
+    index = _load_page_index(client, status)
+    if root and root not in index["nodes"]:
+        return {"success": False, "error": f"Страница #{root} не найдена среди страниц со статусом '{status}'"}
+    
+    return {
+        "success": True,
+        "root": index["nodes"][root].to_dict() if root else None,
+        "total_pages": len(index["nodes"]),
+        "tree": _build_page_tree(index, root, max_depth)
+    }
+
+
 # ==================== ИНСТРУМЕНТЫ ДЛЯ ПОЛЬЗОВАТЕЛЕЙ ====================
 
 @mcp.tool()
-def wp_get_user(user_id: int = Field(..., description="ID пользователя")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_user(
+    user_id: int = Field(..., description="ID пользователя"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает пользователя по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"users/{user_id}")
+    client.cache_entity("users", result)
     return {
         "success": True,
         "user": {
@@ -465,14 +1438,16 @@ def wp_get_user(user_id: int = Field(..., description="ID пользовател
 
 
 @mcp.tool()
+@_serve_stale
 def wp_list_users(
     per_page: int = Field(10, description="Количество пользователей на странице"),
     page: int = Field(1, description="Номер страницы"),
     search: Optional[str] = Field(None, description="Поисковый запрос"),
-    roles: Optional[List[str]] = Field(None, description="Фильтр по ролям")
+    roles: Optional[List[str]] = Field(None, description="Фильтр по ролям"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список пользователей"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -482,7 +1457,7 @@ def wp_list_users(
     if roles:
         params["roles"] = ",".join(roles)
     
-    result = client.get("users", params=params)
+    result = client.iter_list("users", params=params)
     users = []
     for user in result:
         users.append({
@@ -507,10 +1482,12 @@ def wp_create_user(
     email: str = Field(..., description="Email пользователя"),
     password: str = Field(..., description="Пароль пользователя"),
     name: Optional[str] = Field(None, description="Отображаемое имя"),
-    roles: Optional[List[str]] = Field(None, description="Роли пользователя")
+    roles: Optional[List[str]] = Field(None, description="Роли пользователя"),
+    idempotency_key: Optional[str] = Field(None, description="Ключ идемпотентности: повтор с тем же ключом вернет результат первого вызова"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Создает нового пользователя"""
-    client = get_client()
+    client = get_client(site)
     data = {
         "username": username,
         "email": email,
@@ -521,17 +1498,20 @@ def wp_create_user(
     if roles:
         data["roles"] = roles
     
-    result = client.post("users", data=data)
-    return {
-        "success": True,
-        "message": f"Пользователь '{username}' успешно создан",
-        "user": {
-            "id": result["id"],
-            "username": result["username"],
-            "email": result["email"],
-            "name": result["name"]
+    def create() -> Dict[str, Any]:
+        result = client.post("users", data=data)
+        return {
+            "success": True,
+            "message": f"Пользователь '{username}' успешно создан",
+            "user": {
+                "id": result["id"],
+                "username": result["username"],
+                "email": result["email"],
+                "name": result["name"]
+            }
         }
-    }
+    
+    return _idempotent(client, "wp_create_user", idempotency_key, data, create)
 
 
 @mcp.tool()
@@ -540,10 +1520,11 @@ def wp_update_user(
     email: Optional[str] = Field(None, description="Новый email"),
     name: Optional[str] = Field(None, description="Новое отображаемое имя"),
     password: Optional[str] = Field(None, description="Новый пароль"),
-    roles: Optional[List[str]] = Field(None, description="Новые роли")
+    roles: Optional[List[str]] = Field(None, description="Новые роли"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Обновляет пользователя"""
-    client = get_client()
+    client = get_client(site)
     data = {}
     if email:
         data["email"] = email
@@ -555,6 +1536,7 @@ def wp_update_user(
         data["roles"] = roles
     
     result = client.put(f"users/{user_id}", data=data)
+    client.cache_entity("users", result)
     return {
         "success": True,
         "message": f"Пользователь #{user_id} успешно обновлен",
@@ -569,33 +1551,128 @@ def wp_update_user(
 
 # ==================== ИНСТРУМЕНТЫ ДЛЯ МЕДИА ====================
 
+def _media_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Краткое представление загруженного медиафайла"""
+    return {
+        "id": result["id"],
+        "title": result["title"]["rendered"],
+        "source_url": result["source_url"],
+        "link": result["link"],
+        "media_type": result.get("media_type", ""),
+        "mime_type": result.get("mime_type", "")
+    }
+
+
+def _optimization_fields(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Итог оптимизации для ответа: optimized и причина, если файл загружен как есть"""
+    return {key: result[key] for key in ("optimized", "optimize_skipped") if key in result}
+
+
+class MediaBatchItem(BaseModel):
+    """Элемент пакетной загрузки медиафайлов"""
+    file_url: str = Field(..., description="URL файла для загрузки")
+    title: Optional[str] = Field(None, description="Заголовок медиафайла")
+    alt_text: Optional[str] = Field(None, description="Альтернативный текст для изображения")
+
+
 @mcp.tool()
 def wp_upload_media(
     file_url: str = Field(..., description="URL файла для загрузки"),
     title: Optional[str] = Field(None, description="Заголовок медиафайла"),
-    alt_text: Optional[str] = Field(None, description="Альтернативный текст для изображения")
+    alt_text: Optional[str] = Field(None, description="Альтернативный текст для изображения"),
+    optimize: Optional[bool] = Field(None, description="Оптимизировать изображение перед загрузкой (по умолчанию из настроек)"),
+    idempotency_key: Optional[str] = Field(None, description="Ключ идемпотентности: повтор с тем же ключом вернет результат первого вызова"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
 ) -> Dict[str, Any]:
     """Загружает медиафайл в WordPress"""
-    client = get_client()
-    result = client.upload_media(file_url, title, alt_text)
-    return {
-        "success": True,
-        "message": "Медиафайл успешно загружен",
-        "media": {
-            "id": result["id"],
-            "title": result["title"]["rendered"],
-            "source_url": result["source_url"],
-            "link": result["link"],
-            "media_type": result.get("media_type", ""),
-            "mime_type": result.get("mime_type", "")
+    if background:
+        return _enqueue_job("wp_upload_media", locals())
+    client = get_client(site)
+    def create() -> Dict[str, Any]:
+        result = client.upload_media(file_url, title, alt_text, optimize)
+        deduplicated = result.get("deduplicated", False)
+        return {
+            "success": True,
+            "message": "Медиафайл уже есть в библиотеке" if deduplicated else "Медиафайл успешно загружен",
+            "deduplicated": deduplicated,
+            **_optimization_fields(result),
+            "media": _media_summary(result)
         }
+    
+    arguments = {"file_url": file_url, "title": title, "alt_text": alt_text, "optimize": optimize}
+    return _idempotent(client, "wp_upload_media", idempotency_key, arguments, create)
+
+
+@mcp.tool()
+def wp_upload_media_batch(
+    items: List[MediaBatchItem] = Field(..., description="Список файлов для загрузки"),
+    optimize: Optional[bool] = Field(None, description="Оптимизировать изображения перед загрузкой (по умолчанию из настроек)"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    background: bool = Field(False, description="Выполнить в фоне: сразу вернуть ID задания (состояние - wp_job_status)")
+) -> Dict[str, Any]:
+    """Параллельно загружает несколько медиафайлов в WordPress"""
+    if background:
+        return _enqueue_job("wp_upload_media_batch", locals(), total=len(items))
+    client = get_client(site)
+    download_slots = threading.BoundedSemaphore(WORDPRESS_DOWNLOAD_CONCURRENCY)
+    upload_slots = threading.BoundedSemaphore(WORDPRESS_UPLOAD_CONCURRENCY)
+    
+    def process(item: MediaBatchItem) -> Dict[str, Any]:
+        with download_slots:
+            fetched = client.fetch_media(item.file_url)
+        if fetched["existing"]:
+            return fetched["existing"]
+        with upload_slots:
+            return client.store_media(item.file_url, fetched, item.title, item.alt_text, optimize)
+    
+    # Одинаковые URL загружаются один раз: иначе все копии начали бы загружаться
+    # до того, как первая попадет в индекс медиа. Результат достается всем копиям
+    positions: Dict[str, List[int]] = {}
+    for index, item in enumerate(items):
+        positions.setdefault(item.file_url, []).append(index)
+    
+    # Результаты упорядочены по завершению загрузки; index указывает на позицию в items
+    results = []
+    workers = WORDPRESS_DOWNLOAD_CONCURRENCY + WORDPRESS_UPLOAD_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(positions)))) as executor:
+        futures = {executor.submit(process, items[indexes[0]]): url for url, indexes in positions.items()}
+        for future in as_completed(futures):
+            url = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                outcome = {"success": False, "error": str(e)}
+            else:
+                outcome = {
+                    "success": True,
+                    "deduplicated": result.get("deduplicated", False),
+                    **_optimization_fields(result),
+                    "media": _media_summary(result)
+                }
+            for copy, index in enumerate(positions[url]):
+                entry = {"index": index, "file_url": url, **outcome}
+                if copy and outcome["success"]:
+                    entry["deduplicated"] = True
+                results.append(entry)
+    
+    uploaded = sum(1 for r in results if r["success"])
+    return {
+        "success": uploaded == len(items),
+        "message": f"Загружено {uploaded} из {len(items)} медиафайлов",
+        "count": uploaded,
+        "results": results
     }
 
 
 @mcp.tool()
-def wp_get_media(media_id: int = Field(..., description="ID медиафайла")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_media(
+    media_id: int = Field(..., description="ID медиафайла"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает медиафайл по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"media/{media_id}")
     return {
         "success": True,
@@ -612,13 +1689,16 @@ def wp_get_media(media_id: int = Field(..., description="ID медиафайла
 
 
 @mcp.tool()
+@_serve_stale
 def wp_list_media(
     per_page: int = Field(10, description="Количество медиафайлов на странице"),
     page: int = Field(1, description="Номер страницы"),
-    media_type: Optional[str] = Field(None, description="Тип медиа: image, video, audio, application")
+    media_type: Optional[str] = Field(None, description="Тип медиа: image, video, audio, application"),
+    backfill_index: bool = Field(False, description="Добавить найденные файлы в индекс дедупликации (скачивает их)"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список медиафайлов"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -626,7 +1706,7 @@ def wp_list_media(
     if media_type:
         params["media_type"] = media_type
     
-    result = client.get("media", params=params)
+    result = client.iter_list("media", params=params)
     media_list = []
     for media in result:
         media_list.append({
@@ -638,19 +1718,26 @@ def wp_list_media(
             "mime_type": media.get("mime_type", "")
         })
     
-    return {
+    response = {
         "success": True,
         "count": len(media_list),
         "media": media_list
     }
+    if backfill_index:
+        response["indexed"] = client.index_media(media_list)
+    return response
 
 
 # ==================== ИНСТРУМЕНТЫ ДЛЯ КОММЕНТАРИЕВ ====================
 
 @mcp.tool()
-def wp_get_comment(comment_id: int = Field(..., description="ID комментария")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_comment(
+    comment_id: int = Field(..., description="ID комментария"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает комментарий по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"comments/{comment_id}")
     return {
         "success": True,
@@ -668,14 +1755,16 @@ def wp_get_comment(comment_id: int = Field(..., description="ID коммента
 
 
 @mcp.tool()
+@_serve_stale
 def wp_list_comments(
     per_page: int = Field(10, description="Количество комментариев на странице"),
     page: int = Field(1, description="Номер страницы"),
     post: Optional[int] = Field(None, description="ID поста для фильтрации"),
-    status: Optional[str] = Field(None, description="Статус комментария: approved, hold, spam, trash")
+    status: Optional[str] = Field(None, description="Статус комментария: approve, hold, spam, trash"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список комментариев"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -683,9 +1772,9 @@ def wp_list_comments(
     if post:
         params["post"] = post
     if status:
-        params["status"] = status
+        params["status"] = _comment_status_filter(status)
     
-    result = client.get("comments", params=params)
+    result = client.iter_list("comments", params=params)
     comments = []
     for comment in result:
         comments.append({
@@ -711,10 +1800,11 @@ def wp_create_comment(
     content: str = Field(..., description="Содержимое комментария"),
     author_name: str = Field(..., description="Имя автора"),
     author_email: Optional[str] = Field(None, description="Email автора"),
-    parent: Optional[int] = Field(None, description="ID родительского комментария")
+    parent: Optional[int] = Field(None, description="ID родительского комментария"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Создает новый комментарий"""
-    client = get_client()
+    client = get_client(site)
     data = {
         "post": post,
         "content": content,
@@ -743,10 +1833,11 @@ def wp_create_comment(
 def wp_update_comment(
     comment_id: int = Field(..., description="ID комментария для обновления"),
     content: Optional[str] = Field(None, description="Новое содержимое"),
-    status: Optional[str] = Field(None, description="Новый статус")
+    status: Optional[str] = Field(None, description="Новый статус"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Обновляет комментарий"""
-    client = get_client()
+    client = get_client(site)
     data = {}
     if content:
         data["content"] = content
@@ -767,10 +1858,11 @@ def wp_update_comment(
 @mcp.tool()
 def wp_delete_comment(
     comment_id: int = Field(..., description="ID комментария для удаления"),
-    force: bool = Field(False, description="Принудительное удаление")
+    force: bool = Field(False, description="Принудительное удаление"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Удаляет комментарий"""
-    client = get_client()
+    client = get_client(site)
     params = {"force": force} if force else {}
     result = client.delete(f"comments/{comment_id}", params=params)
     return {
@@ -780,17 +1872,141 @@ def wp_delete_comment(
     }
 
 
+# Действие модерации -> (HTTP метод, данные запроса)
+COMMENT_MODERATION_ACTIONS = {
+    "approve": ("PUT", {"status": "approved"}),
+    "hold": ("PUT", {"status": "hold"}),
+    "spam": ("PUT", {"status": "spam"}),
+    "trash": ("DELETE", {}),
+    "delete": ("DELETE", {"force": True})
+}
+
+
+def _comment_status_filter(status: str) -> str:
+    """
+    Статус для фильтра GET comments: в ответах WordPress пишет approved, а запрос
+    принимает approve (approved не находит ничего)
+    """
+    return ",".join("approve" if s.strip() == "approved" else s.strip() for s in status.split(","))
+
+
+def _comment_matches(
+    comment: Dict[str, Any],
+    author_email: Optional[str],
+    author_ip: Optional[str],
+    content_pattern: Optional["re.Pattern"]
+) -> bool:
+    """Проверяет комментарий на соответствие локальным фильтрам"""
+    if author_email and not fnmatch.fnmatch((comment.get("author_email") or "").lower(), author_email.lower()):
+        return False
+    if author_ip and not fnmatch.fnmatch(comment.get("author_ip") or "", author_ip):
+        return False
+    if content_pattern:
+        content = comment.get("content") or {}
+        text = content.get("raw") or content.get("rendered") or ""
+        if not content_pattern.search(text):
+            return False
+    return True
+
+
+@mcp.tool()
+async def wp_moderate_comments(
+    action: str = Field(..., description="Действие: approve, hold, spam, trash, delete"),
+    post: Optional[int] = Field(None, description="ID поста для фильтрации"),
+    status: Optional[str] = Field(None, description="Статус комментариев: approve, hold, spam, trash"),
+    author_email: Optional[str] = Field(None, description="Шаблон email автора, например *@spam.example"),
+    author_ip: Optional[str] = Field(None, description="Шаблон IP автора, например 203.0.113.*"),
+    content_regex: Optional[str] = Field(None, description="Регулярное выражение для текста комментария"),
+    after: Optional[str] = Field(None, description="Только комментарии после даты (ISO 8601)"),
+    before: Optional[str] = Field(None, description="Только комментарии до даты (ISO 8601)"),
+    dry_run: bool = Field(True, description="Только подсчитать подходящие комментарии, ничего не меняя"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)"),
+    ctx: Context = None
+) -> Dict[str, Any]:
+    """Массово модерирует комментарии, подходящие под фильтр"""
+    if action not in COMMENT_MODERATION_ACTIONS:
+        return {
+            "success": False,
+            "error": f"Неизвестное действие '{action}'. Допустимо: {', '.join(COMMENT_MODERATION_ACTIONS)}"
+        }
+    try:
+        content_pattern = re.compile(content_regex, re.IGNORECASE) if content_regex else None
+    except re.error as e:
+        return {"success": False, "error": f"Некорректное регулярное выражение: {e}"}
+    
+    client = get_client(site)
+    params = {
+        "context": "edit",
+        "_fields": "id,post,author_email,author_ip,content,date,status"
+    }
+    if post:
+        params["post"] = post
+    if status:
+        params["status"] = _comment_status_filter(status)
+    if after:
+        params["after"] = after
+    if before:
+        params["before"] = before
+    # Точный email фильтруем на стороне WordPress, шаблоны - локально
+    if author_email and not any(ch in author_email for ch in "*?["):
+        params["author_email"] = author_email
+    
+    comments = await asyncio.to_thread(client.get_all, "comments", params)
+    matched = [c for c in comments if _comment_matches(c, author_email, author_ip, content_pattern)]
+    
+    if dry_run:
+        return {
+            "success": True,
+            "dry_run": True,
+            "action": action,
+            "scanned": len(comments),
+            "matched": len(matched),
+            "sample": [{"id": c["id"], "post": c["post"], "date": c["date"]} for c in matched[:20]]
+        }
+    
+    method, data = COMMENT_MODERATION_ACTIONS[action]
+    requests = [(method, f"comments/{c['id']}", data) for c in matched]
+    loop = asyncio.get_running_loop()
+    
+    def apply() -> List[Dict[str, Any]]:
+        results = []
+        for start in range(0, len(requests), WORDPRESS_BATCH_SIZE):
+            results.extend(client.batch(requests[start:start + WORDPRESS_BATCH_SIZE]))
+            if ctx is not None:
+                asyncio.run_coroutine_threadsafe(
+                    ctx.report_progress(len(results), len(requests)), loop
+                )
+        return results
+    
+    results = await asyncio.to_thread(apply)
+    failed = [
+        {"id": c["id"], "error": r.get("error")}
+        for c, r in zip(matched, results) if not r["success"]
+    ]
+    return {
+        "success": not failed,
+        "dry_run": False,
+        "action": action,
+        "scanned": len(comments),
+        "matched": len(matched),
+        "processed": len(matched) - len(failed),
+        "failed": failed
+    }
+
+
 # ==================== ИНСТРУМЕНТЫ ДЛЯ КАТЕГОРИЙ ====================
 
 @mcp.tool()
+@_serve_stale
 def wp_list_categories(
     per_page: int = Field(100, description="Количество категорий на странице"),
     page: int = Field(1, description="Номер страницы"),
     search: Optional[str] = Field(None, description="Поисковый запрос"),
-    parent: Optional[int] = Field(None, description="ID родительской категории")
+    parent: Optional[int] = Field(None, description="ID родительской категории"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список категорий"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -800,7 +2016,7 @@ def wp_list_categories(
     if parent is not None:
         params["parent"] = parent
     
-    result = client.get("categories", params=params)
+    result = client.iter_list("categories", params=params)
     categories = []
     for cat in result:
         categories.append({
@@ -820,10 +2036,15 @@ def wp_list_categories(
 
 
 @mcp.tool()
-def wp_get_category(category_id: int = Field(..., description="ID категории")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_category(
+    category_id: int = Field(..., description="ID категории"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает категорию по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"categories/{category_id}")
+    client.cache_entity("categories", result)
     return {
         "success": True,
         "category": {
@@ -842,10 +2063,11 @@ def wp_create_category(
     name: str = Field(..., description="Название категории"),
     slug: Optional[str] = Field(None, description="URL-слаг категории"),
     description: Optional[str] = Field(None, description="Описание категории"),
-    parent: Optional[int] = Field(None, description="ID родительской категории")
+    parent: Optional[int] = Field(None, description="ID родительской категории"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Создает новую категорию"""
-    client = get_client()
+    client = get_client(site)
     data = {"name": name}
     if slug:
         data["slug"] = slug
@@ -869,13 +2091,15 @@ def wp_create_category(
 # ==================== ИНСТРУМЕНТЫ ДЛЯ ТЕГОВ ====================
 
 @mcp.tool()
+@_serve_stale
 def wp_list_tags(
     per_page: int = Field(100, description="Количество тегов на странице"),
     page: int = Field(1, description="Номер страницы"),
-    search: Optional[str] = Field(None, description="Поисковый запрос")
+    search: Optional[str] = Field(None, description="Поисковый запрос"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Получает список тегов"""
-    client = get_client()
+    client = get_client(site)
     params = {
         "per_page": per_page,
         "page": page
@@ -883,7 +2107,7 @@ def wp_list_tags(
     if search:
         params["search"] = search
     
-    result = client.get("tags", params=params)
+    result = client.iter_list("tags", params=params)
     tags = []
     for tag in result:
         tags.append({
@@ -902,10 +2126,15 @@ def wp_list_tags(
 
 
 @mcp.tool()
-def wp_get_tag(tag_id: int = Field(..., description="ID тега")) -> Dict[str, Any]:
+@_serve_stale
+def wp_get_tag(
+    tag_id: int = Field(..., description="ID тега"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает тег по ID"""
-    client = get_client()
+    client = get_client(site)
     result = client.get(f"tags/{tag_id}")
+    client.cache_entity("tags", result)
     return {
         "success": True,
         "tag": {
@@ -922,10 +2151,11 @@ def wp_get_tag(tag_id: int = Field(..., description="ID тега")) -> Dict[str,
 def wp_create_tag(
     name: str = Field(..., description="Название тега"),
     slug: Optional[str] = Field(None, description="URL-слаг тега"),
-    description: Optional[str] = Field(None, description="Описание тега")
+    description: Optional[str] = Field(None, description="Описание тега"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
     """Создает новый тег"""
-    client = get_client()
+    client = get_client(site)
     data = {"name": name}
     if slug:
         data["slug"] = slug
@@ -946,74 +2176,180 @@ def wp_create_tag(
 
 # ==================== ИНСТРУМЕНТЫ ДЛЯ ПОИСКА ====================
 
+def _search_score(query: str, title: str, rank: int) -> float:
+    """Оценка результата: позиция в выдаче своего типа плюс совпадение с заголовком"""
+    score = 1.0 / (SEARCH_RANK_K + rank)
+    title = html_to_text(title).lower()
+    if title == query:
+        score += 1.0
+    elif query in title:
+        score += 0.5
+    elif all(word in title for word in query.split()):
+        score += 0.25
+    return score
+
+
 @mcp.tool()
+@_serve_stale
 def wp_search(
     search: str = Field(..., description="Поисковый запрос"),
-    type: str = Field("post", description="Тип контента: post, page, attachment"),
+    type: str = Field("any", description="Типы контента через запятую: post, page, attachment или свой тип записи; any - все типы сайта"),
     per_page: int = Field(10, description="Количество результатов на странице"),
-    page: int = Field(1, description="Номер страницы")
+    page: int = Field(1, description="Номер страницы"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
 ) -> Dict[str, Any]:
-    """Выполняет поиск по WordPress сайту"""
-    client = get_client()
+    """
+    Ищет по всем типам контента сайта (посты, страницы, медиа, свои типы записей) параллельно
+    и возвращает общую выдачу, ранжированную по релевантности, с количеством найденного по типам
+    """
+    client = get_client(site)
+    available = client.search_types()
+    if type == "any":
+        types = list(available)
+    else:
+        types = list(dict.fromkeys(t.strip() for t in type.split(",") if t.strip()))
+        unknown = [t for t in types if t not in available]
+        if unknown:
+            return {
+                "success": False,
+                "error": f"Неизвестный тип контента: {', '.join(unknown)}. Доступные типы: {', '.join(available)}"
+            }
+    
+    # Для общей пагинации у каждого типа берутся первые page * per_page результатов;
+    # WordPress отдает не больше 100 за запрос, поэтому дальние страницы собираются из нескольких
+    needed = page * per_page
     params = {
         "search": search,
-        "type": type,
-        "per_page": per_page,
-        "page": page
+        "per_page": min(100, needed),
+        "_fields": "id,title,link,date"
     }
     
-    # Используем соответствующий endpoint в зависимости от типа
-    endpoint = f"{type}s" if type != "attachment" else "media"
-    result = client.get(endpoint, params=params)
-    
-    items = []
-    for item in result:
-        items.append({
-            "id": item["id"],
-            "title": item["title"]["rendered"],
-            "type": type,
-            "link": item["link"],
-            "date": item.get("date", "")
-        })
+    def fetch(type_slug: str) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        items: List[Dict[str, Any]] = []
+        total = None
+        for number in range(1, -(-needed // params["per_page"]) + 1):
+            chunk, total = client.get_page(available[type_slug], params={**params, "page": number})
+            items.extend(chunk)
+            if len(chunk) < params["per_page"] or (total is not None and len(items) >= total):
+                break
+        return items[:needed], total
     
-    return {
+    found: Dict[str, Tuple[List[Dict[str, Any]], Optional[int]]] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(len(types), WORDPRESS_PAGINATION_CONCURRENCY))) as executor:
+        futures = {executor.submit(fetch, type_slug): type_slug for type_slug in types}
+        for future in as_completed(futures):
+            try:
+                found[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = str(e)
+    if errors and not found:
+        raise Exception(f"Поиск не выполнен: {'; '.join(f'{t}: {e}' for t, e in errors.items())}")
+    
+    query = search.strip().lower()
+    ranked = []
+    counts = {}
+    for type_slug in types:
+        if type_slug not in found:
+            continue
+        items, total = found[type_slug]
+        counts[type_slug] = total if total is not None else len(items)
+        for rank, item in enumerate(items):
+            title = (item.get("title") or {}).get("rendered", "")
+            ranked.append((_search_score(query, title, rank), item.get("date", ""), {
+                "id": item["id"],
+                "title": title,
+                "type": type_slug,
+                "link": item.get("link", ""),
+                "date": item.get("date", "")
+            }))
+    # Выше оценка, при равной - новее
+    ranked.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+    results = [entry[2] for entry in ranked[(page - 1) * per_page:page * per_page]]
+    
+    response = {
         "success": True,
         "query": search,
         "type": type,
-        "count": len(items),
-        "results": items
+        "counts": counts,
+        "total": sum(counts.values()),
+        "count": len(results),
+        "results": results
     }
+    if errors:
+        response["errors"] = errors
+    return response
 
 
 # ==================== ИНСТРУМЕНТЫ ДЛЯ ИНФОРМАЦИИ О САЙТЕ ====================
 
+# (группа, ключ, endpoint, параметры) для подсчета через X-WP-Total
+SITE_STATS_PROBES = [
+    *[("posts", status, "posts", {"status": status}) for status in ("publish", "draft", "pending", "private", "future")],
+    *[("pages", status, "pages", {"status": status}) for status in ("publish", "draft", "pending", "private")],
+    ("comments", "approved", "comments", {"status": "approve"}),
+    *[("comments", status, "comments", {"status": status}) for status in ("hold", "spam", "trash")],
+    ("media", "total", "media", {}),
+    *[("media", media_type, "media", {"media_type": media_type}) for media_type in ("image", "video", "audio", "application")],
+    ("users", "total", "users", {}),
+    ("categories", "total", "categories", {}),
+    ("tags", "total", "tags", {})
+]
+
+
+@mcp.tool()
+@_warmable
+def wp_site_stats(
+    refresh: bool = Field(False, description="Пересчитать статистику, игнорируя кэш"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
+    """Получает количество постов, страниц, комментариев и медиа по статусам и типам"""
+    client = get_client(site)
+    stats = None if refresh else client.stats_cache.get("stats")
+    if stats is not None:
+        return {"success": True, "cached": True, "stats": stats}
+    
+    def probe(item):
+        group, key, endpoint, params = item
+        try:
+            return group, key, client.count(endpoint, params)
+        except Exception:
+            return group, key, None
+    
+    stats: Dict[str, Dict[str, Optional[int]]] = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(len(SITE_STATS_PROBES), WORDPRESS_PAGINATION_CONCURRENCY))) as executor:
+        for group, key, total in executor.map(probe, SITE_STATS_PROBES):
+            stats.setdefault(group, {})[key] = total
+    client.stats_cache.set("stats", stats)
+    return {"success": True, "cached": False, "stats": stats}
+
+
 @mcp.tool()
-def wp_get_site_info() -> Dict[str, Any]:
+@_warmable
+def wp_get_site_info(
+    refresh: bool = Field(False, description="Запросить информацию заново, игнорируя кэш"),
+    site: Optional[str] = Field(None, description="Сайт из реестра WORDPRESS_SITES (по умолчанию основной)")
+) -> Dict[str, Any]:
     """Получает информацию о WordPress сайте"""
-    client = get_client()
-    # Получаем информацию через различные endpoints
+    client = get_client(site)
     try:
-        # Пробуем получить информацию о сайте через корневой endpoint
-        site_info = client.get("")
-        
-        # Получаем информацию о текущем пользователе
-        try:
-            user_info = client.get("users/me")
-        except:
-            user_info = None
+        # Корневой endpoint и текущий пользователь запрашиваются параллельно и кэшируются
+        info = client.site_info(refresh=refresh)
+        site_info = info["site"]
+        user_info = info["user"]
         
         return {
             "success": True,
             "site": {
-                "url": WORDPRESS_URL,
+                "registry_name": client.site,
                 "name": site_info.get("name", ""),
                 "description": site_info.get("description", ""),
-                "url": site_info.get("url", WORDPRESS_URL),
-                "home": site_info.get("home", WORDPRESS_URL),
+                "url": site_info.get("url", client.url),
+                "home": site_info.get("home", client.url),
                 "namespaces": site_info.get("namespaces", []),
                 "authentication": {
                     "enabled": True,
-                    "username": WORDPRESS_USERNAME
+                    "username": client.username
                 },
                 "current_user": {
                     "id": user_info["id"] if user_info else None,
@@ -1027,15 +2363,174 @@ def wp_get_site_info() -> Dict[str, Any]:
             "success": False,
             "error": str(e),
             "site": {
-                "url": WORDPRESS_URL,
+                "url": client.url,
                 "authentication": {
                     "enabled": True,
-                    "username": WORDPRESS_USERNAME
+                    "username": client.username
                 }
             }
         }
 
 
+@mcp.tool()
+def wp_list_sites() -> Dict[str, Any]:
+    """Список сайтов из реестра (без паролей) и состояние их подключений"""
+    registry = get_sites()
+    described = registry.describe()
+    for site in described:
+        client = registry.peek(site["name"])
+        if client is not None and client.router is not None:
+            site["read_routing"] = client.router.stats()
+    return {
+        "success": True,
+        "default_site": registry.default_site,
+        "sites": described,
+        "stats": registry.stats()
+    }
+
+
+# ==================== ФОНОВЫЕ ЗАДАНИЯ ====================
+
+def _tool_function(tool: Any) -> Callable[..., Dict[str, Any]]:
+    """Функция инструмента (декоратор fastmcp 2.x возвращает объект с атрибутом fn)"""
+    return getattr(tool, "fn", tool)
+
+
+def _tool_job(tool: Any) -> Callable[[Dict[str, Any], Any], Dict[str, Any]]:
+    """Обработчик задания, выполняющий инструмент с сохраненными аргументами"""
+    def handler(payload: Dict[str, Any], job: Any) -> Dict[str, Any]:
+        return _tool_function(tool)(**payload, background=False)
+    
+    return handler
+
+
+def _media_batch_job(payload: Dict[str, Any], job: Any) -> Dict[str, Any]:
+    """Пакетная загрузка медиа частями с контрольной точкой после каждой части"""
+    items = payload["items"]
+    results = job.checkpoint.get("results", [])
+    upload = _tool_function(wp_upload_media_batch)
+    for offset in range(job.checkpoint.get("next", 0), len(items), WORDPRESS_JOB_CHUNK):
+        chunk = [MediaBatchItem(**item) for item in items[offset:offset + WORDPRESS_JOB_CHUNK]]
+        part = upload(items=chunk, optimize=payload.get("optimize"), site=payload.get("site"), background=False)
+        for result in part["results"]:
+            result["index"] += offset
+            results.append(result)
+        done = offset + len(chunk)
+        job.save({"results": results, "next": done}, done, len(items))
+    
+    uploaded = sum(1 for r in results if r["success"])
+    return {
+        "success": uploaded == len(items),
+        "message": f"Загружено {uploaded} из {len(items)} медиафайлов",
+        "count": uploaded,
+        "results": results
+    }
+
+
+JOB_HANDLERS = {
+    "wp_create_post": _tool_job(wp_create_post),
+    "wp_update_post": _tool_job(wp_update_post),
+    "wp_create_page": _tool_job(wp_create_page),
+    "wp_update_page": _tool_job(wp_update_page),
+    "wp_upload_media": _tool_job(wp_upload_media),
+    "wp_upload_media_batch": _media_batch_job,
+}
+
+
+# Создающие задания: повтор после таймаута или остановки процесса может создать дубликат,
+# а ключи идемпотентности хранятся только в памяти. Пакетная загрузка продолжается
+# с контрольной точки, уже загруженные файлы находит индекс медиа
+ONCE_JOBS = {"wp_create_post", "wp_create_page", "wp_upload_media"}
+
+
+@mcp.tool()
+def wp_job_status(
+    job_id: Optional[str] = Field(None, description="ID задания; без него - список последних заданий"),
+    status: Optional[str] = Field(None, description="Фильтр списка: queued, running, done, failed"),
+    limit: int = Field(20, description="Количество заданий в списке")
+) -> Dict[str, Any]:
+    """Состояние фоновых заданий записи: прогресс, результат или ошибка"""
+    queue = get_job_queue()
+    if job_id:
+        job = queue.get(job_id)
+        if job is None:
+            raise Exception(f"Задание {job_id} не найдено")
+        return {"success": True, "job": job}
+    jobs = queue.list(status=status, limit=limit)
+    return {
+        "success": True,
+        "pending": queue.pending(),
+        "count": len(jobs),
+        "jobs": jobs
+    }
+
+
+STARTUP_MARKS.append(("tools", time.perf_counter()))
+
+
+def report_startup() -> None:
+    """Печатает время этапов запуска в stderr (stdout занят протоколом MCP)"""
+    previous = STARTUP_MARKS[0][1]
+    lines = ["Время запуска WordPress MCP Server:"]
+    for name, mark in STARTUP_MARKS[1:]:
+        lines.append(f"  {name:<10} {(mark - previous) * 1000:8.1f} мс")
+        previous = mark
+    lines.append(f"  {'итого':<10} {(previous - STARTUP_MARKS[0][1]) * 1000:8.1f} мс")
+    print("\n".join(lines), file=sys.stderr, flush=True)
+
+
+def _warmup_plan() -> List[Dict[str, Any]]:
+    """План прогрева с аргументами по умолчанию, чтобы ключи совпадали с обычными вызовами"""
+    plan = []
+    source = DEFAULT_WARMUP_PLAN if WORDPRESS_WARMUP.strip() == "default" else WORDPRESS_WARMUP
+    for call in load_warmup_plan(source):
+        args = dict(call["args"])
+        if call.get("site"):
+            args["site"] = call["site"]
+        plan.append({"tool": call["tool"], "args": _tool_arguments(call["tool"], args)})
+    return plan
+
+
+warmer: Optional[Warmer] = None
+
+
+def start_warmer() -> None:
+    """Запускает фоновый прогрев (WORDPRESS_WARMUP задан)"""
+    global warmer
+    try:
+        plan = _warmup_plan()
+    except Exception as e:
+        print(f"Прогрев отключен: {e}", file=sys.stderr, flush=True)
+        plan = []
+    access_tracker.load(WORDPRESS_WARMUP_STATE)
+    warmer = Warmer(
+        _warm_call,
+        plan,
+        tracker=access_tracker,
+        hot_keys=WORDPRESS_WARMUP_HOT_KEYS,
+        interval=WORDPRESS_WARMUP_INTERVAL,
+        concurrency=WORDPRESS_WARMUP_CONCURRENCY,
+        state_path=WORDPRESS_WARMUP_STATE or None
+    )
+    atexit.register(warmer.stop)
+    warmer.start()
+
+
+def warm_up() -> None:
+    """Прогревает частые чтения и продолжает незавершенные задания в фоне, пока клиент подключается"""
+    def load() -> None:
+        if WORDPRESS_WARMUP.strip():
+            start_warmer()
+        # Продолжаем задания, оставшиеся в журнале после прошлого запуска
+        if WORDPRESS_JOB_QUEUE and os.path.exists(WORDPRESS_JOB_QUEUE):
+            get_job_queue()
+    
+    threading.Thread(target=load, daemon=True).start()
+
+
 # Запуск сервера
 if __name__ == "__main__":
+    if "--profile-startup" in sys.argv:
+        report_startup()
+    warm_up()
     mcp.run()
@@ -0,0 +1,406 @@
+"""
+Registry of WordPress sites served by a single MCP server.
+
+Each configured site gets its own pooled HTTP client, credentials and
+caches, created on first use. Live clients are kept in an LRU: sites idle
+for longer than the idle TTL, or beyond the active-site limit, are retired
+and their connections closed. Every upstream request passes through a
+budget transport that enforces the site's concurrency limit and a
+connection budget shared by all sites.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Generic, Iterator, List, Mapping, Optional, TypeVar, Union
+
+import httpx
+
+T = TypeVar("T")
+
+
+@dataclass
+class SiteConfig:
+    """
+    Connection settings of one WordPress site.
+    """
+
+    name: str
+    url: str
+    username: str
+    password: str = field(repr=False)
+    concurrency: int = 8
+    # Extra origins or replicas serving the same site, used for reads only
+    read_urls: List[str] = field(default_factory=list)
+
+
+def load_site_configs(
+    source: Union[str, Mapping[str, Any], None],
+    default_concurrency: int = 8,
+) -> Dict[str, SiteConfig]:
+    """
+    Parse site definitions from a mapping, inline JSON or a JSON file path.
+
+    The JSON object maps a site name to {"url", "username", "app_password"}
+    and optional "concurrency" and "read_urls". "app_password_env" names an
+    environment variable holding the password, so secrets can stay out of
+    the file.
+    """
+    if not source:
+        return {}
+    if isinstance(source, str):
+        text = source.strip()
+        if not text.startswith("{"):
+            with open(os.path.expanduser(text), encoding="utf-8") as f:
+                text = f.read()
+        try:
+            source = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid site configuration JSON: {e}") from e
+    if not isinstance(source, Mapping):
+        raise ValueError("Site configuration must be a JSON object of name -> settings")
+
+    configs: Dict[str, SiteConfig] = {}
+    for name, settings in source.items():
+        password = settings.get("app_password") or settings.get("password")
+        if not password and settings.get("app_password_env"):
+            password = os.getenv(settings["app_password_env"], "")
+        url = str(settings.get("url") or "").rstrip("/")
+        username = settings.get("username") or ""
+        if not (url and username and password):
+            raise ValueError(f"Site '{name}' needs url, username and app_password (or app_password_env)")
+        configs[name] = SiteConfig(
+            name=name,
+            url=url,
+            username=username,
+            password=password,
+            concurrency=int(settings.get("concurrency") or default_concurrency),
+            read_urls=[str(u).rstrip("/") for u in settings.get("read_urls") or []],
+        )
+    return configs
+
+
+# ---------------------------------------------------------------------------
+# Connection budgets
+# ---------------------------------------------------------------------------
+
+
+def _pool_timeout(request: httpx.Request) -> Optional[float]:
+    return (request.extensions.get("timeout") or {}).get("pool")
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]) -> None:
+        self._stream = stream
+        self._release: Optional[Callable[[], None]] = release
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], Any]) -> None:
+        self._stream = stream
+        self._release: Optional[Callable[[], Any]] = release
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            release, self._release = self._release, None
+            if release is not None:
+                await release()
+
+
+class BudgetTransport(httpx.BaseTransport):
+    """
+    Sync transport wrapper holding a site slot and a shared slot for the
+    lifetime of each response (until its body is read and closed).
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport,
+        concurrency: int,
+        shared: Optional[threading.Semaphore] = None,
+    ) -> None:
+        self.transport = transport
+        self._site = threading.BoundedSemaphore(max(1, concurrency))
+        self._shared = shared
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self._retired = False
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = _pool_timeout(request)
+        if not self._site.acquire(timeout=timeout if timeout is not None else -1):
+            raise httpx.PoolTimeout("Timed out waiting for a site connection slot", request=request)
+        if self._shared is not None and not self._shared.acquire(timeout=timeout if timeout is not None else -1):
+            self._site.release()
+            raise httpx.PoolTimeout("Timed out waiting for a shared connection slot", request=request)
+        with self._lock:
+            self.in_flight += 1
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            self._release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, self._release),  # type: ignore[arg-type]
+            extensions=response.extensions,
+        )
+
+    def _release(self) -> None:
+        if self._shared is not None:
+            self._shared.release()
+        self._site.release()
+        with self._lock:
+            self.in_flight -= 1
+            drained = self._retired and self.in_flight == 0
+        if drained:
+            self.transport.close()
+
+    def retire(self) -> None:
+        """
+        Close pooled connections once in-flight requests finish. A late
+        request through the same client still works on a fresh connection.
+        """
+        with self._lock:
+            self._retired = True
+            idle = self.in_flight == 0
+        if idle:
+            self.transport.close()
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncBudgetTransport(httpx.AsyncBaseTransport):
+    """
+    Async counterpart of BudgetTransport using asyncio semaphores.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.AsyncBaseTransport,
+        concurrency: int,
+        shared: Optional[asyncio.Semaphore] = None,
+    ) -> None:
+        self.transport = transport
+        self._site = asyncio.Semaphore(max(1, concurrency))
+        self._shared = shared
+        self.in_flight = 0
+        self._retired = False
+        self._closing: Optional[asyncio.Task] = None
+
+    async def _acquire(self, semaphore: asyncio.Semaphore, timeout: Optional[float], request: httpx.Request) -> None:
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            raise httpx.PoolTimeout("Timed out waiting for a connection slot", request=request) from None
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        timeout = _pool_timeout(request)
+        await self._acquire(self._site, timeout, request)
+        if self._shared is not None:
+            try:
+                await self._acquire(self._shared, timeout, request)
+            except BaseException:
+                self._site.release()
+                raise
+        self.in_flight += 1
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            await self._release()
+            raise
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_AsyncReleasingStream(response.stream, self._release),  # type: ignore[arg-type]
+            extensions=response.extensions,
+        )
+
+    async def _release(self) -> None:
+        if self._shared is not None:
+            self._shared.release()
+        self._site.release()
+        self.in_flight -= 1
+        if self._retired and self.in_flight == 0:
+            await self.transport.aclose()
+
+    def retire(self) -> None:
+        """
+        Close pooled connections once in-flight requests finish.
+        """
+        self._retired = True
+        if self.in_flight == 0:
+            self._closing = asyncio.get_running_loop().create_task(self.transport.aclose())
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+
+class UnknownSite(KeyError):
+    """
+    Raised for a site name that is not configured.
+    """
+
+    def __str__(self) -> str:
+        return str(self.args[0]) if self.args else "Unknown site"
+
+
+class SiteRegistry(Generic[T]):
+    """
+    Thread-safe LRU of live per-site clients.
+
+    factory builds a client for a SiteConfig; retire is called (outside the
+    registry lock) for clients evicted as idle or least recently used. The
+    default site is never evicted.
+    """
+
+    def __init__(
+        self,
+        configs: Mapping[str, SiteConfig],
+        factory: Callable[[SiteConfig], T],
+        retire: Callable[[T], None],
+        default_site: str,
+        max_active: int = 16,
+        idle_ttl: float = 900.0,
+    ) -> None:
+        if default_site not in configs:
+            raise ValueError(f"Default site '{default_site}' is not configured")
+        self.configs = dict(configs)
+        self.factory = factory
+        self.retire = retire
+        self.default_site = default_site
+        self.max_active = max(1, max_active)
+        self.idle_ttl = idle_ttl
+        self._lock = threading.Lock()
+        # name -> (client, last used); order is least to most recently used
+        self._active: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.created = 0
+        self.evicted = 0
+
+    def get(self, name: Optional[str] = None) -> T:
+        """
+        Client of the named site (the default site when name is empty).
+        """
+        name = name or self.default_site
+        config = self.configs.get(name)
+        if config is None:
+            raise UnknownSite(f"Unknown site '{name}'; configured sites: {', '.join(self.configs)}")
+        with self._lock:
+            now = time.monotonic()
+            entry = self._active.get(name)
+            if entry is None:
+                entry = [self.factory(config), now]
+                self._active[name] = entry
+                self.created += 1
+            else:
+                entry[1] = now
+            self._active.move_to_end(name)
+            expired = self._collect(now, keep=name)
+        for client in expired:
+            self.retire(client)
+        return entry[0]
+
+    def peek(self, name: str) -> Optional[T]:
+        """
+        Live client of a site without creating it or touching its LRU position.
+        """
+        with self._lock:
+            entry = self._active.get(name)
+        return entry[0] if entry else None
+
+    def _collect(self, now: float, keep: str) -> List[T]:
+        # Called under self._lock
+        expired: List[T] = []
+        for name in list(self._active):
+            if name in (self.default_site, keep):
+                continue
+            idle = now - self._active[name][1] > self.idle_ttl
+            if idle or len(self._active) > self.max_active:
+                expired.append(self._active.pop(name)[0])
+        self.evicted += len(expired)
+        return expired
+
+    def active(self) -> List[T]:
+        with self._lock:
+            return [entry[0] for entry in self._active.values()]
+
+    def close(self) -> List[T]:
+        """
+        Forget all live clients and return them for the caller to close.
+        """
+        with self._lock:
+            clients = [entry[0] for entry in self._active.values()]
+            self._active.clear()
+        return clients
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            active = {name: round(now - entry[1], 1) for name, entry in self._active.items()}
+        return {
+            "configured": len(self.configs),
+            "active": len(active),
+            "max_active": self.max_active,
+            "idle_seconds": active,
+            "created": self.created,
+            "evicted": self.evicted,
+        }
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        Configured sites without credentials.
+        """
+        with self._lock:
+            active = set(self._active)
+        return [
+            {
+                "name": config.name,
+                "url": config.url,
+                "username": config.username,
+                "concurrency": config.concurrency,
+                "read_urls": list(config.read_urls),
+                "default": config.name == self.default_site,
+                "active": config.name in active,
+            }
+            for config in self.configs.values()
+        ]
+
+
+__all__ = [
+    "AsyncBudgetTransport",
+    "BudgetTransport",
+    "SiteConfig",
+    "SiteRegistry",
+    "UnknownSite",
+    "load_site_configs",
+]
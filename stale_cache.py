@@ -0,0 +1,412 @@
+"""
+Stale-while-revalidate and stale-if-error serving for read tools.
+
+The last successful result of each read (keyed by tool and arguments) is
+kept per site. Depending on its age, a call is answered from this copy
+while a background refresh runs (stale-while-revalidate), or the origin is
+called and the copy is served only if the origin fails or does not answer
+within a deadline (stale-if-error). A slow call that hit the deadline keeps
+running and refreshes the copy when it completes. Every answer served from
+the copy carries "stale": true, its age and the reason.
+
+Copies made before a write through the same client are not served for
+revalidation, so a session reads its own writes; they remain usable as a
+fallback on errors. invalidate() drops copies the origin reports changed
+(e.g. from a webhook). A copy loaded by prefetch() (cache warming) may be
+given its own revalidation window, which its later refreshes keep. Client errors (4xx other than 408 and 429, e.g. a
+deleted post) are returned as they are, never masked by an old copy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import httpx
+
+Result = Dict[str, Any]
+
+REVALIDATING = "revalidating"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+
+# Client errors that may succeed on retry, so a stale copy is a fair answer
+_TRANSIENT_CLIENT_STATUSES = {408, 429}
+
+
+def _succeeded(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("success", True) is not False
+
+
+def _final_status(status: Any) -> bool:
+    # The origin answered and the answer stands: serving a copy would hide it
+    return isinstance(status, int) and 400 <= status < 500 and status not in _TRANSIENT_CLIENT_STATUSES
+
+
+def _final_error(error: BaseException) -> bool:
+    # Loaders often wrap httpx errors, so look through the exception chain
+    seen = set()
+    current: Optional[BaseException] = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, httpx.HTTPStatusError):
+            return _final_status(current.response.status_code)
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def _final_result(result: Result) -> bool:
+    return _final_status(result.get("status_code"))
+
+
+def _mark(result: Result, stored: float, reason: str, error: Optional[str] = None) -> Result:
+    marked = {**result, "stale": True, "stale_age": round(time.monotonic() - stored, 1), "stale_reason": reason}
+    if error:
+        marked["stale_error"] = error
+    return marked
+
+
+class _Entries:
+    """
+    LRU of (result, stored at, write generation, own revalidation window)
+    by key; callers hold the lock.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.data: "OrderedDict[Hashable, Tuple[Result, float, int, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, max_age: float) -> Optional[Tuple[Result, float, int, float]]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] > max(max_age, entry[3]):
+            del self.data[key]
+            return None
+        self.data.move_to_end(key)
+        return entry
+
+    def drop(self, match: Callable[[Hashable], bool]) -> List[Hashable]:
+        keys = [key for key in self.data if match(key)]
+        for key in keys:
+            del self.data[key]
+        return keys
+
+    def put(self, key: Hashable, result: Result, generation: int, fresh: Optional[float] = None) -> None:
+        if fresh is None:
+            # A refresh keeps the window the copy was given when warmed
+            previous = self.data.get(key)
+            fresh = previous[3] if previous is not None else 0.0
+        self.data[key] = (result, time.monotonic(), generation, fresh)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+
+class StaleCache:
+    """
+    Stale serving for blocking loaders (thread-safe).
+
+    revalidate: max age in seconds of a copy served immediately while it
+    is refreshed (0 disables). stale_if_error: max age of a copy served
+    when the origin fails. deadline: seconds to wait for the origin when a
+    fallback copy exists (None waits for the loader's own timeout).
+    workers: size of the cache's own refresh pool (used unless an executor
+    is given); when all its workers are busy, a call with a fallback copy
+    loads on its own thread instead of queueing behind them.
+    """
+
+    def __init__(
+        self,
+        revalidate: float = 0.0,
+        stale_if_error: float = 3600.0,
+        deadline: Optional[float] = None,
+        maxsize: int = 256,
+        workers: int = 4,
+        executor: Optional[ThreadPoolExecutor] = None,
+    ) -> None:
+        self.revalidate = revalidate
+        self.stale_if_error = stale_if_error
+        self.deadline = deadline
+        self.max_age = max(revalidate, stale_if_error)
+        self._entries = _Entries(maxsize)
+        self._lock = threading.Lock()
+        # (key, write generation) -> running load
+        self._inflight: Dict[Tuple[Hashable, int], Future] = {}
+        self._executor = executor
+        self._own_executor = executor is None
+        self.workers = max(1, workers)
+        self.generation = 0
+        # A copy with its own window was stored, so serve() looks up copies even when disabled
+        self.warmed = False
+        self.served_stale = 0
+
+    def bump(self) -> None:
+        """
+        Record a write; existing copies are no longer served for revalidation.
+        """
+        with self._lock:
+            self.generation += 1
+
+    def serve(self, key: Hashable, load: Callable[[], Result]) -> Result:
+        if self.max_age <= 0 and not self.warmed:
+            return load()
+        with self._lock:
+            entry = self._entries.get(key, self.max_age)
+            generation = self.generation
+        if entry is not None:
+            result, stored, entry_generation, fresh = entry
+            age = time.monotonic() - stored
+            if age <= max(self.revalidate, fresh) and entry_generation == generation:
+                self._refresh(key, load)
+                return self._stale(result, stored, REVALIDATING)
+            if age > self.stale_if_error:
+                entry = None
+        if entry is None:
+            result = load()
+            if _succeeded(result) and self.max_age > 0:
+                self._store(key, result, generation)
+            return result
+
+        # A fallback copy exists: bound the wait for the origin
+        future = self._refresh(key, load, inline=True)
+        try:
+            result = future.result(timeout=self.deadline)
+        except FutureTimeout:
+            return self._stale(entry[0], entry[1], TIMEOUT)
+        except Exception as e:
+            if _final_error(e):
+                self._forget(key)
+                raise
+            return self._stale(entry[0], entry[1], ERROR, str(e))
+        if _final_result(result):
+            self._forget(key)
+        elif not _succeeded(result):
+            return self._stale(entry[0], entry[1], ERROR, str(result.get("error") or result.get("message") or ""))
+        return result
+
+    def prefetch(self, key: Hashable, load: Callable[[], Result], fresh: Optional[float] = None) -> Result:
+        """
+        Load key now (joining a running load) and keep a successful result.
+        fresh: seconds the copy is served at once while refreshed, even
+        beyond revalidate (for warmed keys).
+        """
+        if self.max_age <= 0 and not fresh:
+            return load()
+        self.warmed = self.warmed or bool(fresh)
+        return self._refresh(key, load, fresh=fresh).result()
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> List[Hashable]:
+        """
+        Drop the copies whose key matches (the origin changed them); returns their keys.
+        """
+        with self._lock:
+            self.generation += 1
+            return self._entries.drop(match)
+
+    def _stale(self, result: Result, stored: float, reason: str, error: Optional[str] = None) -> Result:
+        with self._lock:
+            self.served_stale += 1
+        return _mark(result, stored, reason, error)
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.data.pop(key, None)
+
+    def _store(self, key: Hashable, result: Result, generation: int, fresh: Optional[float] = None) -> None:
+        # generation is the one seen when the load started, so a write
+        # during the load keeps this result from being served for revalidation
+        with self._lock:
+            self._entries.put(key, result, generation, fresh)
+
+    def close(self) -> None:
+        """
+        Shut down the cache's own refresh pool (running loads finish in the background).
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._own_executor:
+            executor.shutdown(wait=False)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        # Called under self._lock
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="stale-refresh")
+            self._own_executor = True
+        return self._executor
+
+    def _refresh(
+        self, key: Hashable, load: Callable[[], Result], inline: bool = False, fresh: Optional[float] = None
+    ) -> Future:
+        """
+        Start (or join) a background load of key that stores a successful result.
+        With inline, the load runs on the calling thread if every worker is
+        busy: waiting in the pool queue would eat the caller's deadline.
+        """
+        with self._lock:
+            # A load started before the latest write is not joined
+            generation = self.generation
+            future = self._inflight.get((key, generation))
+            if future is not None:
+                return future
+            run_here = inline and len(self._inflight) >= self.workers
+            future = Future() if run_here else self._pool().submit(load)
+            self._inflight[(key, generation)] = future
+
+        def done(finished: Future) -> None:
+            with self._lock:
+                self._inflight.pop((key, generation), None)
+            if finished.cancelled():
+                return
+            error = finished.exception()
+            if error is not None:
+                if _final_error(error):
+                    self._forget(key)
+            elif _succeeded(finished.result()):
+                self._store(key, finished.result(), generation, fresh)
+            elif _final_result(finished.result()):
+                self._forget(key)
+
+        future.add_done_callback(done)
+        if run_here:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(load())
+            except BaseException as e:
+                future.set_exception(e)
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries.data),
+                "refreshing": len(self._inflight),
+                "served_stale": self.served_stale,
+            }
+
+
+class AsyncStaleCache:
+    """
+    Stale serving for coroutine loaders; same settings as StaleCache.
+    """
+
+    def __init__(
+        self,
+        revalidate: float = 0.0,
+        stale_if_error: float = 3600.0,
+        deadline: Optional[float] = None,
+        maxsize: int = 256,
+    ) -> None:
+        self.revalidate = revalidate
+        self.stale_if_error = stale_if_error
+        self.deadline = deadline
+        self.max_age = max(revalidate, stale_if_error)
+        self._entries = _Entries(maxsize)
+        self._inflight: Dict[Tuple[Hashable, int], asyncio.Task] = {}
+        self.generation = 0
+        # A copy with its own window was stored, so serve() looks up copies even when disabled
+        self.warmed = False
+        self.served_stale = 0
+
+    def bump(self) -> None:
+        self.generation += 1
+
+    async def serve(self, key: Hashable, load: Callable[[], Awaitable[Result]]) -> Result:
+        if self.max_age <= 0 and not self.warmed:
+            return await load()
+        entry = self._entries.get(key, self.max_age)
+        if entry is not None:
+            result, stored, entry_generation, fresh = entry
+            age = time.monotonic() - stored
+            if age <= max(self.revalidate, fresh) and entry_generation == self.generation:
+                self._refresh(key, load)
+                return self._stale(result, stored, REVALIDATING)
+            if age > self.stale_if_error:
+                entry = None
+        if entry is None:
+            generation = self.generation
+            result = await load()
+            if _succeeded(result) and self.max_age > 0:
+                self._entries.put(key, result, generation)
+            return result
+
+        task = self._refresh(key, load)
+        try:
+            # Shield so the refresh keeps running after the deadline
+            result = await asyncio.wait_for(asyncio.shield(task), self.deadline)
+        except asyncio.TimeoutError:
+            return self._stale(entry[0], entry[1], TIMEOUT)
+        except Exception as e:
+            if _final_error(e):
+                self._forget(key)
+                raise
+            return self._stale(entry[0], entry[1], ERROR, str(e))
+        if _final_result(result):
+            self._forget(key)
+        elif not _succeeded(result):
+            return self._stale(entry[0], entry[1], ERROR, str(result.get("error") or result.get("message") or ""))
+        return result
+
+    async def prefetch(
+        self, key: Hashable, load: Callable[[], Awaitable[Result]], fresh: Optional[float] = None
+    ) -> Result:
+        if self.max_age <= 0 and not fresh:
+            return await load()
+        self.warmed = self.warmed or bool(fresh)
+        return await asyncio.shield(self._refresh(key, load, fresh))
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> List[Hashable]:
+        self.generation += 1
+        return self._entries.drop(match)
+
+    def _stale(self, result: Result, stored: float, reason: str, error: Optional[str] = None) -> Result:
+        self.served_stale += 1
+        return _mark(result, stored, reason, error)
+
+    def _forget(self, key: Hashable) -> None:
+        self._entries.data.pop(key, None)
+
+    def _refresh(
+        self, key: Hashable, load: Callable[[], Awaitable[Result]], fresh: Optional[float] = None
+    ) -> asyncio.Task:
+        generation = self.generation
+        task = self._inflight.get((key, generation))
+        if task is not None:
+            return task
+
+        async def run() -> Result:
+            try:
+                result = await load()
+            except Exception as e:
+                if _final_error(e):
+                    self._forget(key)
+                raise
+            else:
+                if _succeeded(result):
+                    self._entries.put(key, result, generation, fresh)
+                elif _final_result(result):
+                    self._forget(key)
+                return result
+            finally:
+                self._inflight.pop((key, generation), None)
+
+        task = self._inflight[(key, generation)] = asyncio.get_running_loop().create_task(run())
+        # Retrieve the exception of a refresh nobody awaits, so it is not logged as lost
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries.data),
+            "refreshing": len(self._inflight),
+            "served_stale": self.served_stale,
+        }
+
+
+__all__ = ["AsyncStaleCache", "StaleCache"]
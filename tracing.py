@@ -0,0 +1,310 @@
+"""
+Lightweight per-request tracing for the WordPress MCP SSE server.
+
+A trace is opened for each /mcp request and spans are recorded through a
+context variable, so code deeper in the call stack (tool dispatch and
+WordPressMCP methods) can add spans without passing the trace around.
+Finished traces are kept in a ring buffer and can optionally be exported
+as OTLP/JSON lines to a local file read by an OpenTelemetry collector.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional
+
+import httpx
+
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    A timed operation within a trace.
+    """
+
+    __slots__ = ("span_id", "parent_id", "name", "start_ns", "_started", "duration_ms", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> None:
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+
+    def finish(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "duration_ms": round(self.duration_ms or 0.0, 2),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """
+    A tree of spans rooted at one incoming request.
+    """
+
+    def __init__(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        self.trace_id = secrets.token_hex(16)
+        self.root = Span(name, None, dict(attributes or {}))
+        self.spans: List[Span] = [self.root]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.root.duration_ms or 0.0
+
+    def phases(self) -> Dict[str, float]:
+        """
+        Total time per span name, plus time inside tool spans not covered
+        by child spans (argument handling and dispatch overhead).
+        """
+        totals: Dict[str, float] = {}
+        children: Dict[str, float] = {}
+        for span in self.spans[1:]:
+            totals[span.name] = totals.get(span.name, 0.0) + (span.duration_ms or 0.0)
+            if span.parent_id:
+                children[span.parent_id] = children.get(span.parent_id, 0.0) + (span.duration_ms or 0.0)
+        for span in self.spans:
+            if span.name.startswith("tool."):
+                self_ms = (span.duration_ms or 0.0) - children.get(span.span_id, 0.0)
+                totals["tool.self"] = totals.get("tool.self", 0.0) + max(0.0, self_ms)
+        return {name: round(value, 2) for name, value in totals.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name,
+            "start": self.root.start_ns / 1e9,
+            "duration_ms": round(self.duration_ms, 2),
+            "attributes": self.root.attributes,
+            "phases": self.phases(),
+            "spans": [s.to_dict() for s in self.spans[1:]],
+        }
+
+    def to_otlp(self, service_name: str) -> Dict[str, Any]:
+        """
+        Encode the trace as an OTLP/JSON ExportTraceServiceRequest.
+        """
+        def attrs(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+            encoded = []
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    encoded.append({"key": key, "value": {"boolValue": value}})
+                elif isinstance(value, int):
+                    encoded.append({"key": key, "value": {"intValue": str(value)}})
+                elif isinstance(value, float):
+                    encoded.append({"key": key, "value": {"doubleValue": value}})
+                else:
+                    encoded.append({"key": key, "value": {"stringValue": str(value)}})
+            return encoded
+
+        spans = []
+        for span in self.spans:
+            end_ns = span.start_ns + int((span.duration_ms or 0.0) * 1e6)
+            otlp_span: Dict[str, Any] = {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": 2 if span is self.root else 1,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(end_ns),
+                "attributes": attrs(span.attributes),
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            spans.append(otlp_span)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": attrs({"service.name": service_name})},
+                    "scopeSpans": [{"scope": {"name": "wordpress-mcp"}, "spans": spans}],
+                }
+            ]
+        }
+
+
+class TraceStore:
+    """
+    Ring buffer of recently finished traces with optional OTLP file export.
+    """
+
+    def __init__(self, size: int = 256, export_path: Optional[str] = None, service_name: str = "wordpress-mcp") -> None:
+        self.traces: Deque[Trace] = deque(maxlen=size)
+        self.export_path = export_path
+        self.service_name = service_name
+        self._export_lock = threading.Lock()
+
+    def add(self, trace: Trace) -> None:
+        self.traces.append(trace)
+
+    def slowest(self, limit: int = 20, min_ms: float = 0.0) -> List[Dict[str, Any]]:
+        traces = [t for t in list(self.traces) if t.duration_ms >= min_ms]
+        traces.sort(key=lambda t: t.duration_ms, reverse=True)
+        return [t.to_dict() for t in traces[:limit]]
+
+    def export(self, trace: Trace) -> None:
+        """
+        Append the trace as one OTLP/JSON line (blocking; run off the event loop).
+        """
+        if not self.export_path:
+            return
+        line = json.dumps(trace.to_otlp(self.service_name), separators=(",", ":"))
+        with self._export_lock:
+            with open(os.path.expanduser(self.export_path), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+# ---------------------------------------------------------------------------
+# Span helpers
+# ---------------------------------------------------------------------------
+
+
+@contextmanager
+def start_trace(name: str, **attributes: Any) -> Iterator[Trace]:
+    """
+    Open a trace for the current task; spans opened inside attach to it.
+    """
+    trace = Trace(name, attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def _open_span(name: str, attributes: Dict[str, Any]) -> Optional[Span]:
+    trace = _current_trace.get()
+    if trace is None:
+        return None
+    parent = _current_span.get()
+    span = Span(name, parent.span_id if parent else None, attributes)
+    trace.spans.append(span)
+    return span
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Record a child span of the current span; a no-op outside a trace.
+    """
+    opened = _open_span(name, attributes)
+    if opened is None:
+        yield None
+        return
+    token = _current_span.set(opened)
+    try:
+        yield opened
+    finally:
+        opened.finish()
+        _current_span.reset(token)
+
+
+def record_span(name: str, start: float, end: float, **attributes: Any) -> None:
+    """
+    Record an already finished span from perf_counter timestamps.
+    """
+    opened = _open_span(name, attributes)
+    if opened is None:
+        return
+    opened.start_ns -= int((time.perf_counter() - start) * 1e9)
+    opened.duration_ms = (end - start) * 1000
+
+
+def traced(name: str) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+    """
+    Decorator wrapping an async method in a span.
+    """
+    def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# httpx integration
+# ---------------------------------------------------------------------------
+
+
+async def _on_request(request: httpx.Request) -> None:
+    """
+    Attach an httpcore trace callback that splits the upstream call into
+    pool wait, connect and round-trip spans.
+    """
+    if _current_trace.get() is None:
+        return
+    queued_at = time.perf_counter()
+    marks: Dict[str, float] = {}
+    request.extensions["wp_trace_marks"] = marks
+    request.extensions["wp_trace_queued"] = queued_at
+
+    async def trace_event(event_name: str, info: Dict[str, Any]) -> None:
+        marks.setdefault(event_name, time.perf_counter())
+
+    request.extensions["trace"] = trace_event
+
+
+async def _on_response(response: httpx.Response) -> None:
+    """
+    Record upstream phases once the response headers have arrived.
+    """
+    request = response.request
+    marks: Optional[Dict[str, float]] = request.extensions.get("wp_trace_marks")
+    if marks is None:
+        return
+    queued_at = request.extensions["wp_trace_queued"]
+    now = time.perf_counter()
+
+    connect_start = marks.get("connection.connect_tcp.started")
+    send_start = next((v for k, v in marks.items() if k.endswith("send_request_headers.started")), None)
+    headers_done = next((v for k, v in marks.items() if k.endswith("receive_response_headers.complete")), now)
+
+    pool_end = connect_start or send_start or headers_done
+    record_span("upstream.pool_wait", queued_at, pool_end)
+    if connect_start is not None:
+        connect_end = marks.get("connection.start_tls.complete") or marks.get("connection.connect_tcp.complete") or connect_start
+        record_span("upstream.connect", connect_start, connect_end)
+    attributes: Dict[str, Any] = {
+        "http.method": request.method,
+        "http.path": request.url.path,
+        "http.status_code": response.status_code,
+    }
+    server_timing = response.headers.get("Server-Timing")
+    if server_timing:
+        attributes["server_timing"] = server_timing
+    record_span("upstream.roundtrip", send_start or pool_end, headers_done, **attributes)
+
+
+def instrument_client(client: httpx.AsyncClient) -> None:
+    """
+    Register the tracing event hooks on an httpx AsyncClient.
+    """
+    client.event_hooks["request"].append(_on_request)
+    client.event_hooks["response"].append(_on_response)
@@ -0,0 +1,324 @@
+"""
+Background warming of hot read results.
+
+A warmup plan lists read calls to prefetch ({"tool", "args"} and, where it
+applies, "site"). An access tracker counts the read calls actually made,
+with exponential decay, and the calls used most recently and most often
+are warmed together with the plan: once at startup and then on a schedule.
+The tracker is saved to a JSON file, so a restarted server warms what was
+hot before the restart instead of starting cold.
+
+What "warming" stores is up to the caller's run function; the servers here
+refresh their stale-serving caches, which also fills the per-client caches
+(site info, terms) and the connection pool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger("wordpress-mcp-warmup")
+
+Call = Dict[str, Any]
+
+
+def call_key(call: Call) -> str:
+    """
+    Stable identity of a call, used for tracking and de-duplication.
+    """
+    return json.dumps(call, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def load_warmup_plan(source: Union[str, Iterable[Any], None], default: Iterable[Call] = ()) -> List[Call]:
+    """
+    Parse a plan from a list, inline JSON or a JSON file path.
+
+    Items are {"tool": name, "args": {...}} (optionally with "site") or
+    bare tool names. An empty source gives the default plan; "[]" disables it.
+    """
+    if source is None or (isinstance(source, str) and not source.strip()):
+        source = list(default)
+    if isinstance(source, str):
+        text = source.strip()
+        if not text.startswith("["):
+            with open(os.path.expanduser(text), encoding="utf-8") as f:
+                text = f.read()
+        try:
+            source = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Invalid warmup plan JSON: {e}") from e
+    if not isinstance(source, list):
+        raise ValueError("Warmup plan must be a JSON list of calls")
+    plan: List[Call] = []
+    for item in source:
+        if isinstance(item, str):
+            item = {"tool": item}
+        if not isinstance(item, dict) or not item.get("tool"):
+            raise ValueError(f"Warmup plan item needs a tool name: {item!r}")
+        call: Call = {"tool": str(item["tool"]), "args": dict(item.get("args") or {})}
+        if item.get("site"):
+            call["site"] = str(item["site"])
+        plan.append(call)
+    return plan
+
+
+class AccessTracker:
+    """
+    Decayed access counts of calls (thread-safe).
+
+    Each access adds 1 to the call's score; scores halve every half_life
+    seconds. Wall-clock time is used so saved scores keep decaying while
+    the server is down.
+    """
+
+    def __init__(self, half_life: float = 6 * 3600.0, maxsize: int = 1000) -> None:
+        self.half_life = half_life
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # call key -> (call, score, updated at)
+        self._scores: Dict[str, Tuple[Call, float, float]] = {}
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - updated) / self.half_life)
+
+    def record(self, call: Call) -> None:
+        key = call_key(call)
+        now = time.time()
+        with self._lock:
+            entry = self._scores.get(key)
+            score = self._decayed(entry[1], entry[2], now) if entry else 0.0
+            self._scores[key] = (call, score + 1.0, now)
+            if len(self._scores) > self.maxsize:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        # Called under self._lock; drops the coldest tenth
+        ranked = sorted(self._scores, key=lambda k: self._decayed(self._scores[k][1], self._scores[k][2], now))
+        for key in ranked[: max(1, len(ranked) // 10)]:
+            del self._scores[key]
+
+    def hot(self, limit: int, min_score: float = 1.5) -> List[Call]:
+        """
+        Up to limit calls scoring at least min_score, hottest first. The
+        default skips calls made only once (two recent calls score ~2).
+        """
+        if limit <= 0:
+            return []
+        now = time.time()
+        with self._lock:
+            scored = [(self._decayed(score, updated, now), call) for call, score, updated in self._scores.values()]
+        scored = [item for item in scored if item[0] >= min_score]
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [call for _, call in scored[:limit]]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._scores)
+
+    def load(self, path: Optional[str]) -> None:
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+            entries = [(item["call"], float(item["score"]), float(item["updated"])) for item in saved]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring unreadable warmup state %s: %s", path, e)
+            return
+        with self._lock:
+            for call, score, updated in entries:
+                self._scores.setdefault(call_key(call), (call, score, updated))
+
+    def save(self, path: Optional[str]) -> None:
+        """
+        Write the scores to path atomically (best effort).
+        """
+        if not path:
+            return
+        with self._lock:
+            saved = [{"call": call, "score": score, "updated": updated} for call, score, updated in self._scores.values()]
+        # A temporary file of its own, so processes sharing the state do not
+        # write into each other's half-written copy
+        try:
+            fd, temporary = tempfile.mkstemp(
+                prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(os.path.abspath(path))
+            )
+        except OSError as e:
+            logger.warning("Could not save warmup state %s: %s", path, e)
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False, default=str)
+            os.replace(temporary, path)
+        except OSError as e:
+            logger.warning("Could not save warmup state %s: %s", path, e)
+            try:
+                os.unlink(temporary)
+            except OSError:
+                pass
+
+
+def _failed(result: Any) -> bool:
+    return isinstance(result, dict) and result.get("success") is False
+
+
+class _WarmerBase:
+    def __init__(
+        self,
+        plan: Iterable[Call],
+        tracker: Optional[AccessTracker],
+        hot_keys: int,
+        interval: float,
+        concurrency: int,
+        state_path: Optional[str],
+    ) -> None:
+        self.plan = list(plan)
+        self.tracker = tracker
+        self.hot_keys = hot_keys
+        self.interval = interval
+        self.concurrency = max(1, concurrency)
+        self.state_path = state_path
+        self.rounds = 0
+        self.last: Dict[str, Any] = {}
+
+    def calls(self) -> List[Call]:
+        """
+        The plan followed by the hot calls it does not already cover.
+        """
+        calls: Dict[str, Call] = {}
+        for call in self.plan + (self.tracker.hot(self.hot_keys) if self.tracker else []):
+            calls.setdefault(call_key(call), call)
+        return list(calls.values())
+
+    def _finish(self, started: float, total: int, failures: List[str]) -> Dict[str, Any]:
+        self.rounds += 1
+        self.last = {
+            "calls": total,
+            "failed": len(failures),
+            "errors": failures[:5],
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "finished_at": time.time(),
+        }
+        if self.tracker is not None:
+            self.tracker.save(self.state_path)
+        return self.last
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "plan": len(self.plan),
+            "tracked": len(self.tracker) if self.tracker else 0,
+            "hot": len(self.tracker.hot(self.hot_keys)) if self.tracker else 0,
+            "interval_s": self.interval,
+            "rounds": self.rounds,
+            "last": self.last,
+        }
+
+
+class Warmer(_WarmerBase):
+    """
+    Warms calls with a blocking run function on a daemon thread.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Call], Any],
+        plan: Iterable[Call],
+        tracker: Optional[AccessTracker] = None,
+        hot_keys: int = 20,
+        interval: float = 300.0,
+        concurrency: int = 4,
+        state_path: Optional[str] = None,
+    ) -> None:
+        super().__init__(plan, tracker, hot_keys, interval, concurrency, state_path)
+        self.run = run
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run_one(self, call: Call) -> Optional[str]:
+        try:
+            result = self.run(call)
+        except Exception as e:
+            return f"{call['tool']}: {e}"
+        return f"{call['tool']}: {result.get('error') or result.get('message')}" if _failed(result) else None
+
+    def warm_once(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        calls = self.calls()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="warmup") as pool:
+            failures = [error for error in pool.map(self._run_one, calls) if error]
+        return self._finish(started, len(calls), failures)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.warm_once()
+            if self.interval <= 0 or self._stop.wait(self.interval):
+                break
+
+    def start(self) -> None:
+        """
+        Warm now and then every interval seconds (once if interval is 0).
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="warmup", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self.tracker is not None:
+            self.tracker.save(self.state_path)
+
+
+class AsyncWarmer(_WarmerBase):
+    """
+    Warms calls with a coroutine run function; run() is meant for a task.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[Call], Awaitable[Any]],
+        plan: Iterable[Call],
+        tracker: Optional[AccessTracker] = None,
+        hot_keys: int = 20,
+        interval: float = 300.0,
+        concurrency: int = 4,
+        state_path: Optional[str] = None,
+    ) -> None:
+        super().__init__(plan, tracker, hot_keys, interval, concurrency, state_path)
+        self.run_call = run
+
+    async def warm_once(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        calls = self.calls()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run_one(call: Call) -> Optional[str]:
+            async with semaphore:
+                try:
+                    result = await self.run_call(call)
+                except Exception as e:
+                    return f"{call['tool']}: {e}"
+            return f"{call['tool']}: {result.get('error') or result.get('message')}" if _failed(result) else None
+
+        failures = [error for error in await asyncio.gather(*(run_one(call) for call in calls)) if error]
+        return self._finish(started, len(calls), failures)
+
+    async def run(self) -> None:
+        """
+        Warm now and then every interval seconds (once if interval is 0).
+        """
+        while True:
+            await self.warm_once()
+            if self.interval <= 0:
+                return
+            await asyncio.sleep(self.interval)
+
+
+__all__ = ["AccessTracker", "AsyncWarmer", "Warmer", "call_key", "load_warmup_plan"]
@@ -0,0 +1,172 @@
+"""
+Signed change notifications pushed by WordPress.
+
+A hook on the WordPress side (e.g. a small mu-plugin) POSTs a JSON event
+when content changes, so caches are invalidated right away instead of
+waiting for their TTL:
+
+    {"event": "post.saved", "id": 123, "type": "post", "site": "blog"}
+
+Events are post.saved, post.deleted, term.changed and comment.status;
+"type" is the post type or taxonomy, "site" (a registry name) or "url"
+(the site URL) selects the site. The raw body is signed with HMAC-SHA256
+over "<timestamp>.<body>" using a shared secret and sent with:
+
+    X-Webhook-Timestamp: <unix seconds>
+    X-Webhook-Signature: sha256=<hex digest>
+    X-Webhook-Id: <unique delivery id>
+
+Requests without a delivery id, outside the timestamp tolerance, or
+repeating a delivery id or signature are rejected, so a captured request
+cannot be replayed. The signature is remembered as well because the
+delivery id itself is not signed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Mapping, Optional
+
+EVENTS = ("post.saved", "post.deleted", "term.changed", "comment.status")
+
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+SIGNATURE_HEADER = "X-Webhook-Signature"
+ID_HEADER = "X-Webhook-Id"
+
+
+class WebhookError(Exception):
+    """
+    Rejected notification; status is the HTTP status to answer with.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class DuplicateDelivery(WebhookError):
+    def __init__(self, delivery_id: str) -> None:
+        super().__init__(200, f"Delivery {delivery_id} was already processed")
+        self.delivery_id = delivery_id
+
+
+def sign(secret: str, body: bytes, timestamp: int) -> str:
+    """
+    Signature header value for body sent at timestamp.
+    """
+    digest = hmac.new(secret.encode("utf-8"), f"{timestamp}.".encode("ascii") + body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def parse_event(body: bytes) -> Dict[str, Any]:
+    try:
+        event = json.loads(body)
+    except ValueError as e:
+        raise WebhookError(400, f"Invalid JSON: {e}") from e
+    if not isinstance(event, dict):
+        raise WebhookError(400, "Event must be a JSON object")
+    if event.get("event") not in EVENTS:
+        raise WebhookError(400, f"Unknown event {event.get('event')!r}; expected one of: {', '.join(EVENTS)}")
+    if "id" in event and (not isinstance(event["id"], int) or isinstance(event["id"], bool)):
+        raise WebhookError(400, "Event id must be an integer")
+    return event
+
+
+class WebhookVerifier:
+    """
+    Checks signatures, timestamps and delivery ids (thread-safe).
+    """
+
+    def __init__(self, secret: str, tolerance: float = 300.0, seen_size: int = 4096) -> None:
+        self.secret = secret
+        self.tolerance = tolerance
+        self.seen_size = seen_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+        self.duplicates = 0
+
+    def verify(self, body: bytes, headers: Mapping[str, str]) -> Dict[str, Any]:
+        """
+        Return the event of a valid request or raise WebhookError.
+        """
+        try:
+            event = self._verify(body, headers)
+        except DuplicateDelivery:
+            with self._lock:
+                self.duplicates += 1
+            raise
+        except WebhookError:
+            with self._lock:
+                self.rejected += 1
+            raise
+        with self._lock:
+            self.accepted += 1
+        return event
+
+    def _verify(self, body: bytes, headers: Mapping[str, str]) -> Dict[str, Any]:
+        timestamp = headers.get(TIMESTAMP_HEADER)
+        signature = headers.get(SIGNATURE_HEADER)
+        delivery_id = headers.get(ID_HEADER)
+        if not timestamp or not signature or not delivery_id:
+            raise WebhookError(401, f"Missing {TIMESTAMP_HEADER}, {SIGNATURE_HEADER} or {ID_HEADER}")
+        try:
+            sent_at = int(timestamp)
+        except ValueError:
+            raise WebhookError(401, f"Invalid {TIMESTAMP_HEADER}") from None
+        if abs(time.time() - sent_at) > self.tolerance:
+            raise WebhookError(401, "Timestamp outside the allowed window")
+        if not hmac.compare_digest(sign(self.secret, body, sent_at), signature.strip()):
+            raise WebhookError(401, "Invalid signature")
+        event = parse_event(body)
+        # Checked after the signature, so forged ids cannot fill the window.
+        # A replay under a fresh id still carries the original signature
+        keys = ("id:" + delivery_id, "sig:" + signature.strip())
+        with self._lock:
+            if any(key in self._seen for key in keys):
+                raise DuplicateDelivery(delivery_id)
+            for key in keys:
+                self._seen[key] = None
+            while len(self._seen) > self.seen_size * 2:
+                self._seen.popitem(last=False)
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"accepted": self.accepted, "rejected": self.rejected, "duplicates": self.duplicates}
+
+
+def event_site(event: Mapping[str, Any], site_urls: Mapping[str, str]) -> Optional[str]:
+    """
+    Registry name of the site an event is about: its "site" or the site
+    whose URL matches its "url" (None when neither is given).
+    """
+    if event.get("site"):
+        return str(event["site"])
+    url = str(event.get("url") or "").rstrip("/")
+    if not url:
+        return None
+    for name, site_url in site_urls.items():
+        if site_url.rstrip("/") == url:
+            return name
+    raise WebhookError(404, f"No configured site has URL {url}")
+
+
+__all__ = [
+    "DuplicateDelivery",
+    "EVENTS",
+    "ID_HEADER",
+    "SIGNATURE_HEADER",
+    "TIMESTAMP_HEADER",
+    "WebhookError",
+    "WebhookVerifier",
+    "event_site",
+    "parse_event",
+    "sign",
+]